@@ -0,0 +1,15 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import tenancy
+from .models import BarberShop
+
+
+@receiver(post_save, sender=BarberShop)
+@receiver(post_delete, sender=BarberShop)
+def invalidate_tenant_cache(sender, instance, **kwargs):
+    # Depois do COMMIT: removida antes, a entrada poderia ser recarregada com a linha antiga por uma
+    # requisição concorrente e ficar no cache pelo TTL inteiro
+    slug, owner_id = instance.scheduling_link, instance.owner_id
+    transaction.on_commit(lambda: tenancy.invalidate(slug, owner_id))
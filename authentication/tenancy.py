@@ -0,0 +1,125 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .models import BarberShop
+
+
+class TTLCache:
+    """LRU limitado, com expiração por tempo, seguro para threads (cache em memória do processo)."""
+
+    _missing = object()
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key, self._missing)
+            if entry is self._missing or entry[1] <= now:
+                if entry is not self._missing:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
+
+
+# Identidade do tenant quase nunca muda: slug -> salão ativo e usuário -> salão gerenciado.
+# A invalidação (signals) é local ao processo; em vários processos o TTL limita o tempo de um dado antigo.
+_NOT_FOUND = object()
+
+_by_slug = TTLCache(
+    getattr(settings, 'TENANT_CACHE_SIZE', 1024), getattr(settings, 'TENANT_CACHE_TTL', 60),
+)
+_by_owner = TTLCache(
+    getattr(settings, 'TENANT_CACHE_SIZE', 1024), getattr(settings, 'TENANT_CACHE_TTL', 60),
+)
+
+
+def barbershop_for_slug(slug):
+    """Salão ATIVO do link de agendamento, ou None."""
+    barbershop = _by_slug.get(slug, _NOT_FOUND)
+    if barbershop is _NOT_FOUND:
+        barbershop = BarberShop.objects.filter(scheduling_link=slug, active=True).first()
+        _by_slug.set(slug, barbershop)
+    return barbershop
+
+
+async def abarbershop_for_slug(slug):
+    """Versão assíncrona de barbershop_for_slug (mesmo cache; consulta com o ORM assíncrono)."""
+    barbershop = _by_slug.get(slug, _NOT_FOUND)
+    if barbershop is _NOT_FOUND:
+        barbershop = await BarberShop.objects.filter(scheduling_link=slug, active=True).afirst()
+        _by_slug.set(slug, barbershop)
+    return barbershop
+
+
+def get_barbershop_for_slug(slug):
+    """Igual a barbershop_for_slug, mas com o contrato de .get(): levanta BarberShop.DoesNotExist."""
+    barbershop = barbershop_for_slug(slug)
+    if barbershop is None:
+        raise BarberShop.DoesNotExist('Salão não encontrado ou inativo.')
+    return barbershop
+
+
+def barbershop_for_user(user):
+    """Salão gerenciado pelo usuário logado, ou None."""
+    if not user.is_authenticated:
+        return None
+
+    barbershop = _by_owner.get(user.pk, _NOT_FOUND)
+    if barbershop is _NOT_FOUND:
+        barbershop = BarberShop.objects.filter(owner_id=user.pk).first()
+        _by_owner.set(user.pk, barbershop)
+    return barbershop
+
+
+def invalidate(slug, owner_id):
+    _by_slug.delete(slug)
+    _by_owner.delete(owner_id)
+
+
+def clear():
+    _by_slug.clear()
+    _by_owner.clear()
+
+
+def stats():
+    return {'slug': _by_slug.stats(), 'owner': _by_owner.stats()}
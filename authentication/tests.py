@@ -0,0 +1,65 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+
+from authentication import tenancy
+from authentication.models import BarberShop
+
+
+class TTLCacheTests(SimpleTestCase):
+
+    def test_lru_eviction_and_stats(self):
+        lru = tenancy.TTLCache(maxsize=2, ttl=60)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        self.assertEqual(lru.get('a'), 1)  # 'a' passa a ser o mais recente
+        lru.set('c', 3)                    # descarta 'b'
+
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual(lru.get('c'), 3)
+        self.assertEqual(lru.stats(), {'size': 2, 'hits': 2, 'misses': 1, 'hit_rate': 2 / 3})
+
+    def test_entries_expire(self):
+        lru = tenancy.TTLCache(maxsize=10, ttl=5)
+        with mock.patch('authentication.tenancy.time.monotonic', return_value=100):
+            lru.set('a', 1)
+        with mock.patch('authentication.tenancy.time.monotonic', return_value=104):
+            self.assertEqual(lru.get('a'), 1)
+        with mock.patch('authentication.tenancy.time.monotonic', return_value=105):
+            self.assertIsNone(lru.get('a'))
+
+
+class TenantResolutionTests(TestCase):
+
+    def setUp(self):
+        tenancy.clear()
+        self.owner = User.objects.create_user(username='dono@teste.com', password='senha-forte-123')
+        self.barbershop = BarberShop.objects.create(
+            name='Salão Teste', email='dono@teste.com', owner=self.owner, scheduling_link='salao-teste'
+        )
+
+    def test_slug_and_owner_lookups_hit_the_database_once(self):
+        with self.assertNumQueries(2):
+            for _ in range(3):
+                self.assertEqual(tenancy.barbershop_for_slug('salao-teste'), self.barbershop)
+                self.assertEqual(tenancy.barbershop_for_user(self.owner), self.barbershop)
+
+        self.assertEqual(tenancy.stats()['slug']['hits'], 2)
+        self.assertEqual(tenancy.stats()['owner']['misses'], 1)
+
+    def test_save_invalidates(self):
+        self.assertIsNotNone(tenancy.barbershop_for_slug('salao-teste'))
+
+        self.barbershop.active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.barbershop.save()
+        self.assertIsNone(tenancy.barbershop_for_slug('salao-teste'))
+        with self.assertRaises(BarberShop.DoesNotExist):
+            tenancy.get_barbershop_for_slug('salao-teste')
+
+    def test_delete_invalidates(self):
+        self.assertEqual(tenancy.barbershop_for_user(self.owner), self.barbershop)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.barbershop.delete()
+        self.assertIsNone(tenancy.barbershop_for_user(self.owner))
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import FrequencySuggestion
+from .models import FrequencySuggestion, RescheduleSuggestion
 
 # Register your models here.
 
@@ -10,3 +10,11 @@ class FrequencySuggestionAdmin(admin.ModelAdmin):
     search_fields = ('barbershop__name', 'service__name')
     list_filter = ('barbershop',)
     ordering = ('barbershop', 'service')
+
+
+@admin.register(RescheduleSuggestion)
+class RescheduleSuggestionAdmin(admin.ModelAdmin):
+    list_display = ('barbershop', 'client', 'service', 'last_service_date', 'window_start', 'window_end')
+    list_filter = ('barbershop',)
+    list_select_related = ('barbershop', 'client', 'service')
+    raw_id_fields = ('client', 'service')
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class IntelligenceConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'intelligence'
+
+    def ready(self):
+        # Registra os receivers que mantêm a tabela de sugestões de reagendamento
+        from . import signals  # noqa: F401
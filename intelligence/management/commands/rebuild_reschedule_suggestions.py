@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from intelligence.suggestions import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói do zero a tabela de sugestões de reagendamento a partir do histórico de agendamentos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--barbershop', type=int, help='Reconstrói apenas o salão com este id.')
+
+    def handle(self, *args, **options):
+        total = rebuild(options.get('barbershop'))
+        self.stdout.write(self.style.SUCCESS(f'{total} sugestões recalculadas.'))
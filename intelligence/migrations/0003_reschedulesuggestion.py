@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0001_initial'),
+        ('intelligence', '0002_alter_frequencysuggestion_options'),
+        ('schedulingservices', '0005_scheduling_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RescheduleSuggestion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_service_date', models.DateTimeField()),
+                ('window_start', models.DateField(blank=True, null=True)),
+                ('window_end', models.DateField(blank=True, null=True)),
+                ('barbershop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reschedule_suggestions', to='authentication.barbershop')),
+                ('client', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reschedule_suggestions', to='schedulingservices.client')),
+                ('service', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reschedule_suggestions', to='schedulingservices.service')),
+            ],
+            options={
+                'verbose_name': 'Sugestão de Reagendamento',
+                'verbose_name_plural': 'Sugestões de Reagendamento',
+                'indexes': [models.Index(fields=['barbershop', 'window_start', 'window_end'], name='resched_shop_window_idx')],
+                'unique_together': {('barbershop', 'client', 'service')},
+            },
+        ),
+    ]
@@ -0,0 +1,68 @@
+from datetime import timedelta
+
+from django.db import migrations
+from django.db.models import Max
+from django.utils import timezone
+
+
+# Cópia das regras de intelligence/suggestions.py no momento desta migração: ela usa só os modelos
+# históricos, para continuar funcionando quando os modelos e o código atual mudarem
+BATCH_SIZE = 1000
+
+
+def compute_window(last_service_date, rule):
+    if rule is None:
+        return None, None
+    last_date = timezone.localdate(last_service_date)
+    return (
+        last_date + timedelta(days=rule.ideal_return_days - rule.anticipation_tolerance_days),
+        last_date + timedelta(days=rule.ideal_return_days),
+    )
+
+
+def backfill(apps, schema_editor):
+    """
+    Preenche as sugestões a partir do histórico já existente: sem isso, /ai-sugestoes/ voltaria vazio até
+    alguém rodar `rebuild_reschedule_suggestions`.
+    """
+    Scheduling = apps.get_model('schedulingservices', 'Scheduling')
+    SchedulingArchive = apps.get_model('schedulingservices', 'SchedulingArchive')
+    FrequencySuggestion = apps.get_model('intelligence', 'FrequencySuggestion')
+    RescheduleSuggestion = apps.get_model('intelligence', 'RescheduleSuggestion')
+    alias = schema_editor.connection.alias
+
+    rules = {(rule.barbershop_id, rule.service_id): rule for rule in FrequencySuggestion.objects.using(alias)}
+
+    # Último 'Concluido' por cliente/serviço, somando a tabela quente e o arquivo
+    last_dates = {}
+    for model in (Scheduling, SchedulingArchive):
+        rows = model.objects.using(alias).filter(status='Concluido').values(
+            'barbershop_id', 'client_id', 'service_id',
+        ).annotate(last_service_date=Max('date_hour_init')).order_by()
+        for row in rows.iterator(chunk_size=BATCH_SIZE):
+            key = (row['barbershop_id'], row['client_id'], row['service_id'])
+            last_dates[key] = max(row['last_service_date'], last_dates.get(key, row['last_service_date']))
+
+    suggestions = []
+    for (barbershop_id, client_id, service_id), last_service_date in last_dates.items():
+        window_start, window_end = compute_window(last_service_date, rules.get((barbershop_id, service_id)))
+        suggestions.append(RescheduleSuggestion(
+            barbershop_id=barbershop_id, client_id=client_id, service_id=service_id,
+            last_service_date=last_service_date, window_start=window_start, window_end=window_end,
+        ))
+
+    RescheduleSuggestion.objects.using(alias).all().delete()
+    RescheduleSuggestion.objects.using(alias).bulk_create(suggestions, batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('intelligence', '0003_reschedulesuggestion'),
+        # O histórico inclui o arquivo de agendamentos
+        ('schedulingservices', '0009_scheduling_archive'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
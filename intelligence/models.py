@@ -1,5 +1,5 @@
 from django.db import models
-from schedulingservices.models import Service 
+from schedulingservices.models import Client, Service
 from authentication.models import BarberShop 
 
 
@@ -23,3 +23,31 @@ class FrequencySuggestion(models.Model):
         
     def __str__(self):
         return f"{self.service.name}: {self.ideal_return_days} days"
+
+
+class RescheduleSuggestion(models.Model):
+    """
+    Tabela materializada: último atendimento 'Concluido' por cliente/serviço e a janela de sugestão já calculada.
+    Mantida incrementalmente pelos signals (intelligence/signals.py) e reconstruída com
+    `manage.py rebuild_reschedule_suggestions`.
+    """
+
+    barbershop = models.ForeignKey(BarberShop, on_delete=models.CASCADE, related_name='reschedule_suggestions')
+    client = models.ForeignKey(Client, on_delete=models.CASCADE, related_name='reschedule_suggestions')
+    service = models.ForeignKey(Service, on_delete=models.CASCADE, related_name='reschedule_suggestions')
+    last_service_date = models.DateTimeField()
+
+    # Janela de sugestão (datas locais); vazia quando o serviço não tem regra de frequência
+    window_start = models.DateField(null=True, blank=True)
+    window_end = models.DateField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ('barbershop', 'client', 'service')
+        indexes = [
+            models.Index(fields=['barbershop', 'window_start', 'window_end'], name='resched_shop_window_idx'),
+        ]
+        verbose_name = "Sugestão de Reagendamento"
+        verbose_name_plural = "Sugestões de Reagendamento"
+
+    def __str__(self):
+        return f"{self.client_id}/{self.service_id}: {self.window_start} - {self.window_end}"
@@ -0,0 +1,63 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from schedulingservices import archive
+from schedulingservices.models import Scheduling
+from . import suggestions
+from .models import FrequencySuggestion
+
+
+# --- Agendamentos: mantém a tabela RescheduleSuggestion em dia ---
+# O estado anterior (instance._previous) é guardado pelo pre_save de schedulingservices/signals.py
+
+def _key(data):
+    return data['barbershop_id'], data['client_id'], data['service_id']
+
+
+@receiver(post_save, sender=Scheduling)
+def update_suggestion_on_scheduling_save(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous', None)
+    was_completed = previous is not None and previous['status'] == 'Concluido'
+    current_key = (instance.barbershop_id, instance.client_id, instance.service_id)
+
+    if instance.status == 'Concluido':
+        if was_completed and (_key(previous) != current_key or previous['date_hour_init'] > instance.date_hour_init):
+            # O atendimento antigo podia ser o último do cliente/serviço: recalcula a partir do histórico
+            suggestions.refresh_client_service(*_key(previous))
+        suggestions.record_completion(instance)
+
+    elif was_completed:
+        # Deixou de ser 'Concluido' (ex.: marcado por engano)
+        suggestions.refresh_client_service(*_key(previous))
+
+
+@receiver(post_delete, sender=Scheduling)
+def update_suggestion_on_scheduling_delete(sender, instance, **kwargs):
+    # Arquivado não é removido do histórico: o último 'Concluido' continua o mesmo
+    if instance.status == 'Concluido' and not archive.in_progress():
+        suggestions.refresh_client_service(instance.barbershop_id, instance.client_id, instance.service_id)
+
+
+# --- Regras de frequência: recalculam as janelas do serviço ---
+
+@receiver(pre_save, sender=FrequencySuggestion)
+def remember_previous_rule(sender, instance, **kwargs):
+    instance._previous_service_id = None
+    if instance.pk:
+        instance._previous_service_id = FrequencySuggestion.objects.filter(pk=instance.pk).values_list(
+            'service_id', flat=True,
+        ).first()
+
+
+@receiver(post_save, sender=FrequencySuggestion)
+def update_windows_on_rule_save(sender, instance, **kwargs):
+    suggestions.refresh_service_windows(instance.barbershop_id, instance.service_id)
+
+    previous_service_id = getattr(instance, '_previous_service_id', None)
+    if previous_service_id and previous_service_id != instance.service_id:
+        suggestions.refresh_service_windows(instance.barbershop_id, previous_service_id)
+
+
+@receiver(post_delete, sender=FrequencySuggestion)
+def update_windows_on_rule_delete(sender, instance, **kwargs):
+    suggestions.refresh_service_windows(instance.barbershop_id, instance.service_id)
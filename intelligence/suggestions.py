@@ -0,0 +1,156 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from schedulingservices.models import Scheduling, SchedulingArchive
+from .models import FrequencySuggestion, RescheduleSuggestion
+
+
+BATCH_SIZE = 1000
+
+
+def compute_window(last_service_date, rule):
+    """
+    Janela de sugestão (datas locais) a partir do último atendimento e da regra de frequência:
+    de (ideal - tolerância) até ideal dias após o atendimento.
+    """
+    if rule is None:
+        return None, None
+
+    last_date = timezone.localdate(last_service_date)
+    return (
+        last_date + timedelta(days=rule.ideal_return_days - rule.anticipation_tolerance_days),
+        last_date + timedelta(days=rule.ideal_return_days),
+    )
+
+
+def _rule(barbershop_id, service_id):
+    return FrequencySuggestion.objects.filter(barbershop_id=barbershop_id, service_id=service_id).first()
+
+
+def record_completion(scheduling):
+    """Caminho rápido: um agendamento virou 'Concluido'; só avança a data se for mais recente."""
+    current = RescheduleSuggestion.objects.filter(
+        barbershop_id=scheduling.barbershop_id, client_id=scheduling.client_id, service_id=scheduling.service_id,
+    ).values_list('last_service_date', flat=True).first()
+
+    if current is not None and current >= scheduling.date_hour_init:
+        return
+
+    window_start, window_end = compute_window(
+        scheduling.date_hour_init, _rule(scheduling.barbershop_id, scheduling.service_id)
+    )
+    RescheduleSuggestion.objects.update_or_create(
+        barbershop_id=scheduling.barbershop_id, client_id=scheduling.client_id, service_id=scheduling.service_id,
+        defaults={
+            'last_service_date': scheduling.date_hour_init,
+            'window_start': window_start,
+            'window_end': window_end,
+        },
+    )
+
+
+def refresh_client_service(barbershop_id, client_id, service_id):
+    """Recalcula a linha de um cliente/serviço a partir do histórico (ex.: um 'Concluido' foi desfeito)."""
+    # O último atendimento pode já estar no arquivo (schedulingservices/archive.py)
+    dates = [
+        model.objects.filter(
+            barbershop_id=barbershop_id, client_id=client_id, service_id=service_id, status='Concluido',
+        ).aggregate(last=Max('date_hour_init'))['last']
+        for model in (Scheduling, SchedulingArchive)
+    ]
+    last_service_date = max((date for date in dates if date is not None), default=None)
+
+    lookup = {'barbershop_id': barbershop_id, 'client_id': client_id, 'service_id': service_id}
+
+    if last_service_date is None:
+        RescheduleSuggestion.objects.filter(**lookup).delete()
+        return
+
+    window_start, window_end = compute_window(last_service_date, _rule(barbershop_id, service_id))
+    RescheduleSuggestion.objects.update_or_create(**lookup, defaults={
+        'last_service_date': last_service_date,
+        'window_start': window_start,
+        'window_end': window_end,
+    })
+
+
+def refresh_service_windows(barbershop_id, service_id):
+    """A regra de frequência do serviço mudou: recalcula a janela de todas as linhas do serviço."""
+    rule = _rule(barbershop_id, service_id)
+    rows = RescheduleSuggestion.objects.filter(barbershop_id=barbershop_id, service_id=service_id).only(
+        'id', 'last_service_date', 'window_start', 'window_end',
+    )
+
+    batch = []
+    with transaction.atomic():
+        for row in rows.iterator(chunk_size=BATCH_SIZE):
+            row.window_start, row.window_end = compute_window(row.last_service_date, rule)
+            batch.append(row)
+            if len(batch) >= BATCH_SIZE:
+                RescheduleSuggestion.objects.bulk_update(batch, ['window_start', 'window_end'])
+                batch = []
+        if batch:
+            RescheduleSuggestion.objects.bulk_update(batch, ['window_start', 'window_end'])
+
+
+def _last_completions(model, barbershop_id):
+    history = model.objects.filter(status='Concluido')
+    if barbershop_id is not None:
+        history = history.filter(barbershop_id=barbershop_id)
+    return history.values('barbershop_id', 'client_id', 'service_id').annotate(
+        last_service_date=Max('date_hour_init'),
+    ).order_by()
+
+
+def rebuild(barbershop_id=None):
+    """
+    Reconstrói a tabela do zero a partir do histórico de agendamentos (tabela quente e arquivo).
+    Retorna o total de linhas.
+    """
+    suggestions = RescheduleSuggestion.objects.all()
+    rules = FrequencySuggestion.objects.all()
+    if barbershop_id is not None:
+        suggestions = suggestions.filter(barbershop_id=barbershop_id)
+        rules = rules.filter(barbershop_id=barbershop_id)
+
+    rules_by_service = {(rule.barbershop_id, rule.service_id): rule for rule in rules}
+
+    # Último atendimento arquivado por cliente/serviço; a tabela quente é percorrida em seguida e
+    # prevalece quando for mais recente
+    archived = {
+        (item['barbershop_id'], item['client_id'], item['service_id']): item['last_service_date']
+        for item in _last_completions(SchedulingArchive, barbershop_id).iterator(chunk_size=BATCH_SIZE)
+    }
+
+    def last_completions():
+        for item in _last_completions(Scheduling, barbershop_id).iterator(chunk_size=BATCH_SIZE):
+            key = (item['barbershop_id'], item['client_id'], item['service_id'])
+            item['last_service_date'] = max(item['last_service_date'], archived.pop(key, item['last_service_date']))
+            yield item
+        for (shop_id, client_id, service_id), last_service_date in archived.items():
+            yield {
+                'barbershop_id': shop_id, 'client_id': client_id, 'service_id': service_id,
+                'last_service_date': last_service_date,
+            }
+
+    total = 0
+    batch = []
+    with transaction.atomic():
+        suggestions.delete()
+        for item in last_completions():
+            window_start, window_end = compute_window(
+                item['last_service_date'], rules_by_service.get((item['barbershop_id'], item['service_id']))
+            )
+            batch.append(RescheduleSuggestion(window_start=window_start, window_end=window_end, **item))
+            if len(batch) >= BATCH_SIZE:
+                RescheduleSuggestion.objects.bulk_create(batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            RescheduleSuggestion.objects.bulk_create(batch)
+            total += len(batch)
+
+    return total
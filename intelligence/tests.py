@@ -1,3 +1,162 @@
+from datetime import datetime, timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from authentication import tenancy
+from authentication.models import BarberShop
+from intelligence.models import FrequencySuggestion, RescheduleSuggestion
+from schedulingservices.models import Client, Professional, Scheduling, Service
+
+
+def days_ago(days, hour=10):
+    moment = datetime.combine(timezone.localdate() - timedelta(days=days), datetime.min.time())
+    return timezone.make_aware(moment + timedelta(hours=hour))
+
+
+class RescheduleSuggestionViewSetTests(TestCase):
+
+    def setUp(self):
+        tenancy.clear()
+        self.owner = User.objects.create_user(username='dono@teste.com', password='senha-forte-123')
+        self.barbershop = BarberShop.objects.create(
+            name='Salão Teste', email='dono@teste.com', owner=self.owner, scheduling_link='salao-teste'
+        )
+        self.professional = Professional.objects.create(barbershop=self.barbershop, name='João', phone='1')
+        self.haircut = Service.objects.create(barbershop=self.barbershop, name='Corte', minutes_duration=30, value=40)
+        self.beard = Service.objects.create(barbershop=self.barbershop, name='Barba', minutes_duration=30, value=30)
+        # Corte: sugerir entre 25 e 30 dias; Barba não tem regra
+        FrequencySuggestion.objects.create(
+            barbershop=self.barbershop, service=self.haircut, ideal_return_days=30, anticipation_tolerance_days=5
+        )
+        self.api = APIClient()
+        self.api.force_authenticate(self.owner)
+
+    def complete(self, client, service, days):
+        return Scheduling.objects.create(
+            barbershop=self.barbershop, client=client, service=service, professional=self.professional,
+            date_hour_init=days_ago(days), status='Concluido',
+        )
+
+    def client_named(self, name, phone):
+        return Client.objects.create(barbershop=self.barbershop, name=name, phone_whatsap=phone)
+
+    def test_only_clients_inside_the_window_are_suggested(self):
+        inside = self.client_named('Dentro', '1')
+        edge_start = self.client_named('Limite 25', '2')
+        edge_end = self.client_named('Limite 30', '3')
+        too_early = self.client_named('Cedo', '4')
+        too_late = self.client_named('Tarde', '5')
+        returned = self.client_named('Voltou', '6')
+
+        self.complete(inside, self.haircut, 27)
+        self.complete(edge_start, self.haircut, 25)
+        self.complete(edge_end, self.haircut, 30)
+        self.complete(too_early, self.haircut, 24)
+        self.complete(too_late, self.haircut, 31)
+        # Só o último atendimento conta
+        self.complete(returned, self.haircut, 28)
+        self.complete(returned, self.haircut, 3)
+        # Serviço sem regra nunca é sugerido
+        self.complete(inside, self.beard, 27)
+        # Agendamentos não concluídos não contam
+        Scheduling.objects.create(
+            barbershop=self.barbershop, client=too_early, service=self.haircut, professional=self.professional,
+            date_hour_init=days_ago(27), status='Cancelado',
+        )
+
+        # Barbearia do usuário + uma busca por faixa na tabela materializada
+        with self.assertNumQueries(2):
+            response = self.api.get('/api/v1/ai-sugestoes/')
+
+        self.assertEqual(response.status_code, 200)
+        suggestions = {item['client_name']: item for item in response.data}
+        self.assertEqual(set(suggestions), {'Dentro', 'Limite 25', 'Limite 30'})
+        self.assertEqual(suggestions['Dentro']['days_since_service'], 27)
+        self.assertEqual(suggestions['Dentro']['days_to_suggest'], 3)
+        self.assertEqual(suggestions['Dentro']['service_name'], 'Corte')
+
+    def test_user_without_barbershop_gets_empty_list(self):
+        stranger = User.objects.create_user(username='outro@teste.com', password='senha-forte-123')
+        self.api.force_authenticate(stranger)
+        response = self.api.get('/api/v1/ai-sugestoes/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, [])
+
+
+class RescheduleSuggestionMaintenanceTests(TestCase):
+
+    def setUp(self):
+        tenancy.clear()
+        owner = User.objects.create_user(username='dono@teste.com', password='senha-forte-123')
+        self.barbershop = BarberShop.objects.create(
+            name='Salão Teste', email='dono@teste.com', owner=owner, scheduling_link='salao-teste'
+        )
+        self.professional = Professional.objects.create(barbershop=self.barbershop, name='João', phone='1')
+        self.service = Service.objects.create(barbershop=self.barbershop, name='Corte', minutes_duration=30, value=40)
+        self.client_obj = Client.objects.create(barbershop=self.barbershop, name='Maria', phone_whatsap='1')
+        self.rule = FrequencySuggestion.objects.create(
+            barbershop=self.barbershop, service=self.service, ideal_return_days=30, anticipation_tolerance_days=5
+        )
+
+    def schedule(self, days, status='Pendente'):
+        return Scheduling.objects.create(
+            barbershop=self.barbershop, client=self.client_obj, service=self.service,
+            professional=self.professional, date_hour_init=days_ago(days), status=status,
+        )
+
+    def row(self):
+        return RescheduleSuggestion.objects.filter(client=self.client_obj, service=self.service).first()
+
+    def test_completion_creates_and_advances_the_row(self):
+        scheduling = self.schedule(40)
+        self.assertIsNone(self.row())
+
+        scheduling.status = 'Concluido'
+        scheduling.save()
+        self.assertEqual(self.row().last_service_date, days_ago(40))
+        self.assertEqual(self.row().window_start, timezone.localdate() - timedelta(days=15))
+        self.assertEqual(self.row().window_end, timezone.localdate() - timedelta(days=10))
+
+        # Um atendimento mais antigo não retrocede a data
+        self.schedule(50, status='Concluido')
+        self.assertEqual(self.row().last_service_date, days_ago(40))
+
+        newer = self.schedule(27, status='Concluido')
+        self.assertEqual(self.row().last_service_date, days_ago(27))
+
+        # Desfazer o último 'Concluido' volta para o anterior; apagar tudo remove a linha
+        newer.status = 'Cancelado'
+        newer.save()
+        self.assertEqual(self.row().last_service_date, days_ago(40))
+
+        Scheduling.objects.filter(status='Concluido').delete()
+        self.assertIsNone(self.row())
+
+    def test_rule_change_recomputes_windows(self):
+        self.schedule(27, status='Concluido')
+        self.rule.ideal_return_days = 60
+        self.rule.save()
+        self.assertEqual(self.row().window_end, timezone.localdate() + timedelta(days=33))
+
+        self.rule.delete()
+        self.assertIsNone(self.row().window_start)
+
+    def test_rebuild_matches_incremental_state(self):
+        self.schedule(60, status='Concluido')
+        self.schedule(27, status='Concluido')
+        expected = list(RescheduleSuggestion.objects.values('client', 'service', 'last_service_date',
+                                                            'window_start', 'window_end'))
+
+        RescheduleSuggestion.objects.all().delete()
+        call_command('rebuild_reschedule_suggestions', stdout=StringIO())
 
-# Create your tests here.
+        self.assertEqual(
+            list(RescheduleSuggestion.objects.values('client', 'service', 'last_service_date',
+                                                     'window_start', 'window_end')),
+            expected,
+        )
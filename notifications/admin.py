@@ -0,0 +1,13 @@
+from django.contrib import admin
+
+from .models import OutboxMessage
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ('scheduling', 'barbershop', 'kind', 'status', 'available_at', 'attempts', 'sent_at')
+    list_filter = ('status', 'kind', 'barbershop')
+    list_select_related = ('barbershop', 'scheduling')
+    raw_id_fields = ('scheduling',)
+    readonly_fields = ('created_at', 'sent_at', 'last_error')
+    list_per_page = 50
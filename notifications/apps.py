@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class NotificationsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'notifications'
+
+    def ready(self):
+        # Registra os receivers que gravam as mensagens na outbox junto com o agendamento
+        from . import signals  # noqa: F401
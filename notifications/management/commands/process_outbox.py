@@ -0,0 +1,48 @@
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+
+from notifications.outbox import drain, process_batch
+from notifications.senders import get_sender
+
+
+class Command(BaseCommand):
+    help = (
+        'Worker da outbox: reserva as mensagens disponíveis em lotes, envia pelo NOTIFICATION_SENDER e '
+        'agenda novas tentativas com backoff. Vários workers podem rodar em paralelo.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--once', action='store_true', help='Esvazia o que está disponível agora e sai.')
+        parser.add_argument('--idle-sleep', type=float, default=1.0, help='Segundos de espera com a fila vazia.')
+
+    def handle(self, *args, **options):
+        sender = get_sender()
+        started = time.perf_counter()
+
+        if options['once']:
+            totals = drain(sender, options['batch_size'])
+        else:
+            totals = Counter()
+            try:
+                while True:
+                    counts = process_batch(sender, options['batch_size'])
+                    if counts:
+                        totals.update(counts)
+                        if options['verbosity'] >= 2:
+                            self.stdout.write(self.summary(counts))
+                    else:
+                        time.sleep(options['idle_sleep'])
+            except KeyboardInterrupt:
+                pass
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'{self.summary(totals)} em {elapsed:.1f}s.'))
+
+    def summary(self, counts):
+        return (
+            f"{counts['sent']} enviadas, {counts['pending']} para nova tentativa, "
+            f"{counts['skipped']} descartadas, {counts['failed']} com falha"
+        )
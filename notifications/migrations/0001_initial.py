@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('authentication', '0001_initial'),
+        ('schedulingservices', '0007_scheduling_daily_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('confirmation', 'Confirmação'), ('reminder', 'Lembrete')], max_length=20, verbose_name='Tipo')),
+                ('scheduled_for', models.DateTimeField(verbose_name='Horário do agendamento')),
+                ('status', models.CharField(choices=[('pending', 'Pendente'), ('sent', 'Enviada'), ('skipped', 'Descartada'), ('failed', 'Falhou')], default='pending', max_length=10, verbose_name='Status')),
+                ('available_at', models.DateTimeField(verbose_name='Disponível em')),
+                ('attempts', models.IntegerField(default=0, verbose_name='Tentativas')),
+                ('last_error', models.TextField(blank=True, default='', verbose_name='Último erro')),
+                ('channel', models.CharField(blank=True, default='', max_length=10, verbose_name='Canal')),
+                ('recipient', models.CharField(blank=True, default='', max_length=254, verbose_name='Destinatário')),
+                ('body', models.TextField(blank=True, default='', verbose_name='Mensagem')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criada em')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Enviada em')),
+                ('barbershop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='outbox_messages', to='authentication.barbershop', verbose_name='Salão')),
+                ('scheduling', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='outbox_messages', to='schedulingservices.scheduling', verbose_name='Agendamento')),
+            ],
+            options={
+                'verbose_name': 'Mensagem da outbox',
+                'verbose_name_plural': 'Mensagens da outbox',
+                'indexes': [models.Index(fields=['status', 'available_at'], name='outbox_status_available_idx')],
+            },
+        ),
+    ]
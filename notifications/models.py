@@ -0,0 +1,57 @@
+from django.db import models
+
+from authentication.models import BarberShop
+from schedulingservices.models import Scheduling
+
+
+KIND_CHOICES = (
+    ('confirmation', 'Confirmação'),
+    ('reminder', 'Lembrete'),
+)
+
+OUTBOX_STATUS_CHOICES = (
+    ('pending', 'Pendente'),
+    ('sent', 'Enviada'),
+    # Agendamento cancelado, remarcado ou cliente sem contato: não faz mais sentido enviar
+    ('skipped', 'Descartada'),
+    # Esgotou as tentativas
+    ('failed', 'Falhou'),
+)
+
+
+class OutboxMessage(models.Model):
+    """
+    Mensagem (WhatsApp/email) a enviar ao cliente sobre um agendamento.
+    Gravada na mesma transação do agendamento (notifications/signals.py) e entregue depois pelo
+    worker `manage.py process_outbox`: a reserva não espera a API de mensagens.
+    """
+    barbershop = models.ForeignKey(BarberShop, on_delete=models.CASCADE, related_name='outbox_messages', verbose_name='Salão')
+    scheduling = models.ForeignKey(Scheduling, on_delete=models.CASCADE, related_name='outbox_messages', verbose_name='Agendamento')
+    kind = models.CharField('Tipo', max_length=20, choices=KIND_CHOICES)
+    # Início do agendamento quando a mensagem foi criada; se mudou, a mensagem está desatualizada
+    scheduled_for = models.DateTimeField('Horário do agendamento')
+    status = models.CharField('Status', max_length=10, choices=OUTBOX_STATUS_CHOICES, default='pending')
+    # Quando a mensagem pode ser enviada: agora (confirmação), N horas antes do horário (lembrete),
+    # o fim do lease de quem a reservou ou o próximo retry
+    available_at = models.DateTimeField('Disponível em')
+    attempts = models.IntegerField('Tentativas', default=0)
+    last_error = models.TextField('Último erro', blank=True, default='')
+
+    # Preenchidos no envio, a partir dos dados atuais do agendamento
+    channel = models.CharField('Canal', max_length=10, blank=True, default='')
+    recipient = models.CharField('Destinatário', max_length=254, blank=True, default='')
+    body = models.TextField('Mensagem', blank=True, default='')
+
+    created_at = models.DateTimeField('Criada em', auto_now_add=True)
+    sent_at = models.DateTimeField('Enviada em', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Mensagem da outbox'
+        verbose_name_plural = 'Mensagens da outbox'
+        indexes = [
+            # Fila do worker: pendentes já disponíveis, na ordem em que ficaram disponíveis
+            models.Index(fields=['status', 'available_at'], name='outbox_status_available_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.get_kind_display()} #{self.scheduling_id} ({self.status})'
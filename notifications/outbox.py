@@ -0,0 +1,156 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from schedulingservices.models import OCCUPYING_STATUSES
+from .models import OutboxMessage
+
+
+# --- Enfileiramento (dentro da transação do agendamento) ---
+
+def messages_for(scheduling, now=None):
+    """Confirmação imediata e lembrete N horas antes do horário (se ainda não passou)."""
+    if scheduling.status not in OCCUPYING_STATUSES:
+        return []
+
+    now = now or timezone.now()
+    common = {
+        'barbershop_id': scheduling.barbershop_id,
+        'scheduling_id': scheduling.pk,
+        'scheduled_for': scheduling.date_hour_init,
+    }
+    messages = [OutboxMessage(kind='confirmation', available_at=now, **common)]
+
+    if settings.NOTIFICATION_REMINDER_HOURS:
+        remind_at = scheduling.date_hour_init - timedelta(hours=settings.NOTIFICATION_REMINDER_HOURS)
+        if remind_at > now:
+            messages.append(OutboxMessage(kind='reminder', available_at=remind_at, **common))
+    return messages
+
+
+def enqueue(schedulings):
+    """
+    Grava as mensagens dos agendamentos com um único INSERT. Chamada na transação que grava os
+    agendamentos: se a reserva for desfeita, as mensagens também são.
+    """
+    now = timezone.now()
+    messages = [message for scheduling in schedulings for message in messages_for(scheduling, now)]
+    OutboxMessage.objects.bulk_create(messages)
+    return messages
+
+
+# --- Worker ---
+
+def retry_delay(attempts):
+    """Backoff exponencial: NOTIFICATION_RETRY_DELAY, o dobro, o quádruplo... até NOTIFICATION_RETRY_MAX_DELAY."""
+    delay = settings.NOTIFICATION_RETRY_DELAY * 2 ** max(attempts - 1, 0)
+    return timedelta(seconds=min(delay, settings.NOTIFICATION_RETRY_MAX_DELAY))
+
+
+def claim(batch_size, now=None):
+    """
+    Reserva até batch_size mensagens disponíveis, empurrando o available_at para o fim do lease:
+    outros workers não as pegam, e se este morrer no meio do lote elas voltam sozinhas para a fila.
+
+    - PostgreSQL/MySQL 8/Oracle: SELECT ... FOR UPDATE SKIP LOCKED; workers em paralelo pegam lotes diferentes
+      sem esperar uns pelos outros.
+    - SQLite: a transação IMMEDIATE (ver settings) já serializa as reservas.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        ids = list(
+            OutboxMessage.objects.select_for_update(
+                skip_locked=connection.features.has_select_for_update_skip_locked,
+            ).filter(status='pending', available_at__lte=now)
+            .order_by('available_at', 'pk').values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            return []
+        OutboxMessage.objects.filter(pk__in=ids).update(
+            available_at=now + timedelta(seconds=settings.NOTIFICATION_LEASE_SECONDS),
+        )
+
+    # Os dados usados na mensagem vêm do agendamento atual, em uma consulta com JOIN
+    return list(
+        OutboxMessage.objects.filter(pk__in=ids).select_related(
+            'scheduling__barbershop', 'scheduling__client', 'scheduling__service', 'scheduling__professional',
+        ).order_by('available_at', 'pk')
+    )
+
+
+def is_stale(message):
+    """Agendamento cancelado/concluído ou remarcado depois que a mensagem foi criada."""
+    scheduling = message.scheduling
+    return scheduling.status not in OCCUPYING_STATUSES or scheduling.date_hour_init != message.scheduled_for
+
+
+def render(message):
+    """Preenche channel, recipient e body. Retorna False se o cliente não tem como ser contatado."""
+    scheduling = message.scheduling
+    client = scheduling.client
+    if client.phone_whatsap:
+        message.channel, message.recipient = 'whatsapp', client.phone_whatsap
+    elif client.email:
+        message.channel, message.recipient = 'email', client.email
+    else:
+        return False
+
+    start = timezone.localtime(scheduling.date_hour_init)
+    when = f"{start:%d/%m/%Y} às {start:%H:%M}"
+    if message.kind == 'reminder':
+        message.body = (
+            f"Lembrete: {client.name}, você tem {scheduling.service.name} com {scheduling.professional.name} "
+            f"em {scheduling.barbershop.name} no dia {when}."
+        )
+    else:
+        message.body = (
+            f"Olá, {client.name}! Seu agendamento de {scheduling.service.name} com {scheduling.professional.name} "
+            f"em {scheduling.barbershop.name} está marcado para {when}."
+        )
+    return True
+
+
+def process_batch(sender, batch_size=100):
+    """Reserva um lote, envia pelo sender e grava o resultado. Retorna um Counter por status."""
+    messages = claim(batch_size)
+    counts = Counter()
+    if not messages:
+        return counts
+
+    for message in messages:
+        message.attempts += 1
+        if is_stale(message) or not render(message):
+            message.status = 'skipped'
+        else:
+            try:
+                sender.send(message)
+            except Exception as exc:
+                # Erro da API externa (rede, limite, 5xx...): tenta de novo mais tarde
+                message.last_error = f'{type(exc).__name__}: {exc}'[:1000]
+                if message.attempts >= settings.NOTIFICATION_MAX_ATTEMPTS:
+                    message.status = 'failed'
+                else:
+                    message.available_at = timezone.now() + retry_delay(message.attempts)
+            else:
+                message.status = 'sent'
+                message.sent_at = timezone.now()
+                message.last_error = ''
+        counts[message.status] += 1
+
+    OutboxMessage.objects.bulk_update(messages, [
+        'status', 'available_at', 'attempts', 'last_error', 'channel', 'recipient', 'body', 'sent_at',
+    ])
+    return counts
+
+
+def drain(sender, batch_size=100):
+    """Processa lotes até não haver mais mensagens disponíveis agora."""
+    totals = Counter()
+    while True:
+        counts = process_batch(sender, batch_size)
+        if not counts:
+            return totals
+        totals.update(counts)
@@ -0,0 +1,40 @@
+import logging
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+logger = logging.getLogger(__name__)
+
+
+class BaseSender:
+    """
+    Entrega uma OutboxMessage (channel, recipient e body já preenchidos).
+    Qualquer exceção conta como falha: a mensagem volta para a fila com backoff.
+    Implementações reais (API do WhatsApp, provedor de email...) são apontadas em NOTIFICATION_SENDER.
+    """
+
+    def send(self, message):
+        raise NotImplementedError
+
+
+class LoggingSender(BaseSender):
+    """Padrão de desenvolvimento: só registra a mensagem no log."""
+
+    def send(self, message):
+        logger.info('[%s] para %s: %s', message.channel, message.recipient, message.body)
+
+
+# Mensagens "enviadas" pelo LocmemSender, como django.core.mail.outbox
+outbox = []
+
+
+class LocmemSender(BaseSender):
+    """Sender falso para testes: guarda as mensagens em notifications.senders.outbox."""
+
+    def send(self, message):
+        outbox.append(message)
+
+
+def get_sender():
+    return import_string(settings.NOTIFICATION_SENDER)()
@@ -0,0 +1,22 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from schedulingservices.models import Scheduling
+from schedulingservices.signals import schedulings_bulk_created
+from . import outbox
+
+
+# --- Agendamentos: as mensagens entram na outbox na mesma transação que grava o agendamento ---
+# O estado anterior (instance._previous) é guardado pelo pre_save de schedulingservices/signals.py
+
+@receiver(post_save, sender=Scheduling)
+def enqueue_on_scheduling_save(sender, instance, created, **kwargs):
+    previous = getattr(instance, '_previous', None)
+    # Remarcação: nova confirmação e novo lembrete; os antigos são descartados pelo worker
+    if created or (previous and previous['date_hour_init'] != instance.date_hour_init):
+        outbox.enqueue([instance])
+
+
+@receiver(schedulings_bulk_created, sender=Scheduling)
+def enqueue_on_bulk_create(sender, schedulings, **kwargs):
+    outbox.enqueue(schedulings)
@@ -0,0 +1,187 @@
+from datetime import datetime, timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from authentication import tenancy
+from authentication.models import BarberShop
+from notifications import senders
+from notifications.models import OutboxMessage
+from notifications.outbox import claim, drain, retry_delay
+from schedulingservices.models import Client, Professional, Scheduling, Service
+
+
+def in_days(days, hour=10):
+    moment = datetime.combine(timezone.localdate() + timedelta(days=days), datetime.min.time())
+    return timezone.make_aware(moment + timedelta(hours=hour))
+
+
+class FailingSender(senders.BaseSender):
+    def send(self, message):
+        raise ConnectionError('API fora do ar')
+
+
+@override_settings(
+    NOTIFICATION_SENDER='notifications.senders.LocmemSender', NOTIFICATION_REMINDER_HOURS=24,
+    NOTIFICATION_RETRY_DELAY=30, NOTIFICATION_RETRY_MAX_DELAY=3600, NOTIFICATION_MAX_ATTEMPTS=3,
+)
+class OutboxTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        tenancy.clear()
+        senders.outbox.clear()
+        self.owner = User.objects.create_user(username='dono@teste.com', password='senha-forte-123')
+        self.barbershop = BarberShop.objects.create(
+            name='Salão Teste', email='dono@teste.com', owner=self.owner, scheduling_link='salao-teste'
+        )
+        self.professional = Professional.objects.create(barbershop=self.barbershop, name='João', phone='1')
+        self.service = Service.objects.create(barbershop=self.barbershop, name='Corte', minutes_duration=30, value=40)
+        self.service.professionals_aptos.add(self.professional)
+        self.client_obj = Client.objects.create(barbershop=self.barbershop, name='Maria', phone_whatsap='11999990000')
+
+    def book(self, start, **extra):
+        return Scheduling.objects.create(
+            barbershop=self.barbershop, client=self.client_obj, service=self.service,
+            professional=self.professional, date_hour_init=start, **extra,
+        )
+
+    def make_due(self):
+        OutboxMessage.objects.filter(status='pending').update(available_at=timezone.now() - timedelta(seconds=1))
+
+    def test_public_booking_writes_confirmation_and_reminder_without_sending(self):
+        response = APIClient().post('/api/v1/public/salao-teste/', {
+            'client_name': 'Bia', 'client_phone': '11988887777', 'service_id': self.service.id,
+            'professional_id': self.professional.id, 'date_hour_init': in_days(3).isoformat(),
+        }, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        messages = OutboxMessage.objects.filter(scheduling_id=response.data['scheduling_id'])
+        self.assertEqual(sorted(messages.values_list('kind', flat=True)), ['confirmation', 'reminder'])
+        reminder = messages.get(kind='reminder')
+        self.assertEqual(reminder.available_at, in_days(3) - timedelta(hours=24))
+        # A requisição não chama o sender: quem entrega é o worker
+        self.assertEqual(senders.outbox, [])
+
+    def test_messages_are_rolled_back_with_the_booking(self):
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                self.book(in_days(3))
+                raise RuntimeError
+
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    def test_no_reminder_when_the_booking_is_sooner_than_the_reminder_window(self):
+        self.book(timezone.now() + timedelta(hours=2))
+
+        self.assertEqual(list(OutboxMessage.objects.values_list('kind', flat=True)), ['confirmation'])
+
+    def test_bulk_booking_enqueues_every_created_scheduling_in_one_insert(self):
+        api = APIClient()
+        api.force_authenticate(self.owner)
+        items = [{
+            'client': self.client_obj.id, 'service': self.service.id, 'professional': self.professional.id,
+            'date_hour_init': in_days(3, hour).isoformat(),
+        } for hour in (9, 10, 11)]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = api.post('/api/v1/agendamentos/bulk/', items, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(OutboxMessage.objects.filter(kind='confirmation').count(), 3)
+        self.assertEqual(OutboxMessage.objects.filter(kind='reminder').count(), 3)
+        outbox_inserts = [q for q in queries.captured_queries if q['sql'].startswith('INSERT INTO "notifications_')]
+        self.assertEqual(len(outbox_inserts), 1)
+
+    def test_worker_sends_due_messages_once(self):
+        scheduling = self.book(in_days(3, 15))
+
+        totals = drain(senders.LocmemSender(), batch_size=10)
+
+        # Só a confirmação está disponível; o lembrete espera até 24h antes do horário
+        self.assertEqual(totals['sent'], 1)
+        self.assertEqual(len(senders.outbox), 1)
+        confirmation = OutboxMessage.objects.get(kind='confirmation')
+        self.assertEqual(confirmation.status, 'sent')
+        self.assertEqual(confirmation.channel, 'whatsapp')
+        self.assertEqual(confirmation.recipient, '11999990000')
+        self.assertIn('Corte com João em Salão Teste', confirmation.body)
+        self.assertIn('15:00', confirmation.body)
+        self.assertEqual(OutboxMessage.objects.get(kind='reminder').status, 'pending')
+
+        self.make_due()
+        self.assertEqual(drain(senders.LocmemSender())['sent'], 1)
+        self.assertEqual(drain(senders.LocmemSender()), {})
+        self.assertEqual(scheduling.outbox_messages.filter(status='sent').count(), 2)
+
+    def test_cancelled_and_rescheduled_bookings_skip_stale_messages(self):
+        cancelled = self.book(in_days(3, 9))
+        moved = self.book(in_days(3, 11))
+        drain(senders.LocmemSender())
+
+        cancelled.status = 'Cancelado'
+        cancelled.save()
+        moved.date_hour_init = in_days(4, 11)
+        moved.date_hour_end = None
+        moved.save()
+        senders.outbox.clear()
+        self.make_due()
+
+        totals = drain(senders.LocmemSender())
+
+        # Lembrete do cancelado e lembrete do horário antigo: descartados.
+        # Remarcação: nova confirmação e novo lembrete para o horário novo
+        self.assertEqual(totals['skipped'], 2)
+        self.assertEqual(totals['sent'], 2)
+        self.assertTrue(all(message.scheduling_id == moved.pk for message in senders.outbox))
+        self.assertTrue(all(message.scheduled_for == in_days(4, 11) for message in senders.outbox))
+
+    def test_failed_sends_are_retried_with_exponential_backoff(self):
+        self.book(in_days(3))
+        OutboxMessage.objects.filter(kind='reminder').delete()
+
+        before = timezone.now()
+        totals = drain(FailingSender())
+
+        self.assertEqual(totals['pending'], 1)
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.attempts, 1)
+        self.assertIn('API fora do ar', message.last_error)
+        self.assertGreaterEqual(message.available_at, before + timedelta(seconds=30))
+        self.assertEqual([retry_delay(n).total_seconds() for n in (1, 2, 3, 10)], [30, 60, 120, 3600])
+
+        # Esgotadas as tentativas, a mensagem é marcada como falha e sai da fila
+        for _ in range(2):
+            self.make_due()
+            drain(FailingSender())
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), ('failed', 3))
+
+        self.make_due()
+        self.assertEqual(drain(senders.LocmemSender()), {})
+
+    def test_claimed_messages_are_hidden_from_other_workers_until_the_lease_expires(self):
+        self.book(in_days(3))
+        confirmation = OutboxMessage.objects.get(kind='confirmation')
+
+        self.assertEqual([message.pk for message in claim(10)], [confirmation.pk])
+        # Outro worker não pega o mesmo lote; se o primeiro morrer, o lease expira e ela volta
+        self.assertEqual(claim(10), [])
+        self.assertEqual(len(claim(10, now=timezone.now() + timedelta(hours=1))), 1)
+
+    def test_process_outbox_command_drains_the_queue(self):
+        for hour in (9, 10, 11):
+            self.book(in_days(3, hour))
+
+        out = StringIO()
+        call_command('process_outbox', '--once', '--batch-size', '2', stdout=out)
+
+        self.assertIn('3 enviadas', out.getvalue())
+        self.assertEqual(len(senders.outbox), 3)
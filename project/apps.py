@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class ProjectConfig(AppConfig):
+    name = 'project'
+    verbose_name = 'Projeto'
+
+    def ready(self):
+        # Registra os receivers de conexão: PRAGMAs do SQLite e contagem de consultas das métricas
+        from . import metrics, signals  # noqa: F401
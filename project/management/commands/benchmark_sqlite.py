@@ -0,0 +1,161 @@
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from project.sqlite import apply_pragmas
+
+
+DAY_MINUTES = 24 * 60
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara o SQLite no modo padrão (rollback journal, synchronous=FULL) com os SQLITE_PRAGMAS do '
+        'projeto (WAL, synchronous=NORMAL, mmap) sob leituras e escritas concorrentes. Cada modo usa um '
+        'banco temporário com uma tabela no formato da agenda: escritores fazem a reserva (BEGIN IMMEDIATE, '
+        'verificação de conflito, INSERT) e leitores consultam o dia de um profissional.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--duration', type=float, default=5.0, help='Segundos por modo.')
+        parser.add_argument('--rows', type=int, default=50000, help='Agendamentos já existentes na tabela.')
+        parser.add_argument('--professionals', type=int, default=50)
+        parser.add_argument('--directory', help='Onde criar os bancos (padrão: diretório temporário do sistema).')
+
+    def handle(self, *args, **options):
+        if options['writers'] < 0 or options['readers'] < 0 or options['writers'] + options['readers'] == 0:
+            raise CommandError('Informe ao menos um escritor ou leitor.')
+
+        timeout = settings.DATABASES['default'].get('OPTIONS', {}).get('timeout', 20)
+        modes = [
+            ('padrão', {'journal_mode': 'delete', 'synchronous': 'full', 'busy_timeout': timeout * 1000}),
+            ('ajustado', settings.SQLITE_PRAGMAS),
+        ]
+
+        self.stdout.write(
+            f"{options['writers']} escritores, {options['readers']} leitores, {options['duration']:.0f}s por modo, "
+            f"{options['rows']} linhas"
+        )
+        self.stdout.write(
+            f"{'modo':<10} {'escritas/s':>11} {'leituras/s':>11} {'p95 escrita':>12} {'p95 leitura':>12} {'erros':>6}"
+        )
+        with tempfile.TemporaryDirectory(dir=options['directory']) as directory:
+            for name, pragmas in modes:
+                path = os.path.join(directory, f'{name}.sqlite3')
+                result = self.run_mode(path, pragmas, timeout, options)
+                self.stdout.write(
+                    f"{name:<10} {result['writes'] / options['duration']:>11.0f} "
+                    f"{result['reads'] / options['duration']:>11.0f} {result['write_p95']:>10.2f}ms "
+                    f"{result['read_p95']:>10.2f}ms {result['errors']:>6}"
+                )
+
+    def connect(self, path, pragmas, timeout):
+        # isolation_level=None: as transações são abertas explicitamente, como o Django faz com IMMEDIATE
+        connection = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        apply_pragmas(connection.cursor(), pragmas)
+        return connection
+
+    def seed(self, path, pragmas, timeout, options):
+        connection = self.connect(path, pragmas, timeout)
+        connection.execute(
+            'CREATE TABLE scheduling (id INTEGER PRIMARY KEY, professional_id INTEGER NOT NULL, '
+            'day INTEGER NOT NULL, start INTEGER NOT NULL, "end" INTEGER NOT NULL)'
+        )
+        connection.execute('CREATE INDEX scheduling_prof_day_idx ON scheduling (professional_id, day, start)')
+        rng = random.Random(0)
+        connection.execute('BEGIN')
+        connection.executemany(
+            'INSERT INTO scheduling (professional_id, day, start, "end") VALUES (?, ?, ?, ?)',
+            (
+                (rng.randrange(options['professionals']), rng.randrange(365), start, start + 30)
+                for start in (rng.randrange(0, DAY_MINUTES - 30, 5) for _ in range(options['rows']))
+            ),
+        )
+        connection.execute('COMMIT')
+        connection.close()
+
+    def run_mode(self, path, pragmas, timeout, options):
+        self.seed(path, pragmas, timeout, options)
+
+        stop = threading.Event()
+        lock = threading.Lock()
+        totals = {'writes': 0, 'reads': 0, 'errors': 0, 'write_latencies': [], 'read_latencies': []}
+
+        def worker(seed, write):
+            rng = random.Random(seed)
+            connection = self.connect(path, pragmas, timeout)
+            done, errors, latencies = 0, 0, []
+            while not stop.is_set():
+                professional = rng.randrange(options['professionals'])
+                day = rng.randrange(365)
+                started = time.perf_counter()
+                try:
+                    if write:
+                        self.book(connection, professional, day, rng.randrange(0, DAY_MINUTES - 30, 5))
+                    else:
+                        connection.execute(
+                            'SELECT start, "end" FROM scheduling WHERE professional_id = ? AND day = ? ORDER BY start',
+                            (professional, day),
+                        ).fetchall()
+                except sqlite3.OperationalError:
+                    # "database is locked": esperou o busy_timeout inteiro sem conseguir o lock
+                    errors += 1
+                    if connection.in_transaction:
+                        connection.execute('ROLLBACK')
+                    continue
+                latencies.append((time.perf_counter() - started) * 1000)
+                done += 1
+            connection.close()
+            with lock:
+                totals['writes' if write else 'reads'] += done
+                totals['errors'] += errors
+                totals['write_latencies' if write else 'read_latencies'].extend(latencies)
+
+        threads = [
+            threading.Thread(target=worker, args=(index, index < options['writers']))
+            for index in range(options['writers'] + options['readers'])
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(options['duration'])
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+        return {
+            'writes': totals['writes'],
+            'reads': totals['reads'],
+            'errors': totals['errors'],
+            'write_p95': self.p95(totals['write_latencies']),
+            'read_p95': self.p95(totals['read_latencies']),
+        }
+
+    def book(self, connection, professional, day, start):
+        """A mesma sequência da reserva: lock de escrita, verificação de conflito e INSERT."""
+        connection.execute('BEGIN IMMEDIATE')
+        conflict = connection.execute(
+            'SELECT 1 FROM scheduling WHERE professional_id = ? AND day = ? AND start < ? AND "end" > ? LIMIT 1',
+            (professional, day, start + 30, start),
+        ).fetchone()
+        if conflict is None:
+            connection.execute(
+                'INSERT INTO scheduling (professional_id, day, start, "end") VALUES (?, ?, ?, ?)',
+                (professional, day, start, start + 30),
+            )
+        connection.execute('COMMIT')
+
+    def p95(self, latencies):
+        if not latencies:
+            return 0.0
+        if len(latencies) == 1:
+            return latencies[0]
+        return statistics.quantiles(latencies, n=20)[-1]
@@ -0,0 +1,45 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = (
+        'Copia o banco SQLite primário para os arquivos das réplicas (DB_REPLICAS), com a API de backup do '
+        'SQLite. Substitui a replicação para testar o roteamento localmente; com --interval, repete a cópia '
+        'em laço e o intervalo faz o papel do atraso de replicação.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, help='Segundos entre cópias (sem a opção, copia uma vez).')
+
+    def handle(self, *args, **options):
+        primary = connections[DEFAULT_DB_ALIAS]
+        if primary.vendor != 'sqlite':
+            raise CommandError('Só para SQLite: em PostgreSQL use a replicação do próprio banco.')
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError('Nenhuma réplica configurada: defina DB_REPLICAS.')
+
+        try:
+            while True:
+                self.sync(primary)
+                if options['interval'] is None:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+
+    def sync(self, primary):
+        primary.ensure_connection()
+        for alias in settings.DATABASE_REPLICAS:
+            # A réplica pode estar aberta por este processo: fecha antes de sobrescrever o arquivo
+            connections[alias].close()
+            target = sqlite3.connect(connections[alias].settings_dict['NAME'])
+            try:
+                primary.connection.backup(target)
+            finally:
+                target.close()
+            self.stdout.write(f'{alias}: copiado de {primary.settings_dict["NAME"]}')
@@ -0,0 +1,253 @@
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse
+from rest_framework.permissions import IsAdminUser
+from rest_framework.views import APIView
+
+
+logger = logging.getLogger(__name__)
+
+# Métricas por endpoint (nome da URL resolvida), no formato texto do Prometheus em /metrics/.
+# Os valores são por processo: com vários workers (gunicorn), cada um expõe os seus e o Prometheus soma.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+UNRESOLVED = '<unresolved>'
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # o último é o +Inf
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = {}        # (view, method, status) -> total
+            self.latency = {}         # view -> Histogram (segundos)
+            self.queries = {}         # view -> Histogram (consultas por requisição)
+            self.query_seconds = {}   # view -> segundos gastos no banco
+            self.over_budget = {}     # view -> requisições acima do QUERY_BUDGET
+
+    def record(self, view, method, status, seconds, stats, over_budget):
+        with self._lock:
+            key = (view, method, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.latency.setdefault(view, Histogram(LATENCY_BUCKETS)).observe(seconds)
+            self.queries.setdefault(view, Histogram(QUERY_BUCKETS)).observe(stats.queries)
+            self.query_seconds[view] = self.query_seconds.get(view, 0.0) + stats.seconds
+            if over_budget:
+                self.over_budget[view] = self.over_budget.get(view, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'requests': dict(self.requests),
+                'latency': {view: _copy(histogram) for view, histogram in self.latency.items()},
+                'queries': {view: _copy(histogram) for view, histogram in self.queries.items()},
+                'query_seconds': dict(self.query_seconds),
+                'over_budget': dict(self.over_budget),
+            }
+
+
+def _copy(histogram):
+    copy = Histogram(histogram.buckets)
+    copy.counts, copy.sum, copy.count = list(histogram.counts), histogram.sum, histogram.count
+    return copy
+
+
+registry = Registry()
+
+
+# --- Consultas SQL: contadas por requisição ---
+
+class QueryStats:
+    __slots__ = ('queries', 'seconds')
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+
+# Estatísticas da requisição em andamento. Um ContextVar, e não a conexão, porque nas views assíncronas
+# o ORM roda em outra thread (sync_to_async), com outra conexão; o contexto acompanha a requisição até lá.
+_current = ContextVar('request_query_stats', default=None)
+
+
+def _record_query(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.seconds += time.perf_counter() - started
+
+
+def install(connection):
+    """Instala o wrapper de contagem na conexão (uma vez). Fica por fora dos execute_wrapper() temporários."""
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _record_query)
+
+
+@receiver(connection_created)
+def install_on_new_connection(sender, connection, **kwargs):
+    install(connection)
+
+
+def _install_on_thread_connections():
+    # Conexões abertas antes do receiver existir (ex.: a do próprio processo de testes)
+    for connection in connections.all(initialized_only=True):
+        install(connection)
+
+
+# --- Middleware ---
+
+class MetricsMiddleware:
+    """
+    Conta, por nome de URL resolvida: requisições (por método e status), histograma de latência,
+    consultas SQL e tempo no banco. Avisa no log quando uma requisição passa de QUERY_BUDGET consultas
+    (N+1 aparecendo). Funciona com views síncronas e assíncronas.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        _install_on_thread_connections()
+        stats, token, started = self.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.finish(request, response, stats, started)
+        return response
+
+    async def __acall__(self, request):
+        stats, token, started = self.start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.finish(request, response, stats, started)
+        return response
+
+    def start(self):
+        stats = QueryStats()
+        return stats, _current.set(stats), time.perf_counter()
+
+    def finish(self, request, response, stats, started):
+        seconds = time.perf_counter() - started
+        match = getattr(request, 'resolver_match', None)
+        view = (match.view_name or match._func_path) if match else UNRESOLVED
+
+        budget = getattr(settings, 'QUERY_BUDGET', 0)
+        over_budget = bool(budget) and stats.queries > budget
+        if over_budget:
+            logger.warning(
+                '%s %s (%s) fez %d consultas SQL (orçamento: %d, %.1f ms no banco)',
+                request.method, request.path, view, stats.queries, budget, stats.seconds * 1000,
+            )
+
+        registry.record(view, request.method, response.status_code, seconds, stats, over_budget)
+
+
+# --- Exposição (formato texto do Prometheus) ---
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _histogram_lines(name, histograms):
+    lines = []
+    for view, histogram in sorted(histograms.items()):
+        cumulative = 0
+        for bound, count in zip((*histogram.buckets, '+Inf'), histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{_labels(view=view, le=bound)} {cumulative}')
+        lines.append(f'{name}_sum{_labels(view=view)} {histogram.sum}')
+        lines.append(f'{name}_count{_labels(view=view)} {histogram.count}')
+    return lines
+
+
+def render():
+    from schedulingservices import availability_cache
+
+    data = registry.snapshot()
+    lines = [
+        '# HELP http_requests_total Requisições por view, método e status.',
+        '# TYPE http_requests_total counter',
+    ]
+    for (view, method, status), total in sorted(data['requests'].items()):
+        lines.append(f'http_requests_total{_labels(view=view, method=method, status=status)} {total}')
+
+    lines += ['# HELP http_request_duration_seconds Latência das requisições.',
+              '# TYPE http_request_duration_seconds histogram']
+    lines += _histogram_lines('http_request_duration_seconds', data['latency'])
+
+    lines += ['# HELP db_queries_per_request Consultas SQL por requisição.',
+              '# TYPE db_queries_per_request histogram']
+    lines += _histogram_lines('db_queries_per_request', data['queries'])
+
+    lines += ['# HELP db_query_seconds_total Tempo gasto em consultas SQL.',
+              '# TYPE db_query_seconds_total counter']
+    for view, seconds in sorted(data['query_seconds'].items()):
+        lines.append(f'db_query_seconds_total{_labels(view=view)} {seconds:.6f}')
+
+    lines += ['# HELP db_query_budget_exceeded_total Requisições acima do QUERY_BUDGET.',
+              '# TYPE db_query_budget_exceeded_total counter']
+    for view, total in sorted(data['over_budget'].items()):
+        lines.append(f'db_query_budget_exceeded_total{_labels(view=view)} {total}')
+
+    cache_stats = availability_cache.stats()
+    lines += [
+        '# HELP availability_cache_requests_total Leituras do cache de disponibilidade (por profissional/dia).',
+        '# TYPE availability_cache_requests_total counter',
+        f'availability_cache_requests_total{_labels(result="hit")} {cache_stats["hits"]}',
+        f'availability_cache_requests_total{_labels(result="miss")} {cache_stats["misses"]}',
+    ]
+    return '\n'.join(lines) + '\n'
+
+
+class MetricsView(APIView):
+    """GET /metrics/: métricas no formato do Prometheus. Só para staff (sessão ou JWT)."""
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, format=None):
+        return HttpResponse(render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,168 @@
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+# Leituras em réplicas (DATABASE_REPLICAS, ver settings). Só vão para uma réplica as leituras de requisições
+# GET/HEAD de views marcadas com ReadReplicaMixin (catálogo e horários públicos, relatórios, sugestões).
+# O resto (escritas, comandos, worker da outbox, admin) usa sempre o primário.
+#
+# Ler o que acabou de escrever (read-your-writes):
+# - dentro de uma requisição que escreveu, ou dentro de uma transação, todas as leituras vão ao primário;
+# - cada escrita "prende" o salão ao primário por READ_REPLICA_PIN_SECONDS (chave no cache, vale para
+#   todos os processos). O prazo deve cobrir o atraso de replicação: assim os caches de disponibilidade
+#   e catálogo recalculados logo após uma escrita nunca saem de uma réplica atrasada.
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class RoutingState:
+    __slots__ = ('replica', 'wrote', 'tenant_id', 'pinned')
+
+    def __init__(self):
+        self.replica = False     # a view liberou leituras na réplica
+        self.wrote = False       # houve escrita nesta requisição
+        self.tenant_id = None    # salão da requisição (resolvido pela view)
+        self.pinned = set()      # salões já presos ao primário nesta requisição
+
+
+_state = ContextVar('database_routing_state', default=None)
+
+
+def replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def pin_key(barbershop_id):
+    return f'db-primary-pin:{barbershop_id}'
+
+
+def pin(barbershop_ids):
+    """Prende os salões ao primário pelo prazo de READ_REPLICA_PIN_SECONDS."""
+    if barbershop_ids and replicas():
+        timeout = getattr(settings, 'READ_REPLICA_PIN_SECONDS', 10)
+        cache.set_many({pin_key(barbershop_id): True for barbershop_id in barbershop_ids}, timeout)
+
+
+def is_pinned(barbershop_id):
+    return bool(cache.get(pin_key(barbershop_id)))
+
+
+def _tenant_of(instance):
+    if instance is None:
+        return None
+    if instance._meta.label == 'authentication.BarberShop':
+        return instance.pk
+    return getattr(instance, 'barbershop_id', None)
+
+
+def read_from_replica(request, barbershop_id):
+    """Chamado pela view depois de resolver o salão: libera a réplica se for leitura e o salão não estiver preso."""
+    state = _state.get()
+    if state is None:
+        return
+    state.tenant_id = barbershop_id
+    if request.method in SAFE_METHODS and barbershop_id is not None and replicas() and not is_pinned(barbershop_id):
+        state.replica = True
+
+
+class PrimaryReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.replica or state.wrote or not replicas():
+            return None
+        # Uma transação aberta pode ter escritas ainda não replicadas (ou nunca, se for desfeita)
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return random.choice(replicas())
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        tenant_id = _tenant_of(hints.get('instance'))
+        if state is None:
+            if tenant_id is not None:
+                pin([tenant_id])
+            return None
+
+        state.wrote = True
+        # Escritas em lote (bulk_create, update) não dizem o salão: vale o da própria requisição
+        tenant_id = tenant_id if tenant_id is not None else state.tenant_id
+        if tenant_id is not None and tenant_id not in state.pinned:
+            state.pinned.add(tenant_id)
+            pin([tenant_id])
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Primário e réplicas têm os mesmos dados
+        return True
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Abre o estado de roteamento de cada requisição. No fim, uma requisição que escreveu sem que se
+    soubesse o salão (ex.: reserva em lote pela API) prende o salão do usuário logado.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        state = RoutingState()
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        self.finish(request, state)
+        return response
+
+    async def __acall__(self, request):
+        state = RoutingState()
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        self.finish(request, state)
+        return response
+
+    def finish(self, request, state):
+        if not state.wrote or state.pinned or not replicas():
+            return
+        # O DRF repassa o usuário autenticado (JWT) para o HttpRequest
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            from authentication import tenancy
+            barbershop = tenancy.barbershop_for_user(user)
+            if barbershop is not None:
+                pin([barbershop.pk])
+
+
+class ReadReplicaMixin:
+    """
+    Para views do DRF só de leitura (ou cujo GET é só leitura): depois da autenticação, resolve o salão
+    (pelo link público ou pelo usuário logado) e libera a réplica para as leituras da requisição.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        read_from_replica(request, self.get_replica_tenant())
+
+    def get_replica_tenant(self):
+        from authentication import tenancy
+
+        slug = self.kwargs.get('link_slug')
+        barbershop = tenancy.barbershop_for_slug(slug) if slug else tenancy.barbershop_for_user(self.request.user)
+        return barbershop.pk if barbershop else None
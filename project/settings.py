@@ -1,5 +1,7 @@
+from copy import deepcopy
 from pathlib import Path
 from decouple import config, Csv
+from django.core.exceptions import ImproperlyConfigured
 
 from datetime import timedelta
 
@@ -29,7 +31,10 @@ INSTALLED_APPS = [
     'authentication',
     'schedulingservices',
     'intelligence',
-    
+    'notifications',
+    # Ajustes do próprio projeto (PRAGMAs do SQLite, métricas, comandos de benchmark do banco)
+    'project.apps.ProjectConfig',
+
     # Apps de terceiros
 ]
 
@@ -54,11 +59,15 @@ APPEND_SLASH = False
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Primeiro da lista: a latência medida inclui todos os outros middlewares
+    'project.metrics.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # Estado por requisição do roteamento primário/réplica (project/routers.py)
+    'project.routers.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -89,13 +98,131 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'project.wsgi.application'
 
-DATABASES = {
+# Banco de dados: DB_ENGINE=sqlite (padrão, um único servidor) ou postgresql (produção)
+DB_ENGINE = config('DB_ENGINE', default='sqlite')
+# Segundos que uma conexão fica aberta entre requisições (0 = uma conexão por requisição). O padrão é 0
+# porque no ASGI (project/asgi.py) o ORM roda em threads do sync_to_async que não são reaproveitadas
+# entre requisições: cada uma deixaria uma conexão persistente aberta. Valores maiores só com WSGI
+# (gunicorn com workers síncronos); com PostgreSQL sob ASGI, prefira DB_POOL
+DB_CONN_MAX_AGE = config('DB_CONN_MAX_AGE', default=0, cast=int)
+# Antes de reaproveitar uma conexão persistente, testa se ela ainda está viva
+DB_CONN_HEALTH_CHECKS = config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool)
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': config('DB_NAME', default='barbearia'),
+            'USER': config('DB_USER', default='postgres'),
+            'PASSWORD': config('DB_PASSWORD', default=''),
+            'HOST': config('DB_HOST', default='localhost'),
+            'PORT': config('DB_PORT', default='5432'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': DB_CONN_HEALTH_CHECKS,
+            'OPTIONS': {},
+        }
+    }
+    # Pool de conexões do psycopg 3 (requer psycopg[pool]). O Django não aceita pool e conexões
+    # persistentes ao mesmo tempo: com o pool, cada requisição pega e devolve uma conexão dele
+    if config('DB_POOL', default=False, cast=bool):
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': config('DB_POOL_MIN_SIZE', default=2, cast=int),
+            'max_size': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+            'timeout': config('DB_POOL_TIMEOUT', default=10, cast=int),
+        }
+elif DB_ENGINE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': config('DB_NAME', default=str(BASE_DIR / 'db.sqlite3')),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': DB_CONN_HEALTH_CHECKS,
+            'OPTIONS': {
+                # Transações já começam com o lock de escrita (BEGIN IMMEDIATE): a verificação de conflito
+                # e a gravação do agendamento acontecem sem que outra escrita se intercale. O lock é do
+                # banco inteiro (o SQLite tem um escritor por vez): todas as reservas, de qualquer
+                # profissional, são serializadas. Lock por profissional só com PostgreSQL
+                'transaction_mode': 'IMMEDIATE',
+                # Segundos que uma conexão espera pelo lock antes de falhar com "database is locked"
+                'timeout': config('DB_TIMEOUT', default=20, cast=int),
+            },
+            # Banco de testes em arquivo: o banco em memória compartilhado não respeita o timeout acima,
+            # o que quebra os testes de concorrência com threads
+            'TEST': {
+                'NAME': BASE_DIR / 'test_db.sqlite3',
+            },
+        }
+    }
+else:
+    raise ImproperlyConfigured(f'DB_ENGINE inválido: {DB_ENGINE!r} (use sqlite ou postgresql).')
+
+# Réplicas de leitura (project/routers.py): hosts (postgresql) ou arquivos (sqlite), separados por vírgula.
+# Cada uma vira o alias replica1, replica2... Com SQLite, `manage.py sync_sqlite_replica` copia o primário
+# para os arquivos e serve para testar localmente
+DATABASE_REPLICAS = []
+for index, replica in enumerate(config('DB_REPLICAS', default='', cast=Csv()), start=1):
+    alias = f'replica{index}'
+    DATABASES[alias] = deepcopy(DATABASES['default'])
+    DATABASES[alias]['HOST' if DB_ENGINE == 'postgresql' else 'NAME'] = replica
+    # Nos testes a réplica é o próprio banco de testes
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['project.routers.PrimaryReplicaRouter']
+# Segundos em que, depois de uma escrita, as leituras do salão ficam no primário (cobre o atraso de replicação)
+READ_REPLICA_PIN_SECONDS = config('READ_REPLICA_PIN_SECONDS', default=10, cast=int)
+
+# PRAGMAs aplicados a cada nova conexão SQLite (project/sqlite.py). WAL deixa leituras correrem em
+# paralelo com a escrita; synchronous=NORMAL só sincroniza o disco nos checkpoints (seguro com WAL:
+# uma queda de energia pode perder as últimas transações, nunca corromper o banco)
+SQLITE_PRAGMAS = {
+    'journal_mode': config('SQLITE_JOURNAL_MODE', default='wal'),
+    'synchronous': config('SQLITE_SYNCHRONOUS', default='normal'),
+    # Mesmo limite do 'timeout' acima, em milissegundos
+    'busy_timeout': config('DB_TIMEOUT', default=20, cast=int) * 1000,
+    # Bytes do arquivo lidos via mmap, sem cópia para o cache de páginas do SQLite (0 desliga)
+    'mmap_size': config('SQLITE_MMAP_SIZE', default=256 * 1024 * 1024, cast=int),
+}
+
+# Cache: locmem por padrão; em produção aponte para um backend compartilhado (Redis, Memcached...)
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='backendbarbearia'),
     }
 }
 
+# Tempo (segundos) que os slots calculados de um profissional/dia ficam no cache
+AVAILABILITY_CACHE_TIMEOUT = config('AVAILABILITY_CACHE_TIMEOUT', default=60 * 60 * 24, cast=int)
+
+# Tempo (segundos) que o corpo renderizado de cada versão do catálogo público fica no cache
+CATALOG_CACHE_TIMEOUT = config('CATALOG_CACHE_TIMEOUT', default=60 * 60 * 24, cast=int)
+
+# Cache em memória (por processo) da resolução de tenant: slug/usuário -> salão
+TENANT_CACHE_SIZE = config('TENANT_CACHE_SIZE', default=1024, cast=int)
+TENANT_CACHE_TTL = config('TENANT_CACHE_TTL', default=60, cast=int)
+
+# Notificações (outbox + worker `manage.py process_outbox`)
+# Classe que entrega as mensagens (ver notifications/senders.py); nos testes, LocmemSender
+NOTIFICATION_SENDER = config('NOTIFICATION_SENDER', default='notifications.senders.LoggingSender')
+# Horas antes do agendamento em que o lembrete é enviado (0 desliga os lembretes)
+NOTIFICATION_REMINDER_HOURS = config('NOTIFICATION_REMINDER_HOURS', default=24, cast=int)
+# Tentativas antes de desistir e atraso (segundos) do primeiro retry, dobrado a cada falha, até o máximo
+NOTIFICATION_MAX_ATTEMPTS = config('NOTIFICATION_MAX_ATTEMPTS', default=8, cast=int)
+NOTIFICATION_RETRY_DELAY = config('NOTIFICATION_RETRY_DELAY', default=30, cast=int)
+NOTIFICATION_RETRY_MAX_DELAY = config('NOTIFICATION_RETRY_MAX_DELAY', default=60 * 60, cast=int)
+# Segundos que um lote fica reservado para o worker que o pegou; se ele morrer, o lote volta para a fila
+NOTIFICATION_LEASE_SECONDS = config('NOTIFICATION_LEASE_SECONDS', default=5 * 60, cast=int)
+
+# Horizonte (dias) do histórico na tabela quente de agendamentos: Concluidos e Cancelados mais antigos
+# vão para o arquivo com `manage.py archive_schedulings` (agende o comando, ex.: uma vez por dia)
+SCHEDULING_ARCHIVE_AFTER_DAYS = config('SCHEDULING_ARCHIVE_AFTER_DAYS', default=180, cast=int)
+
+# Métricas por endpoint (project/metrics.py, expostas em /metrics/ para staff)
+# Requisições com mais consultas SQL que isso geram um aviso no log (0 desliga)
+QUERY_BUDGET = config('QUERY_BUDGET', default=30, cast=int)
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
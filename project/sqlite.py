@@ -0,0 +1,13 @@
+# PRAGMAs do SQLite. Valem por conexão (exceto journal_mode=wal, que fica gravado no arquivo), por isso
+# são aplicados a cada conexão nova pelo receiver em project/signals.py.
+
+
+def apply_pragmas(cursor, pragmas):
+    """Executa `PRAGMA nome = valor` para cada item; devolve {nome: valor efetivo} lido do banco."""
+    applied = {}
+    for name, value in pragmas.items():
+        cursor.execute(f'PRAGMA {name} = {value}')
+        cursor.execute(f'PRAGMA {name}')
+        row = cursor.fetchone()
+        applied[name] = row[0] if row else None
+    return applied
@@ -8,11 +8,17 @@ from rest_framework_simplejwt.views import (
 
 from rest_framework.routers import DefaultRouter
 from authentication.api.viewsets import BarberShopViewSet
-from schedulingservices.api.viewsets import ProfessionalViewSet, ServiceViewSet, ClientViewSet, SchedulingViewSet
+from schedulingservices.api.viewsets import (
+    ProfessionalViewSet, ServiceViewSet, ClientViewSet, SchedulingViewSet, ReportViewSet, WorkingHoursViewSet,
+    ClosureViewSet,
+)
 from intelligence.api.viewsets import RescheduleSuggestionViewSet
-from schedulingservices.api.viewsets import ClientViewSet, ProfessionalViewSet, ServiceViewSet, ShedulingViewSet
 
-from schedulingservices.public_views import PublicSchedulingAPI, PublicAvailableTimesAPI
+from schedulingservices.public_views import (
+    PublicSchedulingAPI, PublicAvailableTimesAPI, PublicServiceAvailabilityAPI, PublicServicesFitAPI,
+)
+from schedulingservices import async_views
+from project.metrics import MetricsView
 
 router = DefaultRouter()
 
@@ -22,13 +28,18 @@ router.register(r'servico', ServiceViewSet)
 router.register(r'profissional', ProfessionalViewSet)
 router.register(r'clientes', ClientViewSet)
 router.register(r'agendamentos', SchedulingViewSet)
-router.register(r'agendamentos', ShedulingViewSet)
+router.register(r'horarios', WorkingHoursViewSet)
+router.register(r'fechamentos', ClosureViewSet)
+router.register(r'relatorios', ReportViewSet, basename='reports')
 router.register(r'ai-sugestoes', RescheduleSuggestionViewSet, basename='ai-suggestions')
 
 
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+
+    # Métricas no formato do Prometheus (só staff)
+    path('metrics/', MetricsView.as_view(), name='metrics'),
     
     path('api/v1/', include([
         
@@ -42,6 +53,13 @@ urlpatterns = [
         # 3. Rotas Públicas (Agendamento, que não usam Token)
         path('public/<slug:link_slug>/', PublicSchedulingAPI.as_view(), name='public-scheduling'),
         path('public/<slug:link_slug>/available-times/', PublicAvailableTimesAPI.as_view(), name='public-available-times'),
+        path('public/<slug:link_slug>/service-availability/', PublicServiceAvailabilityAPI.as_view(), name='public-service-availability'),
+        path('public/<slug:link_slug>/services-fit/', PublicServicesFitAPI.as_view(), name='public-services-fit'),
+
+        # 3.1 As mesmas rotas públicas em views assíncronas (servidas via ASGI: project/asgi.py)
+        path('async/public/<slug:link_slug>/', async_views.public_scheduling, name='async-public-scheduling'),
+        path('async/public/<slug:link_slug>/available-times/', async_views.public_available_times, name='async-public-available-times'),
+        path('async/public/<slug:link_slug>/service-availability/', async_views.public_service_availability, name='async-public-service-availability'),
         
         # 4. Rota de login do DRF (útil para browsable API)
         path('auth/', include('rest_framework.urls')),
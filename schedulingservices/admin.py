@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Professional, Service, Client, Scheduling
+from .models import (
+    Professional, Service, Client, Scheduling, SchedulingArchive, SchedulingDailyRollup, WorkingHours, Closure,
+)
 
 # Register your models here.
 
@@ -34,3 +36,42 @@ class SchedulingAdmin(admin.ModelAdmin):
     list_filter = ('client', 'professional', 'service', 'date_hour_init', 'date_hour_end', 'initial_value')
     search_fields = ('client', 'professional', 'service', 'date_hour_init', 'date_hour_end', 'initial_value')
     list_per_page = 10
+
+
+@admin.register(SchedulingArchive)
+class SchedulingArchiveAdmin(admin.ModelAdmin):
+    list_display = ('id', 'barbershop', 'client', 'professional', 'service', 'date_hour_init', 'status', 'initial_value')
+    list_filter = ('barbershop', 'status')
+    list_select_related = ('barbershop', 'client', 'professional', 'service')
+    date_hierarchy = 'date_hour_init'
+    list_per_page = 10
+
+    # Histórico: só leitura (o que muda é a tabela quente)
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(SchedulingDailyRollup)
+class SchedulingDailyRollupAdmin(admin.ModelAdmin):
+    list_display = ('day', 'barbershop', 'professional', 'service', 'booked_minutes', 'completed_count', 'cancelled_count', 'revenue')
+    list_filter = ('barbershop', 'day')
+    list_per_page = 10
+
+
+@admin.register(WorkingHours)
+class WorkingHoursAdmin(admin.ModelAdmin):
+    list_display = ('barbershop', 'professional', 'weekday', 'start', 'end')
+    list_filter = ('barbershop', 'weekday')
+    list_select_related = ('barbershop', 'professional')
+    ordering = ('barbershop', 'professional', 'weekday', 'start')
+
+
+@admin.register(Closure)
+class ClosureAdmin(admin.ModelAdmin):
+    list_display = ('barbershop', 'professional', 'start', 'end', 'reason')
+    list_filter = ('barbershop',)
+    list_select_related = ('barbershop', 'professional')
+    date_hierarchy = 'start'
@@ -0,0 +1,120 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginação por cursor (keyset): a próxima página é "tudo depois da última linha vista",
+    um filtro que usa o índice da ordenação. O custo é o mesmo na página 1 ou na 10.000,
+    ao contrário de OFFSET, que precisa percorrer todas as linhas anteriores.
+
+    A última coluna de `ordering` precisa ser única (normalmente 'id') para desempatar.
+    """
+
+    ordering = ('id',)
+    page_size = 50
+    max_page_size = 500
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Cursor inválido.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request, queryset.model)
+        if position is not None:
+            queryset = queryset.filter(self.after(position))
+
+        # Busca uma linha a mais só para saber se existe próxima página
+        rows = list(queryset[:page_size + 1])
+        page = rows[:page_size]
+
+        self.next_position = None
+        if len(rows) > page_size:
+            self.next_position = [self.get_value(page[-1], field) for field in self.ordering]
+
+        return page
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def get_value(self, row, field):
+        return getattr(row, field)
+
+    def after(self, position):
+        """(a, b, c) > (va, vb, vc) escrito de forma que qualquer banco entenda."""
+        condition = Q()
+        for index in reversed(range(len(self.ordering))):
+            field = self.ordering[index]
+            greater = Q(**{f'{field}__gt': position[index]})
+            if index == len(self.ordering) - 1:
+                condition = greater
+            else:
+                condition = greater | (Q(**{field: position[index]}) & condition)
+        return condition
+
+    def encode_cursor(self, position):
+        # str() preserva os microssegundos das datas (o DjangoJSONEncoder os trunca)
+        raw = json.dumps(position, default=str)
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            values = json.loads(base64.urlsafe_b64decode(encoded.encode()).decode())
+            if len(values) != len(self.ordering):
+                raise ValueError
+            return [
+                model._meta.get_field(field).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except (TypeError, ValueError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class NameKeysetPagination(KeysetPagination):
+    """Cadastros (clientes, serviços, profissionais) em ordem alfabética."""
+    ordering = ('name', 'id')
+
+
+class SchedulingKeysetPagination(KeysetPagination):
+    """Agenda em ordem cronológica."""
+    ordering = ('date_hour_init', 'id')
@@ -2,10 +2,11 @@ from rest_framework import serializers
 
 from datetime import timedelta
 
-from schedulingservices.models import Scheduling, Professional, Service, Client
-from authentication.models import BarberShop
+from django.db import transaction
 
-from datetime import timedelta
+from schedulingservices.models import Scheduling, Professional, Service, Client, Closure, WorkingHours, normalize_phone
+from schedulingservices.booking import ensure_no_conflict, lock_professional
+from authentication.models import BarberShop
 
 
 class ProfessionalSerializer(serializers.ModelSerializer):
@@ -30,42 +31,22 @@ class ServiceSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Service
-<<<<<<< HEAD
-        fields = ('id', 'name', 'minutes_duration', 'value', 'profissionals_aptos')
-
-
-=======
         fields = ('id', 'name', 'minutes_duration', 'value', 'professionals_aptos', 'professionals_aptos_names')
 
         
->>>>>>> 3d377d16b328d317d7142638074db5e3b8bca742
 class ClientSerializer(serializers.ModelSerializer):
     # O salão é injetado automaticamente pelo ViewSet, não precisa aparecer aqui
     class Meta:
         model = Client
         fields = ('id', 'name', 'phone_whatsap', 'email')
 
+    def validate_phone_whatsap(self, value):
+        phone = normalize_phone(value)
+        if not phone:
+            raise serializers.ValidationError('Informe um telefone válido.')
+        return phone
 
-<<<<<<< HEAD
-class SchedulingSerializer(serializers.ModelSerializer): 
-    # Campos de leitura para exibir o nome em vez dos IDs
-    client_name = serializers.CharField(source='client.name', read_only=True)
-    service_name = serializers.CharField(source='service.name', read_only=True)
-    professional_name = serializers.CharField(source='professional.name', read_only=True)   
-
-    # Campo para receber o ID do Salão, mas será setado internamente
-    barbershop = serializers.CharField(source='barbershop.name', read_only=True)
 
-    class Meta:
-        model: Scheduling
-        fields = (
-            'id', 'date_hour_init', 'date_hour_end', 'confirmado', 'cancelado',
-            'client', 'client_name', 'service', 'service_name', 'professional',
-            'professional_name', 'barbershop', 'barbershop.name'
-        )
-        # O cliente, serviço e profissional devem ser IDs para a criação
-        read_only_fields = ('date_hour_end', 'confirmado', 'cancelado',)
-=======
 class SchedulingSerializer(serializers.ModelSerializer):
     # Campos de leitura para exibir o nome em vez dos IDs
     client_name = serializers.CharField(source='client.name', read_only=True)
@@ -83,90 +64,80 @@ class SchedulingSerializer(serializers.ModelSerializer):
             'professional_name', 'barbershop', 'barbershop_name',
         )
         # O cliente, serviço e profissional devem ser IDs para a criação
-        read_only_fields = ('date_hour_end', 'status')
->>>>>>> 3d377d16b328d317d7142638074db5e3b8bca742
+        read_only_fields = ('date_hour_end', 'status', 'barbershop')
 
     # A validação principal ocorre aqui antes de salvar
     def validate(self, data):
         data = super().validate(data)
-<<<<<<< HEAD
-
-        # 1. Recuperar a duração do serviço
-        service = data['service']
-        minutes_duration = service.minutes_duration
-
-        # 2. Calcular o horário de fim
-        init = data['date_hour_init']
-        end = init + timedelta(minutes=minutes_duration)
-
-        # Injetar o fim calculado de volta nos dados
-        data['date_hour_end'] = end
-
-        # Verica se há conflito
-        professional = data['professional']
-
         instance = self.instance
 
-        conflits = Scheduling.objects.filter(
-            professional=professional,
-            # Verifica se o período solicitado se sobrepõe a qualquer agendamento existente:
-            # Novo início está antes do fim existente E Novo fim está depois do início existente
-            date_hour_init__lt=end,
-            date_hour_end__gt=init,
-        )
+        # 1. Recuperar a duração do serviço E calcular o horário de fim
+        # (em updates parciais, os campos ausentes vêm da instância atual)
+        service = data.get('service', instance.service if instance else None)
+        init = data.get('date_hour_init', instance.date_hour_init if instance else None)
+        end = init + timedelta(minutes=service.minutes_duration)
+        data['date_hour_end'] = end
 
-        if instance:
-            # Se for update, exclui a instância atual da lista de conflitos
-            conflits = conflits.exclude(pk=instance.pk)
+        # 2. VERIFICAÇÃO DE CONFLITO (rápida, fora da transação; é repetida com lock ao salvar)
+        professional = data.get('professional', instance.professional if instance else None)
+        ensure_no_conflict(professional, init, end, exclude_pk=instance.pk if instance else None)
 
-        if conflits.exists():
-            raise serializers.ValidationError(
-                {'date_hour_init': f'O profissional {professional.name} já tem um serviço nesse horário!'}
-            )
-        
         return data
 
-    
-    # Sobrescrever o create para garantir que o data_hora_fim seja salvo
-    def create(self, validated_data):
-        return super().create(validated_data)
-        
-=======
-        
-        # 1. Recuperar a duração do serviço E calcular o horário de fim (já está aqui, o que é ótimo)
-        service = data['service']
-        minutes_duration = service.minutes_duration
-        init = data['date_hour_init']
-        end = init + timedelta(minutes=minutes_duration)
-        data['date_hour_end'] = end
-        
-        # 2. VERIFICAÇÃO DE CONFLITO (já está aqui)
-        # ... (sua lógica de conflito)
-        professional = data['professional']
-        instance = self.instance
-        conflits = Scheduling.objects.filter(
-            professional=professional,
-            date_hour_init__lt=end,
-            date_hour_end__gt=init,
-        )
-        if instance:
-            conflits = conflits.exclude(pk=instance.pk)
-        
-        if conflits.exists():
-            raise serializers.ValidationError(
-                {"date_hour_init": f"O profissional {professional.name} já tem um agendamento neste horário."}
-            )
-
-        return data
-    
     # Sobrescrever o create para INJETAR o valor do serviço no validated_data ANTES de salvar
     def create(self, validated_data):
         # 1. LÓGICA CONCISA: Injetar o valor do Serviço no campo initial_value
         service = validated_data.get('service')
         if service:
             # Atribui o valor do Serviço ao Agendamento
-            validated_data['initial_value'] = service.value 
-        
-        # 2. Salva a instância (o date_hour_end já foi calculado no validate)
-        return super().create(validated_data)
->>>>>>> 3d377d16b328d317d7142638074db5e3b8bca742
+            validated_data['initial_value'] = service.value
+
+        # 2. Verifica o conflito de novo e salva na MESMA transação, com o profissional travado:
+        # duas reservas simultâneas do mesmo horário não passam ambas pela verificação
+        with transaction.atomic():
+            professional = validated_data['professional']
+            lock_professional(professional.pk)
+            ensure_no_conflict(professional, validated_data['date_hour_init'], validated_data['date_hour_end'])
+            return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        with transaction.atomic():
+            professional = validated_data.get('professional', instance.professional)
+            lock_professional(professional.pk)
+            ensure_no_conflict(
+                professional,
+                validated_data.get('date_hour_init', instance.date_hour_init),
+                validated_data['date_hour_end'],
+                exclude_pk=instance.pk,
+            )
+            return super().update(instance, validated_data)
+
+
+class WorkingHoursSerializer(serializers.ModelSerializer):
+    # Vazio = expediente do salão; com profissional = expediente próprio dele
+    class Meta:
+        model = WorkingHours
+        fields = ('id', 'professional', 'weekday', 'start', 'end')
+
+    def validate(self, data):
+        data = super().validate(data)
+        start = data.get('start', self.instance.start if self.instance else None)
+        end = data.get('end', self.instance.end if self.instance else None)
+        if start >= end:
+            raise serializers.ValidationError({'end': 'O fim deve ser depois do início.'})
+        return data
+
+
+class ClosureSerializer(serializers.ModelSerializer):
+    # Vazio = salão fechado; com profissional = só ele indisponível
+    class Meta:
+        model = Closure
+        fields = ('id', 'professional', 'start', 'end', 'reason')
+
+    def validate(self, data):
+        data = super().validate(data)
+        start = data.get('start', self.instance.start if self.instance else None)
+        end = data.get('end', self.instance.end if self.instance else None)
+        if start >= end:
+            raise serializers.ValidationError({'end': 'O fim deve ser depois do início.'})
+        return data
@@ -1,39 +1,96 @@
-from rest_framework import viewsets, permissions
-from authentication.models import BarberShop
-from schedulingservices.models import Professional, Service, Client, Scheduling
-from .serializers import ProfessionalSerializer, ServiceSerializer, ClientSerializer, SchedulingSerializer
-from schedulingservices.models import Client, Professional, Scheduling, Service
+from datetime import datetime
 
-from .serializers import ClientSerializer, ProfessionalSerializer, SchedulingSerializer, ServiceSerializer
+from rest_framework import viewsets, permissions, status as http_status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import MultiPartParser
+from rest_framework.response import Response
+from authentication import tenancy
+from project.routers import ReadReplicaMixin
+from schedulingservices import archive
+from schedulingservices.booking import bulk_book
+from schedulingservices.dates import date_range_bounds
+from schedulingservices.exporters import EXPORT_CONTENT_TYPES, EXPORT_FORMATS, stream_schedulings
+from schedulingservices.importers import IMPORT_FORMATS, UNREADABLE_FILE_ERRORS, guess_format, import_clients
+from schedulingservices.models import (
+    STATUS_CHOICES, Client, Closure, Professional, Scheduling, SchedulingArchive, Service, WorkingHours,
+)
+from schedulingservices.reports import REPORT_GROUPS, REPORT_PERIODS, revenue_report
 
-from django.shortcuts import get_object_or_404
+from .pagination import NameKeysetPagination, SchedulingKeysetPagination
+from .serializers import (
+    ClientSerializer, ClosureSerializer, ProfessionalSerializer, SchedulingSerializer, ServiceSerializer,
+    WorkingHoursSerializer,
+)
+
+from django.db.models import Prefetch
+from django.http import Http404, StreamingHttpResponse
+from django.utils import timezone
+
+
+def parse_date_param(value, field):
+    """Data de um query param (YYYY-MM-DD), ou None se ausente; formato inválido vira erro 400."""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise ValidationError({field: 'Use o formato YYYY-MM-DD.'})
 
 
 class MultiTenantModelViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
+
+    # Relações lidas pelo serializer, declaradas por ViewSet e aplicadas em get_queryset.
+    # Assim o número de consultas de uma listagem não cresce com o tamanho da página (sem N+1).
+    select_related_fields = ()
+    prefetch_related_fields = ()
     
     # 1. Filtra o Queryset para mostrar APENAS os dados do Salão do Usuário Logado
     def get_queryset(self):
         # Todos os modelos em servicos_agendamento têm o campo 'salao'
-        return self.queryset.filter(barbershop__owner=self.request.user)
+        # O salão vem do cache de tenant, então o filtro é direto na FK (sem JOIN com o dono)
+        barbershop = tenancy.barbershop_for_user(self.request.user)
+        if barbershop is None:
+            return self.queryset.none()
+        queryset = self.queryset.filter(barbershop=barbershop)
+
+        if self.select_related_fields:
+            queryset = queryset.select_related(*self.select_related_fields)
+        if self.prefetch_related_fields:
+            queryset = queryset.prefetch_related(*self.prefetch_related_fields)
+
+        return queryset
     
     # 2. Injeta o Salão (tenant) no objeto ANTES de salvar (criação)
     def perform_create(self, serializer):
         # O Salão é obtido através do usuário logado (proprietario)
-        barbershop = get_object_or_404(BarberShop, owner=self.request.user)
-        serializer.save(barbershop=barbershop)
+        serializer.save(barbershop=self.get_barbershop())
+
+    def get_barbershop(self):
+        barbershop = tenancy.barbershop_for_user(self.request.user)
+        if barbershop is None:
+            raise Http404('Nenhum salão encontrado para este usuário.')
+        return barbershop
         
         
 class ProfessionalViewSet(MultiTenantModelViewSet):
     """Permite listar, criar, atualizar e deletar Profissionais, filtrado pelo Salão logado."""
     queryset = Professional.objects.all()
     serializer_class = ProfessionalSerializer
+    pagination_class = NameKeysetPagination
+    select_related_fields = ('barbershop',)
     
     
 class ServiceViewSet(MultiTenantModelViewSet):
     """Permite listar, criar, atualizar e deletar Serviços, filtrado pelo Salão logado."""
     queryset = Service.objects.all()
     serializer_class = ServiceSerializer
+    pagination_class = NameKeysetPagination
+    # professionals_aptos_names usa Professional.__str__, que lê o nome do salão
+    prefetch_related_fields = (
+        Prefetch('professionals_aptos', queryset=Professional.objects.select_related('barbershop')),
+    )
     
     # Sobrescreve perform_create para lidar com o M2M (profissionais_aptos) após salvar
     def perform_create(self, serializer):
@@ -45,47 +102,174 @@ class ServiceViewSet(MultiTenantModelViewSet):
         if 'professionals_aptos' in self.request.data:
             professionals_ids = self.request.data['professionals_aptos']
             # Filtra os IDs fornecidos para garantir que pertencem ao salão atual
-<<<<<<< HEAD
-            profissionals_of_barbershop = Professional.objects.filter(barbershop__owner=self.request.user, id__in=profissionals_ids)
-            serializer.instance.profissionals_aptos.set(profissionals_of_barbershop)
-            
-
-=======
-            professionals_of_barbershop = Professional.objects.filter(barbershop__owner=self.request.user, id__in=professionals_ids)
+            professionals_of_barbershop = Professional.objects.filter(barbershop=serializer.instance.barbershop, id__in=professionals_ids)
             serializer.instance.professionals_aptos.set(professionals_of_barbershop)
             
             
->>>>>>> 3d377d16b328d317d7142638074db5e3b8bca742
 class ClientViewSet(MultiTenantModelViewSet):
     """Permite listar, criar, atualizar e deletar Clientes, filtrado pelo Salão logado."""
     queryset = Client.objects.all()
     serializer_class = ClientSerializer
+    pagination_class = NameKeysetPagination
 
+    # POST /clientes/import/ (multipart): file=<arquivo CSV ou NDJSON>, file_format=csv|ndjson (opcional)
+    # Uploads grandes vão para um arquivo temporário (FILE_UPLOAD_MAX_MEMORY_SIZE) e são lidos em blocos
+    @action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser])
+    def import_file(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            raise ValidationError({'file': 'Envie o arquivo de clientes.'})
+
+        file_format = request.data.get('file_format') or guess_format(upload.name)
+        if file_format not in IMPORT_FORMATS:
+            raise ValidationError({'file_format': f'Use {" ou ".join(IMPORT_FORMATS)}.'})
+
+        try:
+            counts = import_clients(self.get_barbershop(), upload.file, file_format)
+        except UNREADABLE_FILE_ERRORS as exc:
+            raise ValidationError({'file': f'Arquivo ilegível ({exc}). Envie um {file_format.upper()} em UTF-8.'})
+        return Response(counts)
 
-<<<<<<< HEAD
-class SchedulingViewSet(MultiTenantModelViewSet):
-    """Permite listar e criar Agendamentos, com verificação de conflito."""
-    queryset = Scheduling.objects.all().order_by('date_hour_init')
-    serializer_class = SchedulingSerializer
 
-    # Sobrescreve perform_create para injetar o Salão, tal como no MultiTenantModelViewSet
-    def perform_create(self, serializer):
-        barbershop = get_object_or_404(BarberShop, owner=self.request.user)
-        serializer.save(barbershop=barbershop) 
-        
-=======
 # --- Novo ViewSet: Agendamento ---
-class ShedulingViewSet(MultiTenantModelViewSet):
+class SchedulingViewSet(MultiTenantModelViewSet):
     """Permite listar e criar Agendamentos, com verificação de conflito."""
     queryset = Scheduling.objects.all().order_by('date_hour_init') # Ordenação padrão
     serializer_class = SchedulingSerializer
-    
+    pagination_class = SchedulingKeysetPagination
+    select_related_fields = ('client', 'service', 'professional', 'barbershop')
+
+    # Filtros da agenda: ?date_from=YYYY-MM-DD&date_to=YYYY-MM-DD&professional=<id>&status=Pendente,Confirmado
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        params = self.request.query_params
+
+        date_from = parse_date_param(params.get('date_from'), 'date_from')
+        date_to = parse_date_param(params.get('date_to'), 'date_to')
+        # Intervalo semiaberto [início, fim), que usa o índice (barbershop, date_hour_init)
+        if date_from:
+            queryset = queryset.filter(date_hour_init__gte=date_range_bounds(date_from, date_from)[0])
+        if date_to:
+            queryset = queryset.filter(date_hour_init__lt=date_range_bounds(date_to, date_to)[1])
+
+        professional = params.get('professional')
+        if professional:
+            if not professional.isdigit():
+                raise ValidationError({'professional': 'Informe o id numérico do profissional.'})
+            queryset = queryset.filter(professional_id=professional)
+
+        status = params.get('status')
+        if status:
+            statuses = [value.strip() for value in status.split(',') if value.strip()]
+            invalid = set(statuses) - {choice for choice, _ in STATUS_CHOICES}
+            if invalid:
+                raise ValidationError({'status': f'Status inválido: {", ".join(sorted(invalid))}.'})
+            queryset = queryset.filter(status__in=statuses)
+
+        return queryset
+
     # Sobrescreve perform_create para injetar o Salão, tal como no MultiTenantModelViewSet
     def perform_create(self, serializer):
         # 1. Obter a instância do Salão
-        barbershop = get_object_or_404(BarberShop, owner=self.request.user)
+        barbershop = self.get_barbershop()
         
         # 2. Injetar o Salão e salvar a instância
         # Nota: O data_hora_fim já está em validated_data, graças ao método validate do serializer
         serializer.save(barbershop=barbershop)
->>>>>>> 3d377d16b328d317d7142638074db5e3b8bca742
+
+    # POST /agendamentos/bulk/ com uma lista de agendamentos (mesmos campos do POST individual)
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk(self, request):
+        created, errors = bulk_book(self.get_barbershop(), request.data)
+        return Response(
+            {'created': self.get_serializer(created, many=True).data, 'errors': errors},
+            status=http_status.HTTP_201_CREATED if created else http_status.HTTP_400_BAD_REQUEST,
+        )
+
+    # GET /agendamentos/export/?file_format=csv|ndjson + os mesmos filtros da listagem, sem paginação
+    # (o parâmetro não se chama 'format' porque o DRF o reserva para escolher o renderer)
+    @action(detail=False, methods=['get'], url_path='export')
+    def export(self, request):
+        file_format = request.query_params.get('file_format', 'csv')
+        if file_format not in EXPORT_FORMATS:
+            raise ValidationError({'file_format': f'Use {" ou ".join(EXPORT_FORMATS)}.'})
+
+        # Sem select_related: o export lê só as colunas necessárias via values_list
+        queryset = self.filter_queryset(self.get_queryset().select_related(None)).order_by('date_hour_init', 'id')
+        # O histórico antigo está no arquivo (mesmas colunas e os mesmos filtros). Só entra no UNION se o
+        # período começar antes do horizonte de arquivamento: a agenda recente não paga pela tabela fria
+        archived = None
+        date_from = parse_date_param(request.query_params.get('date_from'), 'date_from')
+        if date_from is None or date_range_bounds(date_from, date_from)[0] < archive.cutoff():
+            barbershop = tenancy.barbershop_for_user(request.user)
+            archived = self.filter_queryset(
+                SchedulingArchive.objects.filter(barbershop=barbershop) if barbershop else SchedulingArchive.objects.none()
+            )
+        response = StreamingHttpResponse(
+            stream_schedulings(queryset, file_format, archived=archived),
+            content_type=EXPORT_CONTENT_TYPES[file_format],
+        )
+        response['Content-Disposition'] = f'attachment; filename="agendamentos.{file_format}"'
+        return response
+
+
+# --- Expediente e fechamentos (regras da disponibilidade) ---
+class BarbershopRuleViewSet(MultiTenantModelViewSet):
+    """Base para regras do salão que podem, opcionalmente, valer só para um profissional."""
+
+    def perform_create(self, serializer):
+        barbershop = self.get_barbershop()
+        self.check_professional(serializer, barbershop)
+        serializer.save(barbershop=barbershop)
+
+    def perform_update(self, serializer):
+        self.check_professional(serializer, serializer.instance.barbershop)
+        serializer.save()
+
+    def check_professional(self, serializer, barbershop):
+        professional = serializer.validated_data.get('professional')
+        if professional is not None and professional.barbershop_id != barbershop.pk:
+            raise ValidationError({'professional': 'Profissional não encontrado.'})
+
+
+class WorkingHoursViewSet(BarbershopRuleViewSet):
+    """Expediente semanal do salão e dos profissionais (várias janelas por dia = intervalos)."""
+    queryset = WorkingHours.objects.all().order_by('professional_id', 'weekday', 'start')
+    serializer_class = WorkingHoursSerializer
+
+
+class ClosureViewSet(BarbershopRuleViewSet):
+    """Feriados, folgas e fechamentos pontuais do salão ou de um profissional."""
+    queryset = Closure.objects.all().order_by('start')
+    serializer_class = ClosureSerializer
+
+
+# --- Relatórios (somente leitura, agregados no banco) ---
+class ReportViewSet(ReadReplicaMixin, viewsets.ViewSet):
+    """Relatórios financeiros do Salão logado."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    # GET /relatorios/faturamento/?date_from=&date_to=&group_by=professional,service&period=day|week|month
+    # Sem datas, o período é o mês corrente até hoje
+    @action(detail=False, methods=['get'], url_path='faturamento')
+    def revenue(self, request):
+        barbershop = tenancy.barbershop_for_user(request.user)
+        if barbershop is None:
+            raise Http404('Nenhum salão encontrado para este usuário.')
+
+        params = request.query_params
+        date_to = parse_date_param(params.get('date_to'), 'date_to') or timezone.localdate()
+        date_from = parse_date_param(params.get('date_from'), 'date_from') or date_to.replace(day=1)
+        if date_from > date_to:
+            raise ValidationError({'date_from': 'date_from deve ser anterior a date_to.'})
+
+        group_by = [value.strip() for value in params.get('group_by', '').split(',') if value.strip()]
+        invalid = set(group_by) - set(REPORT_GROUPS)
+        if invalid:
+            raise ValidationError({'group_by': f'Use {", ".join(REPORT_GROUPS)}.'})
+
+        period = params.get('period') or None
+        if period and period not in REPORT_PERIODS:
+            raise ValidationError({'period': f'Use {", ".join(REPORT_PERIODS)}.'})
+
+        return Response(revenue_report(barbershop, date_from, date_to, group_by, period))
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class SchedulingservicesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'schedulingservices'
+
+    def ready(self):
+        # Registra os receivers que invalidam o cache de disponibilidade
+        from . import signals  # noqa: F401
@@ -0,0 +1,74 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import FINISHED_STATUSES, Scheduling, SchedulingArchive
+
+
+# Campos copiados da tabela quente para o arquivo (o id é preservado)
+ARCHIVE_FIELDS = (
+    'id', 'barbershop_id', 'client_id', 'service_id', 'professional_id', 'date_hour_init', 'date_hour_end',
+    'status', 'initial_value',
+)
+
+# Verdadeiro enquanto os agendamentos movidos são apagados da tabela quente. Os receivers de post_delete
+# que mantêm o histórico (resumo diário, sugestões) e o cache de disponibilidade ignoram essas remoções:
+# o agendamento continua existindo, só mudou de tabela.
+_archiving = ContextVar('archiving_schedulings', default=False)
+
+
+def in_progress():
+    return _archiving.get()
+
+
+@contextmanager
+def archiving():
+    token = _archiving.set(True)
+    try:
+        yield
+    finally:
+        _archiving.reset(token)
+
+
+def cutoff(days=None):
+    """Agendamentos que começaram antes deste instante podem ir para o arquivo."""
+    days = settings.SCHEDULING_ARCHIVE_AFTER_DAYS if days is None else days
+    return timezone.now() - timedelta(days=days)
+
+
+def archivable(barbershop_id, before):
+    """Finalizados do salão antes de `before`: busca por faixa no índice (barbershop, status, date_hour_init)."""
+    return Scheduling.objects.filter(
+        barbershop_id=barbershop_id, status__in=FINISHED_STATUSES, date_hour_init__lt=before,
+    )
+
+
+def archive_batch(barbershop_id, before, batch_size=1000):
+    """
+    Move até batch_size agendamentos para o arquivo, em uma transação: a cópia e a remoção acontecem
+    juntas ou não acontecem. Interromper entre lotes é seguro; rodar de novo continua de onde parou.
+    Retorna quantos foram movidos.
+    """
+    with transaction.atomic():
+        # skip_locked: duas execuções simultâneas pegam lotes diferentes (no SQLite as transações de
+        # escrita já são serializadas)
+        rows = list(
+            archivable(barbershop_id, before).select_for_update(skip_locked=True).order_by()
+            .values(*ARCHIVE_FIELDS)[:batch_size]
+        )
+        if not rows:
+            return 0
+
+        now = timezone.now()
+        # Sem ignore_conflicts: um id que já está no arquivo (ex.: cópia manual) levanta IntegrityError e
+        # desfaz o lote inteiro, em vez de apagar da tabela quente uma linha que não foi copiada
+        SchedulingArchive.objects.bulk_create([SchedulingArchive(archived_at=now, **row) for row in rows])
+        # delete() do ORM, e não um DELETE direto: as FKs para o agendamento (ex.: mensagens da outbox)
+        # seguem o on_delete de cada uma
+        with archiving():
+            Scheduling.objects.filter(pk__in=[row['id'] for row in rows]).delete()
+    return len(rows)
@@ -0,0 +1,144 @@
+import json
+from datetime import datetime
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_http_methods
+
+from authentication import tenancy
+from . import availability_cache, catalog_cache
+from .availability import aprofessionals_free_slots
+from .models import Professional, Service
+from .public_views import create_public_scheduling
+
+
+# Versões assíncronas (ASGI) das rotas públicas, com o mesmo contrato das views DRF de public_views.py
+# (mesmos corpos de sucesso e mesmos status de erro; as mensagens de erro podem diferir).
+# Enquanto espera o banco ou o cache, o event loop atende outros clientes em vez de prender uma thread
+# por requisição. Servidas em /api/v1/async/public/... por project/asgi.py (uvicorn, daphne etc.).
+
+
+def _not_found(detail):
+    return JsonResponse({"detail": detail}, status=404)
+
+
+def _bad_request(detail):
+    return JsonResponse({"detail": detail}, status=400)
+
+
+@csrf_exempt
+@require_http_methods(['GET', 'POST'])
+async def public_scheduling(request, link_slug):
+    """Catálogo do salão (GET, com ETag/304) e criação de agendamento pelo cliente (POST)."""
+    barbershop = await tenancy.abarbershop_for_slug(link_slug)
+    if barbershop is None:
+        return _not_found("Salão não encontrado ou inativo.")
+
+    if request.method == 'POST':
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return _bad_request("JSON inválido.")
+        if not isinstance(data, dict):
+            return _bad_request("JSON inválido.")
+
+        # A reserva (transação + lock do profissional) é síncrona: roda em uma thread, pelo mesmo
+        # caminho da view DRF, sem bloquear o event loop
+        payload, status = await sync_to_async(create_public_scheduling)(barbershop, data)
+        return JsonResponse(payload, status=status)
+
+    version = await catalog_cache.acatalog_version(barbershop.id)
+    etag = catalog_cache.catalog_etag(barbershop.id, version, 'json')
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+
+    if catalog_cache.etag_matches(request.headers.get('If-None-Match'), etag):
+        return HttpResponse(status=304, headers=headers)
+
+    return JsonResponse(await catalog_cache.aget_catalog(barbershop, version), headers=headers)
+
+
+def _parse_date(value):
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return None
+
+
+@require_GET
+async def public_available_times(request, link_slug):
+    """Horários livres de um profissional: ?professional_id=X&service_id=Y&date=YYYY-MM-DD"""
+    professional_id = request.GET.get('professional_id')
+    service_id = request.GET.get('service_id')
+    date_str = request.GET.get('date')
+
+    if not all([professional_id, service_id, date_str]):
+        return _bad_request("professional_id, service_id e date são obrigatórios.")
+
+    target_date = _parse_date(date_str)
+    if target_date is None:
+        return _bad_request("Data inválida: use YYYY-MM-DD.")
+
+    barbershop = await tenancy.abarbershop_for_slug(link_slug)
+    if barbershop is None:
+        return _not_found("Salão não encontrado ou inativo.")
+    try:
+        professional = await Professional.objects.aget(id=professional_id, barbershop=barbershop, ative=True)
+        service = await Service.objects.aget(id=service_id, barbershop=barbershop)
+    except (Professional.DoesNotExist, Service.DoesNotExist, ValueError):
+        return _not_found("Profissional ou serviço não encontrado.")
+
+    slots = await availability_cache.aget_many_slots(
+        [professional.id], target_date, service.minutes_duration,
+        lambda missing_ids: aprofessionals_free_slots(missing_ids, target_date, service.minutes_duration),
+    )
+
+    return JsonResponse({
+        "professional_name": professional.name,
+        "date": date_str,
+        "service_duration_minutes": service.minutes_duration,
+        "available_slots": slots[professional.id],
+    })
+
+
+@require_GET
+async def public_service_availability(request, link_slug):
+    """Horários livres de todos os profissionais aptos a um serviço: ?service_id=Y&date=YYYY-MM-DD"""
+    service_id = request.GET.get('service_id')
+    date_str = request.GET.get('date')
+
+    if not all([service_id, date_str]):
+        return _bad_request("service_id e date são obrigatórios.")
+
+    target_date = _parse_date(date_str)
+    if target_date is None:
+        return _bad_request("Data inválida: use YYYY-MM-DD.")
+
+    barbershop = await tenancy.abarbershop_for_slug(link_slug)
+    if barbershop is None:
+        return _not_found("Salão não encontrado ou inativo.")
+    try:
+        service = await Service.objects.aget(id=service_id, barbershop=barbershop)
+    except (Service.DoesNotExist, ValueError):
+        return _not_found("Serviço não encontrado.")
+
+    professionals = [
+        professional async for professional in service.professionals_aptos.filter(ative=True).order_by('name')
+    ]
+
+    slots_by_professional = await availability_cache.aget_many_slots(
+        [professional.id for professional in professionals], target_date, service.minutes_duration,
+        lambda missing_ids: aprofessionals_free_slots(missing_ids, target_date, service.minutes_duration),
+    )
+
+    return JsonResponse({
+        "service_id": service.id,
+        "service_name": service.name,
+        "date": date_str,
+        "service_duration_minutes": service.minutes_duration,
+        "professionals": [{
+            "professional_id": professional.id,
+            "professional_name": professional.name,
+            "available_slots": slots_by_professional[professional.id],
+        } for professional in professionals],
+    })
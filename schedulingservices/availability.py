@@ -0,0 +1,202 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+
+from . import availability_cache, day_bitmap
+from .dates import day_bounds
+
+
+def merge_intervals(intervals):
+    """
+    Une intervalos ocupados que se sobrepõem ou se encostam.
+    Espera a lista já ordenada pelo início (como vem do banco com order_by).
+    """
+    merged = []
+
+    for start, end in intervals:
+        if merged and start <= merged[-1][1]:
+            # Sobreposição: estende o último intervalo se necessário
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+
+    return merged
+
+
+def _align_to_grid(moment, origin, step):
+    """Retorna o primeiro ponto da grade (origin + k * step) que seja >= moment."""
+    if moment <= origin:
+        return origin
+
+    steps, remainder = divmod(moment - origin, step)
+    if remainder:
+        steps += 1
+    return origin + steps * step
+
+
+def free_slots(busy, windows, duration, step=None):
+    """
+    Calcula os horários livres de um profissional em um dia.
+
+    - busy: intervalos (início, fim) ocupados, ordenados pelo início.
+    - windows: janelas de trabalho (início, fim), ordenadas e sem sobreposição.
+    - duration: duração do serviço (timedelta).
+    - step: passo da grade de horários (por padrão, a própria duração do serviço).
+
+    Faz uma única passada (sweep-line) pelas janelas e pelos intervalos ocupados,
+    então o custo é O(n + slots) por profissional/dia. Os slots sempre caem na grade
+    iniciada no começo de cada janela, mesmo depois de pular um agendamento.
+    """
+    step = step or duration
+    busy = merge_intervals(busy)
+
+    slots = []
+    index = 0
+    total = len(busy)
+
+    for window_start, window_end in windows:
+        cursor = window_start
+
+        while cursor + duration <= window_end:
+            # Descarta os intervalos que já terminaram antes do cursor (nunca voltam a importar)
+            while index < total and busy[index][1] <= cursor:
+                index += 1
+
+            # Regra de Conflito: (Início do slot < Fim ocupado) E (Fim do slot > Início ocupado)
+            if index < total and busy[index][0] < cursor + duration:
+                # Pula direto para o próximo ponto da grade após o fim do intervalo ocupado
+                cursor = _align_to_grid(busy[index][1], window_start, step)
+                continue
+
+            slots.append(cursor)
+            cursor += step
+
+    return slots
+
+
+def busy_intervals(schedulings):
+    """Converte linhas (date_hour_init, date_hour_end) do banco em intervalos ocupados."""
+    return [(init, end) for init, end in schedulings if end is not None]
+
+
+
+def occupied_queryset(professional_ids, target_date):
+    """Agendamentos que ocupam os profissionais no dia: uma única consulta para todos eles."""
+    from .models import OCCUPYING_STATUSES, Scheduling
+
+    day_start, day_end = day_bounds(target_date)
+    return Scheduling.objects.filter(
+        professional__in=professional_ids,
+        date_hour_init__gte=day_start,
+        date_hour_init__lt=day_end,
+        status__in=OCCUPYING_STATUSES,  # Apenas agendamentos que ocupam o tempo
+    ).order_by('date_hour_init').values_list('professional_id', 'date_hour_init', 'date_hour_end')
+
+
+def slots_from_occupied(professional_ids, target_date, duration_minutes, occupied_times, windows):
+    """
+    Agrupa em memória as linhas de occupied_queryset e calcula os slots ('HH:MM') de cada profissional.
+    windows: {professional_id: janelas de trabalho do dia}, de working_hours.windows_by_professional.
+    """
+    occupied_by_professional = defaultdict(list)
+    for professional_id, init, end in occupied_times:
+        occupied_by_professional[professional_id].append((init, end))
+
+    duration = timedelta(minutes=duration_minutes)
+
+    return {
+        professional_id: [
+            slot.strftime('%H:%M')
+            for slot in free_slots(
+                busy_intervals(occupied_by_professional[professional_id]), windows[professional_id], duration,
+            )
+        ]
+        for professional_id in professional_ids
+    }
+
+
+def professionals_free_slots(professional_ids, target_date, duration_minutes):
+    """
+    Calcula os slots livres ('HH:MM') de vários profissionais no mesmo dia.
+    Usa uma única consulta de agendamentos para todos eles, agrupada em memória, e as janelas de
+    trabalho já compiladas (cache) de cada profissional.
+    """
+    from .working_hours import windows_by_professional
+
+    windows = windows_by_professional(professional_ids, target_date)
+    occupied_times = list(occupied_queryset(professional_ids, target_date))
+    return slots_from_occupied(professional_ids, target_date, duration_minutes, occupied_times, windows)
+
+
+async def aprofessionals_free_slots(professional_ids, target_date, duration_minutes):
+    """Versão assíncrona de professionals_free_slots (ORM assíncrono, para as views ASGI)."""
+    from .working_hours import windows_by_professional
+
+    # As janelas quase sempre vêm do cache; compilar as regras só acontece depois de uma mudança nelas
+    windows = await sync_to_async(windows_by_professional)(professional_ids, target_date)
+    occupied_times = [row async for row in occupied_queryset(professional_ids, target_date)]
+    return slots_from_occupied(professional_ids, target_date, duration_minutes, occupied_times, windows)
+
+
+def day_bitmaps(professional_ids, target_date):
+    """
+    {professional_id: (janelas em minutos, bitmap livre do dia)}: janelas compiladas (cache) e uma
+    única consulta de agendamentos para todos os profissionais.
+    """
+    from .working_hours import compiled_windows
+
+    windows = compiled_windows(professional_ids, target_date)
+    midnight, _ = day_bounds(target_date)
+
+    busy = defaultdict(list)
+    for professional_id, init, end in occupied_queryset(professional_ids, target_date):
+        if end is None:
+            continue
+        start_seconds = (init - midnight).total_seconds()
+        end_seconds = (end - midnight).total_seconds()
+        busy[professional_id].append((
+            max(int(start_seconds // 60), 0),
+            min(int(-(-end_seconds // 60)), 24 * 60),
+        ))
+
+    return {
+        professional_id: (windows[professional_id], day_bitmap.free_mask(windows[professional_id], busy[professional_id]))
+        for professional_id in professional_ids
+    }
+
+
+def services_free_slots(services, target_date):
+    """
+    Slots de vários serviços de uma vez: services é uma lista de (service_id, minutes_duration, professional_ids).
+    Retorna {service_id: {professional_id: ['HH:MM', ...]}}.
+
+    O dia de cada profissional vira um bitmap (day_bitmap.py) calculado uma vez e guardado no cache com as
+    mesmas versões dos slots; cada serviço custa só algumas operações sobre esse bitmap, sem novas consultas.
+    """
+    professional_ids = sorted({pid for _, _, pids in services for pid in pids})
+    days = availability_cache.get_many_day_bitmaps(
+        professional_ids, target_date, lambda missing_ids: day_bitmaps(missing_ids, target_date),
+    )
+
+    result = {}
+    for service_id, duration_minutes, pids in services:
+        by_professional = result[service_id] = {}
+        misaligned = []
+        for professional_id in pids:
+            windows, mask = days[professional_id]
+            if day_bitmap.is_aligned(windows, duration_minutes):
+                by_professional[professional_id] = day_bitmap.slots(mask, windows, duration_minutes)
+            else:
+                misaligned.append(professional_id)
+
+        if misaligned:
+            # Duração ou expediente fora da grade de 5 minutos: cálculo exato pela varredura, como nas outras rotas
+            by_professional.update(availability_cache.get_many_slots(
+                misaligned, target_date, duration_minutes,
+                lambda missing_ids, duration=duration_minutes: professionals_free_slots(missing_ids, target_date, duration),
+            ))
+
+    return result
+
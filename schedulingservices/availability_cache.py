@@ -0,0 +1,166 @@
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .cache_versions import aget_versions, bump_version, get_versions
+
+
+# Contadores de acerto/erro do cache (por processo)
+_stats_lock = threading.Lock()
+_stats = {'hits': 0, 'misses': 0}
+
+
+def _timeout():
+    return getattr(settings, 'AVAILABILITY_CACHE_TIMEOUT', 60 * 60 * 24)
+
+
+def _professional_version_key(professional_id):
+    return f'availability:professional:{professional_id}'
+
+
+def _day_version_key(professional_id, target_date):
+    return f'availability:day:{professional_id}:{target_date.isoformat()}'
+
+
+def _version_keys(professional_ids, target_date):
+    return {
+        professional_id: (
+            _professional_version_key(professional_id),
+            _day_version_key(professional_id, target_date),
+        )
+        for professional_id in professional_ids
+    }
+
+
+def _build_slots_keys(version_keys, versions, target_date, duration_minutes):
+    slots_keys = {}
+    for professional_id, (professional_key, day_key) in version_keys.items():
+        slots_keys[professional_id] = (
+            f'availability:slots:{professional_id}:{target_date.isoformat()}:{duration_minutes}:'
+            f'{versions.get(professional_key, 0)}:{versions.get(day_key, 0)}'
+        )
+    return slots_keys
+
+
+def _slots_keys(professional_ids, target_date, duration_minutes):
+    """Monta a chave dos slots de cada profissional a partir das versões atuais (uma ida ao cache)."""
+    version_keys = _version_keys(professional_ids, target_date)
+    versions = get_versions([key for pair in version_keys.values() for key in pair])
+    return _build_slots_keys(version_keys, versions, target_date, duration_minutes)
+
+
+def _split_cached(slots_keys, cached):
+    results = {}
+    missing_ids = []
+    for professional_id, key in slots_keys.items():
+        if key in cached:
+            results[professional_id] = cached[key]
+        else:
+            missing_ids.append(professional_id)
+
+    with _stats_lock:
+        _stats['hits'] += len(results)
+        _stats['misses'] += len(missing_ids)
+
+    return results, missing_ids
+
+
+def get_many_slots(professional_ids, target_date, duration_minutes, compute_missing):
+    """
+    Retorna {professional_id: slots} usando o cache sempre que possível.
+    compute_missing recebe a lista de profissionais sem cache e deve devolver {professional_id: slots}.
+    """
+    return _get_many(_slots_keys(professional_ids, target_date, duration_minutes), compute_missing)
+
+
+def get_many_day_bitmaps(professional_ids, target_date, compute_missing):
+    """
+    Como get_many_slots, mas para o dia inteiro do profissional, independente do serviço
+    (ex.: o bitmap livre de day_bitmap.py). Invalidado pelas mesmas versões de profissional e dia.
+    """
+    return _get_many(_slots_keys(professional_ids, target_date, 'bitmap'), compute_missing)
+
+
+def _get_many(slots_keys, compute_missing):
+    results, missing_ids = _split_cached(slots_keys, cache.get_many(list(slots_keys.values())))
+
+    if missing_ids:
+        computed = compute_missing(missing_ids)
+        cache.set_many({slots_keys[pid]: computed[pid] for pid in missing_ids}, _timeout())
+        results.update(computed)
+
+    return results
+
+
+async def aget_many_slots(professional_ids, target_date, duration_minutes, acompute_missing):
+    """Versão assíncrona de get_many_slots; acompute_missing é uma corrotina."""
+    version_keys = _version_keys(professional_ids, target_date)
+    versions = await aget_versions([key for pair in version_keys.values() for key in pair])
+    slots_keys = _build_slots_keys(version_keys, versions, target_date, duration_minutes)
+    results, missing_ids = _split_cached(slots_keys, await cache.aget_many(list(slots_keys.values())))
+
+    if missing_ids:
+        computed = await acompute_missing(missing_ids)
+        await cache.aset_many({slots_keys[pid]: computed[pid] for pid in missing_ids}, _timeout())
+        results.update(computed)
+
+    return results
+
+
+def _windows_keys(professional_ids, target_date):
+    """Chave das janelas compiladas: mudam quando as regras mudam (versão do profissional), não a cada reserva."""
+    version_keys = {professional_id: _professional_version_key(professional_id) for professional_id in professional_ids}
+    versions = get_versions(list(version_keys.values()))
+    return {
+        professional_id: f'availability:windows:{professional_id}:{target_date.isoformat()}:{versions.get(key, 0)}'
+        for professional_id, key in version_keys.items()
+    }
+
+
+def get_many_windows(professional_ids, target_date, compute_missing):
+    """
+    Janelas de trabalho compiladas {professional_id: ((início, fim), ...)} do cache.
+    compute_missing recebe a lista de profissionais sem cache e deve devolver {professional_id: janelas}.
+    """
+    windows_keys = _windows_keys(professional_ids, target_date)
+    cached = cache.get_many(list(windows_keys.values()))
+    results = {pid: cached[key] for pid, key in windows_keys.items() if key in cached}
+
+    missing_ids = [pid for pid in professional_ids if pid not in results]
+    if missing_ids:
+        computed = compute_missing(missing_ids)
+        cache.set_many({windows_keys[pid]: computed[pid] for pid in missing_ids}, _timeout())
+        results.update(computed)
+
+    return results
+
+
+def get_slots(professional_id, target_date, duration_minutes, compute):
+    """Versão de get_many_slots para um único profissional; compute() devolve os slots."""
+    return get_many_slots(
+        [professional_id], target_date, duration_minutes,
+        lambda missing_ids: {professional_id: compute()},
+    )[professional_id]
+
+
+def invalidate_day(professional_id, target_date):
+    bump_version(_day_version_key(professional_id, target_date))
+
+
+def invalidate_professional(professional_id):
+    """Todos os dias do profissional: slots e janelas de trabalho compiladas."""
+    bump_version(_professional_version_key(professional_id))
+
+
+def stats():
+    with _stats_lock:
+        hits, misses = _stats['hits'], _stats['misses']
+    total = hits + misses
+    return {'hits': hits, 'misses': misses, 'hit_rate': hits / total if total else 0.0}
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats['hits'] = 0
+        _stats['misses'] = 0
@@ -0,0 +1,196 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from . import rollups
+from .models import MAX_SERVICE_MINUTES, OCCUPYING_STATUSES, Client, Professional, Scheduling, Service
+from .signals import invalidate_days_on_commit, schedulings_bulk_created
+
+
+# Nenhum agendamento dura mais que isso (Service.minutes_duration é limitado); usado para limitar a busca de conflitos
+MAX_SCHEDULING_LENGTH = timedelta(minutes=MAX_SERVICE_MINUTES)
+
+
+def lock_professional(professional_id):
+    """
+    Serializa as gravações concorrentes de agendamentos de UM profissional.
+    Deve ser chamada dentro de transaction.atomic().
+
+    - PostgreSQL/MySQL/Oracle: SELECT ... FOR UPDATE na linha do profissional; agendamentos de
+      outros profissionais continuam em paralelo.
+    - SQLite: NÃO há lock por profissional. O SQLite aceita um único escritor por vez no banco inteiro,
+      então uma linha de lock ou um UPDATE na linha do profissional também pegariam o lock do banco.
+      select_for_update é ignorado; com transaction_mode IMMEDIATE (ver settings) a transação já nasce
+      com esse lock, e cada reserva espera por qualquer outra escrita, de qualquer profissional.
+      A verificação e o INSERT são curtos (o lock dura poucos ms), mas reservas de profissionais
+      diferentes só correm em paralelo com DB_ENGINE=postgresql.
+    """
+    list(Professional.objects.select_for_update().filter(pk=professional_id).values_list('pk', flat=True))
+
+
+def conflicting_schedulings(professional, init, end, exclude_pk=None):
+    """Agendamentos que ocupam o profissional e se sobrepõem a [init, end)."""
+    conflits = Scheduling.objects.filter(
+        professional=professional,
+        status__in=OCCUPYING_STATUSES,
+        # Limite inferior: restringe a busca no índice (professional, date_hour_init, date_hour_end)
+        # aos agendamentos que podem alcançar o novo início, em vez de todo o histórico
+        date_hour_init__gt=init - MAX_SCHEDULING_LENGTH,
+        # Novo início está antes do fim existente E Novo fim está depois do início existente
+        date_hour_init__lt=end,
+        date_hour_end__gt=init,
+    )
+    if exclude_pk:
+        # Se for update, exclui a instância atual da lista de conflitos
+        conflits = conflits.exclude(pk=exclude_pk)
+    return conflits
+
+
+def ensure_no_conflict(professional, init, end, exclude_pk=None):
+    if conflicting_schedulings(professional, init, end, exclude_pk).exists():
+        raise serializers.ValidationError(
+            {"date_hour_init": f"O profissional {professional.name} já tem um agendamento neste horário."}
+        )
+
+
+# --- Criação em lote (agenda fixa da semana, importações da recepção) ---
+
+MAX_BULK_SCHEDULINGS = 500
+
+
+def _parse_id(item, field, errors):
+    value = item.get(field)
+    if isinstance(value, bool):
+        value = None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        errors[field] = ['Informe um id numérico.']
+        return None
+
+
+def _overlaps(intervals, init, end):
+    return any(start < end and finish > init for start, finish in intervals)
+
+
+def bulk_book(barbershop, items):
+    """
+    Cria vários agendamentos do salão de uma vez.
+
+    Retorna (criados, erros), onde erros é uma lista de {'index': posição no lote, 'errors': {...}}.
+    Os itens válidos são gravados com um único bulk_create, na mesma transação que verifica os conflitos:
+
+    - chaves estrangeiras: uma consulta por modelo (clientes, serviços, profissionais do salão);
+    - conflitos com o banco: uma consulta por faixa de horário por profissional, com os profissionais travados;
+    - conflitos dentro do próprio lote: em memória, na ordem em que os itens chegaram.
+    """
+    if not isinstance(items, list):
+        raise serializers.ValidationError({'non_field_errors': ['Envie uma lista de agendamentos.']})
+    if len(items) > MAX_BULK_SCHEDULINGS:
+        raise serializers.ValidationError(
+            {'non_field_errors': [f'Envie no máximo {MAX_BULK_SCHEDULINGS} agendamentos por lote.']}
+        )
+
+    date_field = serializers.DateTimeField()
+    errors = {}
+    parsed = {}
+
+    # 1. Formato de cada item (sem consultas)
+    for index, item in enumerate(items):
+        item_errors = {}
+        if not isinstance(item, dict):
+            errors[index] = {'non_field_errors': ['Item inválido.']}
+            continue
+
+        ids = {field: _parse_id(item, field, item_errors) for field in ('client', 'service', 'professional')}
+        try:
+            init = date_field.run_validation(item.get('date_hour_init'))
+        except serializers.ValidationError as exc:
+            item_errors['date_hour_init'] = exc.detail
+
+        if item_errors:
+            errors[index] = item_errors
+        else:
+            parsed[index] = (ids, init)
+
+    # 2. Chaves estrangeiras: só valem as do próprio salão
+    related = {
+        'client': Client.objects.filter(barbershop=barbershop).in_bulk(
+            {ids['client'] for ids, _ in parsed.values()}
+        ),
+        'service': Service.objects.filter(barbershop=barbershop).in_bulk(
+            {ids['service'] for ids, _ in parsed.values()}
+        ),
+        'professional': Professional.objects.filter(barbershop=barbershop).in_bulk(
+            {ids['professional'] for ids, _ in parsed.values()}
+        ),
+    }
+
+    candidates = []
+    for index, (ids, init) in parsed.items():
+        item_errors = {
+            field: ['Objeto não encontrado.'] for field, pk in ids.items() if pk not in related[field]
+        }
+        if item_errors:
+            errors[index] = item_errors
+            continue
+
+        service = related['service'][ids['service']]
+        candidates.append((index, Scheduling(
+            barbershop=barbershop,
+            client=related['client'][ids['client']],
+            service=service,
+            professional=related['professional'][ids['professional']],
+            date_hour_init=init,
+            date_hour_end=init + timedelta(minutes=service.minutes_duration),
+            initial_value=service.value,
+        )))
+
+    by_professional = defaultdict(list)
+    for index, scheduling in candidates:
+        by_professional[scheduling.professional_id].append((index, scheduling))
+
+    # 3. Conflitos e gravação, com os profissionais travados (em ordem de id, para não haver deadlock)
+    created = []
+    with transaction.atomic():
+        list(
+            Professional.objects.select_for_update().filter(pk__in=by_professional)
+            .order_by('pk').values_list('pk', flat=True)
+        )
+
+        for professional_id, group in by_professional.items():
+            first_init = min(scheduling.date_hour_init for _, scheduling in group)
+            last_end = max(scheduling.date_hour_end for _, scheduling in group)
+            occupied = list(Scheduling.objects.filter(
+                professional_id=professional_id,
+                status__in=OCCUPYING_STATUSES,
+                date_hour_init__gt=first_init - MAX_SCHEDULING_LENGTH,
+                date_hour_init__lt=last_end,
+                date_hour_end__gt=first_init,
+            ).values_list('date_hour_init', 'date_hour_end'))
+
+            for index, scheduling in sorted(group, key=lambda entry: entry[0]):
+                if _overlaps(occupied, scheduling.date_hour_init, scheduling.date_hour_end):
+                    errors[index] = {'date_hour_init': [
+                        f'O profissional {scheduling.professional.name} já tem um agendamento neste horário.'
+                    ]}
+                    continue
+                occupied.append((scheduling.date_hour_init, scheduling.date_hour_end))
+                created.append((index, scheduling))
+
+        created.sort(key=lambda entry: entry[0])
+        created = [scheduling for _, scheduling in created]
+        Scheduling.objects.bulk_create(created)
+        # bulk_create não dispara signals: o resumo diário é atualizado na mesma transação
+        rollups.record_created(created)
+        # ... assim como as gravações dos outros apps (ex.: mensagens da outbox)
+        schedulings_bulk_created.send(sender=Scheduling, schedulings=created)
+        # ... e a disponibilidade dos dias afetados é invalidada depois do COMMIT
+        invalidate_days_on_commit({
+            (scheduling.professional_id, timezone.localdate(scheduling.date_hour_init)) for scheduling in created
+        })
+
+    return created, [{'index': index, 'errors': errors[index]} for index in sorted(errors)]
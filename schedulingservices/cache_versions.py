@@ -0,0 +1,60 @@
+import time
+
+from django.core.cache import cache
+
+
+# Carimbos de versão no cache: o conteúdo é gravado sob uma chave que inclui a versão atual,
+# e invalidar é só incrementar a versão (as entradas antigas expiram sozinhas).
+
+
+def _initial_version():
+    # Versões iniciais baseadas no relógio evitam reaproveitar conteúdo antigo se a chave de versão
+    # for descartada pelo backend (LRU do locmem, eviction do Redis/Memcached etc.)
+    return time.time_ns()
+
+
+def _missing(keys, versions):
+    return [key for key in keys if key not in versions]
+
+
+def get_versions(keys):
+    """Versões atuais de várias chaves em uma ida ao cache (cria as que faltam)."""
+    versions = cache.get_many(keys)
+
+    missing = _missing(keys, versions)
+    if missing:
+        # add() não sobrescreve uma versão gravada por outro processo nesse meio tempo
+        for key in missing:
+            cache.add(key, _initial_version(), None)
+        versions.update(cache.get_many(missing))
+
+    return versions
+
+
+def get_version(key):
+    return get_versions([key]).get(key, 0)
+
+
+async def aget_versions(keys):
+    """Versão assíncrona de get_versions (API assíncrona do cache, para as views ASGI)."""
+    versions = await cache.aget_many(keys)
+
+    missing = _missing(keys, versions)
+    if missing:
+        for key in missing:
+            await cache.aadd(key, _initial_version(), None)
+        versions.update(await cache.aget_many(missing))
+
+    return versions
+
+
+async def aget_version(key):
+    return (await aget_versions([key])).get(key, 0)
+
+
+def bump_version(key):
+    """Invalida tudo o que foi gravado com a versão atual da chave."""
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _initial_version(), None)
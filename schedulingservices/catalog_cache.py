@@ -0,0 +1,89 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Prefetch
+from django.utils.cache import parse_etags
+
+from .cache_versions import aget_version, bump_version, get_version
+from .models import Professional, Service
+
+
+# Catálogo público (serviços + profissionais aptos) versionado por salão.
+# A versão é incrementada pelos signals quando Service, Professional, o M2M ou o salão mudam.
+
+
+def _version_key(barbershop_id):
+    return f'catalog:version:{barbershop_id}'
+
+
+def _timeout():
+    return getattr(settings, 'CATALOG_CACHE_TIMEOUT', 60 * 60 * 24)
+
+
+def catalog_version(barbershop_id):
+    return get_version(_version_key(barbershop_id))
+
+
+async def acatalog_version(barbershop_id):
+    return await aget_version(_version_key(barbershop_id))
+
+
+def catalog_etag(barbershop_id, version, representation):
+    """ETag forte: o mesmo (salão, versão, formato) sempre gera exatamente o mesmo corpo."""
+    return f'"catalog-{barbershop_id}-{version}-{representation}"'
+
+
+def etag_matches(if_none_match, etag):
+    """O cliente já tem esta versão? (cabeçalho If-None-Match, comparação fraca como manda o RFC 9110)"""
+    tags = parse_etags(if_none_match or '')
+    return '*' in tags or etag in [tag.removeprefix('W/') for tag in tags]
+
+
+def _catalog_services(barbershop):
+    # professionals_aptos é lido duas vezes pelo serializer (ids e nomes) e o nome do profissional
+    # inclui o nome do salão: tudo vem pré-carregado em 2 consultas
+    return Service.objects.filter(barbershop=barbershop).order_by('name').prefetch_related(
+        Prefetch('professionals_aptos', queryset=Professional.objects.select_related('barbershop')),
+    )
+
+
+def _catalog_body(barbershop, services):
+    # Importado aqui: api.serializers depende dos models deste app
+    from .api.serializers import ServiceSerializer
+
+    return {
+        "barbershop_name": barbershop.name,
+        "services": ServiceSerializer(services, many=True).data,
+    }
+
+
+def render_catalog(barbershop):
+    return _catalog_body(barbershop, _catalog_services(barbershop))
+
+
+def _body_key(barbershop, version):
+    return f'catalog:body:{barbershop.id}:{version}'
+
+
+def get_catalog(barbershop, version):
+    """Corpo do catálogo na versão informada: do cache ou renderizado (e guardado) na hora."""
+    key = _body_key(barbershop, version)
+    body = cache.get(key)
+    if body is None:
+        body = render_catalog(barbershop)
+        cache.set(key, body, _timeout())
+    return body
+
+
+async def aget_catalog(barbershop, version):
+    """Versão assíncrona de get_catalog: a iteração assíncrona já traz os profissionais pré-carregados."""
+    key = _body_key(barbershop, version)
+    body = await cache.aget(key)
+    if body is None:
+        services = [service async for service in _catalog_services(barbershop)]
+        body = _catalog_body(barbershop, services)
+        await cache.aset(key, body, _timeout())
+    return body
+
+
+def invalidate(barbershop_id):
+    bump_version(_version_key(barbershop_id))
@@ -0,0 +1,20 @@
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+
+def day_bounds(target_date):
+    """
+    Início e fim (intervalo semiaberto [início, fim)) de um dia no fuso horário corrente.
+    Filtrar com date_hour_init__gte/__lt usa os índices, ao contrário de date_hour_init__date.
+    """
+    return date_range_bounds(target_date, target_date)
+
+
+def date_range_bounds(start_date, end_date):
+    """Intervalo semiaberto [início de start_date, início do dia seguinte a end_date)."""
+    current_tz = timezone.get_current_timezone()
+    return (
+        datetime.combine(start_date, time.min, tzinfo=current_tz),
+        datetime.combine(end_date + timedelta(days=1), time.min, tzinfo=current_tz),
+    )
@@ -0,0 +1,73 @@
+# Dia de um profissional como bitmap de células de 5 minutos, guardado em um int do Python:
+# o bit i ligado significa que a célula [i*5, i*5+5) minutos do dia está livre (dentro do expediente
+# e sem agendamento). 288 células = 36 bytes por profissional/dia.
+#
+# Para uma duração de n células, "cabe começando em i" é o AND dos bits i..i+n-1, calculado para o dia
+# inteiro de uma vez com deslocamentos (janela deslizante em O(log n) operações sobre o int), sem laço
+# por minuto. Com o bitmap pronto, os slots de todos os serviços saem de algumas operações cada.
+
+CELL_MINUTES = 5
+CELLS_PER_DAY = 24 * 60 // CELL_MINUTES
+
+
+def _cells(start_cell, end_cell):
+    """Máscara com os bits [start_cell, end_cell) ligados."""
+    if end_cell <= start_cell:
+        return 0
+    return ((1 << (end_cell - start_cell)) - 1) << start_cell
+
+
+def free_mask(windows, busy):
+    """
+    windows: janelas de trabalho em minutos do dia ((início, fim), ...).
+    busy: intervalos ocupados em minutos do dia (já recortados para [0, 1440]).
+    Janelas são arredondadas para dentro e agendamentos para fora: um slot alinhado às células nunca
+    invade um agendamento, e o resultado é exato quando tudo cai em múltiplos de 5 minutos.
+    """
+    mask = 0
+    for start, end in windows:
+        mask |= _cells(-(-start // CELL_MINUTES), end // CELL_MINUTES)
+    for start, end in busy:
+        mask &= ~_cells(start // CELL_MINUTES, -(-end // CELL_MINUTES))
+    return mask
+
+
+def fitting_starts(mask, cells):
+    """Bits i tais que as células i..i+cells-1 estão todas livres (AND deslizante por duplicação)."""
+    covered = 1
+    while covered < cells and mask:
+        shift = min(covered, cells - covered)
+        mask &= mask >> shift
+        covered += shift
+    return mask
+
+
+def grid_mask(windows, duration):
+    """
+    Inícios permitidos: a grade de cada janela (início, início + duração, ...), a mesma de free_slots.
+    O serviço precisa caber na própria janela; a grade de uma não vaza para a seguinte.
+    """
+    mask = 0
+    for start, end in windows:
+        for minute in range(start, end - duration + 1, duration):
+            mask |= 1 << (minute // CELL_MINUTES)
+    return mask
+
+
+def is_aligned(windows, duration):
+    """O bitmap é exato quando a duração e as janelas caem em múltiplos de CELL_MINUTES."""
+    return duration % CELL_MINUTES == 0 and all(
+        start % CELL_MINUTES == 0 and end % CELL_MINUTES == 0 for start, end in windows
+    )
+
+
+def slots(mask, windows, duration):
+    """Slots ('HH:MM') de um serviço de `duration` minutos a partir do bitmap livre do dia."""
+    starts = fitting_starts(mask, duration // CELL_MINUTES) & grid_mask(windows, duration)
+    result = []
+    while starts:
+        lowest = starts & -starts
+        minute = (lowest.bit_length() - 1) * CELL_MINUTES
+        result.append(f'{minute // 60:02d}:{minute % 60:02d}')
+        starts ^= lowest
+    return result
@@ -0,0 +1,67 @@
+import csv
+import json
+from datetime import datetime
+
+from django.utils import timezone
+
+
+EXPORT_FORMATS = ('csv', 'ndjson')
+EXPORT_CHUNK_SIZE = 2000
+
+EXPORT_CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+# Colunas do arquivo -> campos lidos com values_list (os JOINs saem na mesma consulta)
+EXPORT_COLUMNS = (
+    ('id', 'id'),
+    ('date_hour_init', 'date_hour_init'),
+    ('date_hour_end', 'date_hour_end'),
+    ('status', 'status'),
+    ('initial_value', 'initial_value'),
+    ('client', 'client__name'),
+    ('client_phone', 'client__phone_whatsap'),
+    ('service', 'service__name'),
+    ('professional', 'professional__name'),
+)
+
+
+class _Echo:
+    """Pseudo-arquivo para o csv.writer: devolve a linha em vez de guardá-la."""
+
+    def write(self, value):
+        return value
+
+
+def _format_value(value):
+    if isinstance(value, datetime):
+        return timezone.localtime(value).isoformat()
+    if value is None or isinstance(value, (int, str)):
+        return value
+    return str(value)
+
+
+def stream_schedulings(queryset, file_format, chunk_size=EXPORT_CHUNK_SIZE, archived=None):
+    """
+    Gera o arquivo linha a linha. O cabeçalho sai antes da consulta, e as linhas vêm de um
+    cursor no servidor (.iterator), de chunk_size em chunk_size: nada é acumulado em memória.
+    Com `archived` (queryset de SchedulingArchive), as duas tabelas saem de um UNION ALL ordenado
+    pelo banco, em ordem cronológica.
+    """
+    headers = [column for column, _ in EXPORT_COLUMNS]
+    fields = [field for _, field in EXPORT_COLUMNS]
+    rows = queryset.values_list(*fields)
+    if archived is not None:
+        rows = rows.order_by().union(archived.values_list(*fields), all=True).order_by('date_hour_init', 'id')
+    rows = rows.iterator(chunk_size=chunk_size)
+
+    if file_format == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(headers)
+        for row in rows:
+            yield writer.writerow([_format_value(value) for value in row])
+        return
+
+    for row in rows:
+        yield json.dumps(dict(zip(headers, map(_format_value, row))), ensure_ascii=False) + '\n'
@@ -0,0 +1,128 @@
+import csv
+import io
+import json
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+
+from .models import Client, normalize_phone
+
+
+IMPORT_FORMATS = ('csv', 'ndjson')
+IMPORT_CHUNK_SIZE = 1000
+
+# Telefones com menos dígitos que isso não identificam ninguém
+MIN_PHONE_DIGITS = 8
+
+# Arquivo ilegível (não é UTF-8, CSV malformado): a importação para no ponto do erro,
+# com os blocos anteriores já gravados
+UNREADABLE_FILE_ERRORS = (UnicodeDecodeError, csv.Error)
+
+
+def guess_format(filename):
+    return 'ndjson' if str(filename).lower().endswith(('.ndjson', '.jsonl')) else 'csv'
+
+
+def iter_rows(stream, file_format):
+    """
+    Lê o arquivo (binário) linha a linha, sem carregá-lo inteiro na memória.
+    Gera um dict por registro, ou None para linhas ilegíveis (contadas como ignoradas).
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if file_format == 'csv':
+        yield from csv.DictReader(text)
+        return
+
+    for line in text:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield row if isinstance(row, dict) else None
+
+
+def _clean(row):
+    """Registro do arquivo -> (telefone, nome, email) ou None se não puder ser importado."""
+    if row is None:
+        return None
+
+    phone = normalize_phone(row.get('phone_whatsap') or row.get('phone'))
+    if len(phone) < MIN_PHONE_DIGITS:
+        return None
+    name = str(row.get('name') or '').strip()[:Client._meta.get_field('name').max_length]
+    if not name:
+        return None
+
+    email = str(row.get('email') or '').strip() or None
+    if email:
+        try:
+            validate_email(email)
+        except ValidationError:
+            return None
+    return phone, name, email
+
+
+def _upsert_chunk(barbershop, rows, counts):
+    cleaned = {}
+    for row in rows:
+        values = _clean(row)
+        if values is None:
+            counts['skipped'] += 1
+            continue
+        if values[0] in cleaned:
+            # Telefone repetido no mesmo bloco: vale o último registro
+            counts['skipped'] += 1
+        cleaned[values[0]] = values
+
+    if not cleaned:
+        return
+
+    with transaction.atomic():
+        # Uma consulta por bloco, só para separar inseridos de atualizados no relatório
+        existing = set(
+            Client.objects.filter(barbershop=barbershop, phone_whatsap__in=cleaned)
+            .values_list('phone_whatsap', flat=True)
+        )
+
+        # Sem email no arquivo, o email já cadastrado é preservado
+        with_email = [values for values in cleaned.values() if values[2]]
+        without_email = [values for values in cleaned.values() if not values[2]]
+        for group, update_fields in ((with_email, ['name', 'email']), (without_email, ['name'])):
+            if group:
+                Client.objects.bulk_create(
+                    [
+                        Client(barbershop=barbershop, phone_whatsap=phone, name=name, email=email)
+                        for phone, name, email in group
+                    ],
+                    update_conflicts=True,
+                    unique_fields=['barbershop', 'phone_whatsap'],
+                    update_fields=update_fields,
+                )
+
+    counts['updated'] += len(existing)
+    counts['inserted'] += len(cleaned) - len(existing)
+
+
+def import_clients(barbershop, stream, file_format='csv', chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Importa clientes de um arquivo CSV ou NDJSON (colunas name, phone_whatsap, email),
+    em blocos de chunk_size registros: a memória usada depende do bloco, não do tamanho do arquivo.
+
+    Clientes já cadastrados (mesmo salão e telefone normalizado) são atualizados.
+    Retorna {'inserted': ..., 'updated': ..., 'skipped': ...}.
+    """
+    if file_format not in IMPORT_FORMATS:
+        raise ValueError(f'Formato inválido: {file_format}. Use {" ou ".join(IMPORT_FORMATS)}.')
+
+    counts = {'inserted': 0, 'updated': 0, 'skipped': 0}
+    rows = iter_rows(stream, file_format)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        _upsert_chunk(barbershop, chunk, counts)
+    return counts
@@ -0,0 +1,70 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from authentication.models import BarberShop
+from schedulingservices.archive import archivable, archive_batch, cutoff
+
+
+class Command(BaseCommand):
+    help = (
+        'Move para o arquivo (SchedulingArchive) os agendamentos Concluidos e Cancelados que começaram há mais '
+        'de --days dias (padrão e mínimo: SCHEDULING_ARCHIVE_AFTER_DAYS). Trabalha em lotes, cada um na sua transação: '
+        'pode ser interrompido e rodado de novo a qualquer momento, e as reservas não ficam esperando um lock longo.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, help='Horizonte: arquiva o que começou antes de hoje - N dias.')
+        parser.add_argument('--barbershop', type=int, help='Apenas o salão com este id.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--max-batches', type=int, help='Para depois de N lotes (o resto fica para a próxima).')
+        parser.add_argument('--sleep', type=float, default=0.0, help='Pausa (segundos) entre lotes.')
+        parser.add_argument('--dry-run', action='store_true', help='Só conta o que seria arquivado.')
+
+    def handle(self, *args, **options):
+        # O export só procura no arquivo quando o período começa antes do horizonte configurado:
+        # arquivar antes dele esconderia agendamentos
+        if options['days'] is not None and options['days'] < settings.SCHEDULING_ARCHIVE_AFTER_DAYS:
+            raise CommandError(
+                f'--days não pode ser menor que SCHEDULING_ARCHIVE_AFTER_DAYS ({settings.SCHEDULING_ARCHIVE_AFTER_DAYS}).'
+            )
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size deve ser positivo.')
+
+        before = cutoff(options['days'])
+        barbershop_ids = BarberShop.objects.order_by('pk').values_list('pk', flat=True)
+        if options['barbershop']:
+            barbershop_ids = barbershop_ids.filter(pk=options['barbershop'])
+
+        if options['dry_run']:
+            total = sum(archivable(barbershop_id, before).count() for barbershop_id in barbershop_ids)
+            self.stdout.write(f'{total} agendamentos seriam arquivados (anteriores a {before:%Y-%m-%d %H:%M}).')
+            return
+
+        total = batches = 0
+        started = time.perf_counter()
+        for barbershop_id in list(barbershop_ids):
+            moved_here = 0
+            while options['max_batches'] is None or batches < options['max_batches']:
+                try:
+                    moved = archive_batch(barbershop_id, before, options['batch_size'])
+                except IntegrityError as exc:
+                    raise CommandError(
+                        f'salão {barbershop_id}: um agendamento do lote já está no arquivo ({exc}). '
+                        f'Nada deste lote foi movido; {total + moved_here} arquivados antes do erro.'
+                    )
+                if not moved:
+                    break
+                batches += 1
+                moved_here += moved
+                if options['sleep']:
+                    time.sleep(options['sleep'])
+            total += moved_here
+            if moved_here and options['verbosity'] >= 2:
+                self.stdout.write(f'salão {barbershop_id}: {moved_here} arquivados')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} agendamentos arquivados em {batches} lotes ({time.perf_counter() - started:.1f}s).'
+        ))
@@ -0,0 +1,66 @@
+import random
+import timeit
+from datetime import datetime, timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from schedulingservices.availability import free_slots
+
+
+def legacy_free_slots(busy, window_start, window_end, duration):
+    """Reprodução do laço aninhado antigo do PublicAvailableTimesAPI (apenas para comparação)."""
+    slots = []
+    current = window_start
+
+    while current + duration <= window_end:
+        slot_end = current + duration
+        is_available = True
+
+        for occupied_start, occupied_end in busy:
+            if current < occupied_end and slot_end > occupied_start:
+                is_available = False
+                current = occupied_end + timedelta(minutes=1)
+                break
+
+        if is_available:
+            slots.append(current)
+            current += duration
+
+    return slots
+
+
+class Command(BaseCommand):
+    help = 'Micro-benchmark do motor de disponibilidade (sweep-line) contra o laço aninhado antigo.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bookings', type=int, nargs='+', default=[10, 50, 100, 200])
+        parser.add_argument('--duration', type=int, default=15, help='Duração do serviço em minutos.')
+        parser.add_argument('--repeat', type=int, default=200)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        duration = timedelta(minutes=options['duration'])
+        repeat = options['repeat']
+
+        # Um dia "cheio" de 24h permite densidades maiores que o expediente comercial
+        day = datetime.combine(timezone.localdate(), datetime.min.time(), tzinfo=timezone.get_current_timezone())
+        window_start, window_end = day, day + timedelta(days=1)
+
+        self.stdout.write(f"{'agendamentos':>12} {'sweep (us)':>12} {'legado (us)':>12} {'slots':>6}")
+
+        for total in options['bookings']:
+            # Agendamentos de 5 minutos, sem sobreposição, espalhados pela grade de 5 minutos do dia
+            starts = sorted(rng.sample(range(0, 24 * 60, 5), min(total, 24 * 12)))
+            busy = [(day + timedelta(minutes=m), day + timedelta(minutes=m + 5)) for m in starts]
+
+            sweep = timeit.timeit(
+                lambda: free_slots(busy, [(window_start, window_end)], duration), number=repeat
+            ) / repeat
+            legacy = timeit.timeit(
+                lambda: legacy_free_slots(busy, window_start, window_end, duration), number=repeat
+            ) / repeat
+            slots = len(free_slots(busy, [(window_start, window_end)], duration))
+
+            self.stdout.write(f'{len(busy):>12} {sweep * 1e6:>12.1f} {legacy * 1e6:>12.1f} {slots:>6}')
@@ -0,0 +1,103 @@
+import random
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from authentication.models import BarberShop
+from schedulingservices.models import STATUS_CHOICES, Client, Professional, Scheduling, Service
+from schedulingservices.reports import revenue_report
+from schedulingservices.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede o relatório de faturamento sobre um volume sintético de agendamentos. '
+        'Os dados são gerados dentro de uma transação desfeita ao final: o banco não é alterado.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000)
+        parser.add_argument('--days', type=int, default=365, help='Período coberto pelos agendamentos.')
+        parser.add_argument('--professionals', type=int, default=20)
+        parser.add_argument('--services', type=int, default=15)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            barbershop = self.generate(options)
+            self.measure(barbershop, options)
+            transaction.set_rollback(True)
+
+    def generate(self, options):
+        rng = random.Random(options['seed'])
+        owner = User.objects.create_user(username='benchmark-revenue@example.com')
+        barbershop = BarberShop.objects.create(
+            name='Benchmark', email=owner.username, owner=owner, scheduling_link='benchmark-revenue',
+        )
+        professionals = Professional.objects.bulk_create([
+            Professional(barbershop=barbershop, name=f'Profissional {i}', phone=str(i),
+                         commission_standard=Decimal(rng.choice(('0.30', '0.40', '0.50'))))
+            for i in range(options['professionals'])
+        ])
+        services = Service.objects.bulk_create([
+            Service(barbershop=barbershop, name=f'Serviço {i}', minutes_duration=30, value=Decimal(20 + 5 * i))
+            for i in range(options['services'])
+        ])
+        clients = Client.objects.bulk_create([
+            Client(barbershop=barbershop, name=f'Cliente {i}', phone_whatsap=str(10_000_000 + i)) for i in range(1000)
+        ])
+
+        statuses = [choice for choice, _ in STATUS_CHOICES]
+        first_day = datetime.combine(
+            timezone.localdate() - timedelta(days=options['days']), datetime.min.time(),
+            tzinfo=timezone.get_current_timezone(),
+        )
+        started = time.perf_counter()
+        remaining = options['rows']
+        while remaining:
+            batch = []
+            for _ in range(min(remaining, options['batch_size'])):
+                service = rng.choice(services)
+                start = first_day + timedelta(days=rng.randrange(options['days']), minutes=9 * 60 + 30 * rng.randrange(18))
+                batch.append(Scheduling(
+                    barbershop=barbershop, client=rng.choice(clients), service=service,
+                    professional=rng.choice(professionals), date_hour_init=start,
+                    date_hour_end=start + timedelta(minutes=30), status=rng.choice(statuses),
+                    initial_value=service.value,
+                ))
+            Scheduling.objects.bulk_create(batch)
+            remaining -= len(batch)
+
+        self.stdout.write(f'{options["rows"]} agendamentos gerados em {time.perf_counter() - started:.1f}s')
+
+        # bulk_create não dispara signals: o resumo diário que o relatório lê é montado de uma vez
+        started = time.perf_counter()
+        total = rebuild(barbershop.pk)
+        self.stdout.write(f'{total} linhas de resumo diário em {time.perf_counter() - started:.1f}s')
+        return barbershop
+
+    def measure(self, barbershop, options):
+        date_to = timezone.localdate()
+        scenarios = [
+            ('totais (ano)', options['days'], (), None),
+            ('profissional x mês (ano)', options['days'], ('professional',), 'month'),
+            ('serviço x semana (ano)', options['days'], ('service',), 'week'),
+            ('profissional x serviço x dia (mês)', 30, ('professional', 'service'), 'day'),
+        ]
+
+        self.stdout.write(f"{'cenário':<36} {'melhor (ms)':>12} {'linhas':>8}")
+        for label, days, group_by, period in scenarios:
+            date_from = date_to - timedelta(days=days)
+            timings = []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                report = revenue_report(barbershop, date_from, date_to, group_by, period)
+                timings.append(time.perf_counter() - started)
+            self.stdout.write(f'{label:<36} {min(timings) * 1000:>12.1f} {len(report.get("results", [])):>8}')
@@ -0,0 +1,208 @@
+import random
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from authentication.models import BarberShop
+from intelligence.models import FrequencySuggestion
+from intelligence.suggestions import rebuild as rebuild_suggestions
+from notifications.models import OutboxMessage
+from schedulingservices.models import Client, Professional, Scheduling, SchedulingArchive, Service
+from schedulingservices.rollups import rebuild as rebuild_rollups
+
+
+SERVICE_CATALOG = (
+    # nome, minutos, valor, dias ideais de retorno
+    ('Corte', 30, '45.00', 30),
+    ('Barba', 30, '35.00', 15),
+    ('Corte e Barba', 60, '75.00', 30),
+    ('Pezinho', 15, '15.00', 15),
+    ('Sobrancelha', 15, '20.00', 20),
+    ('Hidratação', 45, '60.00', 30),
+    ('Coloração', 90, '150.00', 45),
+    ('Luzes', 120, '220.00', 60),
+    ('Progressiva', 150, '250.00', 90),
+    ('Corte Infantil', 30, '35.00', 30),
+    ('Relaxamento', 60, '90.00', 60),
+    ('Platinado', 120, '260.00', 60),
+    ('Selagem', 90, '180.00', 90),
+    ('Limpeza de Pele', 45, '70.00', 30),
+    ('Massagem Capilar', 30, '40.00', 30),
+)
+
+FIRST_NAMES = ('Ana', 'Bruno', 'Carla', 'Diego', 'Elisa', 'Felipe', 'Gabi', 'Hugo', 'Iara', 'João', 'Karen', 'Lucas')
+LAST_NAMES = ('Silva', 'Souza', 'Oliveira', 'Santos', 'Lima', 'Costa', 'Pereira', 'Almeida', 'Rocha', 'Gomes')
+
+DAY_START, DAY_END = 9 * 60, 18 * 60
+
+
+class Command(BaseCommand):
+    help = (
+        'Gera um conjunto de dados sintético e realista para medir desempenho: N salões com profissionais, '
+        'serviços (e profissionais aptos), clientes, regras de frequência e anos de histórico de agendamentos, '
+        'sem sobreposição por profissional. Os salões se chamam <prefixo>-0, <prefixo>-1... e os donos '
+        '<prefixo>-N@example.com (senha: --password). Depois rode `manage.py run_benchmarks`.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--barbershops', type=int, default=3)
+        parser.add_argument('--professionals', type=int, default=8, help='Por salão.')
+        parser.add_argument('--services', type=int, default=15, help=f'Por salão (máx. {len(SERVICE_CATALOG)}).')
+        parser.add_argument('--clients', type=int, default=3000, help='Por salão.')
+        parser.add_argument('--days', type=int, default=730, help='Dias de histórico até hoje.')
+        parser.add_argument('--future-days', type=int, default=30, help='Dias de agenda futura.')
+        parser.add_argument('--occupancy', type=float, default=0.6, help='Fração da agenda ocupada (0-1).')
+        parser.add_argument('--prefix', default='bench')
+        parser.add_argument('--password', default='benchmark-123')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--reset', action='store_true', help='Apaga antes os salões com o mesmo prefixo.')
+
+    def handle(self, *args, **options):
+        if not 1 <= options['services'] <= len(SERVICE_CATALOG):
+            raise CommandError(f'--services deve estar entre 1 e {len(SERVICE_CATALOG)}.')
+        if not 0 < options['occupancy'] <= 1:
+            raise CommandError('--occupancy deve estar entre 0 e 1.')
+
+        prefix = options['prefix']
+        existing = User.objects.filter(username__startswith=f'{prefix}-', username__endswith='@example.com')
+        if existing.exists():
+            if not options['reset']:
+                raise CommandError(f'Já existem salões com o prefixo "{prefix}": use --reset ou outro --prefix.')
+            self.reset(existing)
+
+        rng = random.Random(options['seed'])
+        for index in range(options['barbershops']):
+            started = time.perf_counter()
+            with transaction.atomic():
+                barbershop, total = self.generate_barbershop(rng, f'{prefix}-{index}', options)
+                # bulk_create não dispara signals: as tabelas derivadas são montadas de uma vez
+                rebuild_rollups(barbershop.pk)
+                rebuild_suggestions(barbershop.pk)
+            self.stdout.write(
+                f'{barbershop.scheduling_link}: {total} agendamentos em {time.perf_counter() - started:.1f}s'
+            )
+
+        self.stdout.write(self.style.SUCCESS(f'{options["barbershops"]} salões gerados.'))
+
+    def reset(self, owners):
+        barbershops = BarberShop.objects.filter(owner__in=owners)
+        barbershop_ids = list(barbershops.values_list('pk', flat=True))
+        with transaction.atomic():
+            # Agendamentos (e arquivados) protegem clientes/serviços/profissionais (PROTECT): saem primeiro,
+            # com um DELETE direto. O delete() do ORM carregaria cada linha para os signals (resumo, cache, sugestões),
+            # e tudo isso é apagado junto com o salão logo abaixo
+            OutboxMessage.objects.filter(barbershop__in=barbershop_ids).delete()
+            if barbershop_ids:
+                placeholders = ', '.join(['%s'] * len(barbershop_ids))
+                with connection.cursor() as cursor:
+                    for model in (Scheduling, SchedulingArchive):
+                        cursor.execute(
+                            f'DELETE FROM {connection.ops.quote_name(model._meta.db_table)} '
+                            f'WHERE {connection.ops.quote_name(model._meta.get_field("barbershop").column)} '
+                            f'IN ({placeholders})',
+                            barbershop_ids,
+                        )
+            owners.delete()
+
+    def generate_barbershop(self, rng, slug, options):
+        owner = User.objects.create_user(username=f'{slug}@example.com', password=options['password'])
+        barbershop = BarberShop.objects.create(
+            name=f'Salão {slug}', email=owner.username, owner=owner, scheduling_link=slug,
+        )
+
+        professionals = Professional.objects.bulk_create([
+            Professional(
+                barbershop=barbershop, name=f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}', phone=str(i),
+                commission_standard=Decimal(rng.choice(('0.30', '0.40', '0.50'))),
+            )
+            for i in range(options['professionals'])
+        ])
+
+        catalog = SERVICE_CATALOG[:options['services']]
+        services = Service.objects.bulk_create([
+            Service(barbershop=barbershop, name=name, minutes_duration=minutes, value=Decimal(value))
+            for name, minutes, value, _ in catalog
+        ])
+        # Cada serviço é feito por metade a todos os profissionais
+        apt_by_professional = {professional.pk: [] for professional in professionals}
+        through = []
+        for service in services:
+            apt = rng.sample(professionals, rng.randint(max(1, len(professionals) // 2), len(professionals)))
+            for professional in apt:
+                apt_by_professional[professional.pk].append(service)
+                through.append(Service.professionals_aptos.through(service_id=service.pk, professional_id=professional.pk))
+        Service.professionals_aptos.through.objects.bulk_create(through)
+
+        FrequencySuggestion.objects.bulk_create([
+            FrequencySuggestion(
+                barbershop=barbershop, service=service, ideal_return_days=return_days,
+                anticipation_tolerance_days=max(1, return_days // 6),
+            )
+            for service, (_, _, _, return_days) in zip(services, catalog)
+        ])
+
+        clients = Client.objects.bulk_create([
+            Client(
+                barbershop=barbershop, name=f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}',
+                phone_whatsap=f'119{i:08d}', email=f'cliente{i}@example.com' if rng.random() < 0.4 else None,
+            )
+            for i in range(options['clients'])
+        ], batch_size=options['batch_size'])
+
+        total = 0
+        batch = []
+        for scheduling in self.schedulings(rng, barbershop, professionals, apt_by_professional, clients, options):
+            batch.append(scheduling)
+            if len(batch) >= options['batch_size']:
+                Scheduling.objects.bulk_create(batch)
+                total += len(batch)
+                batch = []
+        Scheduling.objects.bulk_create(batch)
+        return barbershop, total + len(batch)
+
+    def schedulings(self, rng, barbershop, professionals, apt_by_professional, clients, options):
+        """Agenda de cada profissional, dia a dia: blocos encostados ou com folgas, nunca sobrepostos."""
+        today = timezone.localdate()
+        current_tz = timezone.get_current_timezone()
+        # Clientes frequentes concentram boa parte dos atendimentos (distribuição de cauda longa)
+        regulars = clients[:max(1, len(clients) // 5)]
+
+        for offset in range(-options['days'], options['future_days'] + 1):
+            day = today + timedelta(days=offset)
+            if day.weekday() == 6:
+                continue  # Domingo fechado
+            midnight = datetime.combine(day, datetime.min.time(), tzinfo=current_tz)
+
+            for professional in professionals:
+                services = apt_by_professional[professional.pk]
+                if not services:
+                    continue
+                cursor = DAY_START
+                while cursor < DAY_END:
+                    service = rng.choice(services)
+                    if cursor + service.minutes_duration > DAY_END or rng.random() > options['occupancy']:
+                        cursor += 15
+                        continue
+
+                    start = midnight + timedelta(minutes=cursor)
+                    yield Scheduling(
+                        barbershop=barbershop, professional=professional, service=service,
+                        client=rng.choice(regulars if rng.random() < 0.6 else clients),
+                        date_hour_init=start, date_hour_end=start + timedelta(minutes=service.minutes_duration),
+                        status=self.status(rng, offset), initial_value=service.value,
+                    )
+                    cursor += service.minutes_duration
+
+    def status(self, rng, offset):
+        roll = rng.random()
+        if offset < 0:
+            return 'Concluido' if roll < 0.82 else 'Cancelado' if roll < 0.97 else 'Pendente'
+        if offset == 0:
+            return 'Concluido' if roll < 0.4 else 'Confirmado' if roll < 0.85 else 'Cancelado'
+        return 'Confirmado' if roll < 0.5 else 'Pendente' if roll < 0.93 else 'Cancelado'
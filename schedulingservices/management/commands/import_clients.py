@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from authentication.models import BarberShop
+from schedulingservices.importers import (
+    IMPORT_CHUNK_SIZE, IMPORT_FORMATS, UNREADABLE_FILE_ERRORS, guess_format, import_clients,
+)
+
+
+class Command(BaseCommand):
+    help = 'Importa clientes de um arquivo CSV ou NDJSON para um salão, atualizando os já cadastrados.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Arquivo com as colunas name, phone_whatsap e email.')
+        parser.add_argument('--barbershop', type=int, required=True, help='Id do salão.')
+        parser.add_argument('--file-format', choices=IMPORT_FORMATS, help='Padrão: pela extensão do arquivo.')
+        parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            barbershop = BarberShop.objects.get(pk=options['barbershop'])
+        except BarberShop.DoesNotExist:
+            raise CommandError(f'Salão {options["barbershop"]} não encontrado.')
+
+        file_format = options['file_format'] or guess_format(options['path'])
+        with open(options['path'], 'rb') as stream:
+            try:
+                counts = import_clients(barbershop, stream, file_format, options['chunk_size'])
+            except UNREADABLE_FILE_ERRORS as exc:
+                raise CommandError(f'Arquivo ilegível: {exc}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{counts["inserted"]} inseridos, {counts["updated"]} atualizados, {counts["skipped"]} ignorados.'
+        ))
@@ -0,0 +1,120 @@
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        'Teste de carga das rotas públicas: N conexões HTTP/1.1 keep-alive simultâneas contra cada URL, '
+        'com um cliente asyncio sem dependências. Suba os servidores antes, por exemplo:\n'
+        '  gunicorn project.wsgi -b 127.0.0.1:8000 -w 4 --threads 8   (WSGI síncrono)\n'
+        '  uvicorn project.asgi:application --port 8001 --workers 4    (ASGI assíncrono)\n'
+        'e compare: loadtest_public wsgi=http://127.0.0.1:8000/api/v1/public/<slug>/ '
+        'asgi=http://127.0.0.1:8001/api/v1/async/public/<slug>/'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('targets', nargs='+', help='URL ou nome=URL.')
+        parser.add_argument('--connections', type=int, default=500)
+        parser.add_argument('--duration', type=float, default=10.0, help='Segundos de medição por URL.')
+        parser.add_argument('--timeout', type=float, default=30.0, help='Timeout de cada requisição (s).')
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'alvo':<10} {'reqs':>8} {'req/s':>9} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9} {'erros':>7}"
+        )
+        for target in options['targets']:
+            label, _, url = target.partition('=') if '=' in target.split('://')[0] else ('', '', target)
+            parts = urlsplit(url)
+            if parts.scheme != 'http' or not parts.hostname:
+                raise CommandError(f'URL inválida (só http://): {url}')
+
+            result = asyncio.run(self.run_target(parts, options))
+            latencies = sorted(result['latencies'])
+            if latencies:
+                p50, p95, p99 = (statistics.quantiles(latencies, n=100)[q - 1] * 1000 for q in (50, 95, 99)) \
+                    if len(latencies) > 1 else (latencies[0] * 1000,) * 3
+            else:
+                p50 = p95 = p99 = float('nan')
+            self.stdout.write(
+                f"{(label or parts.netloc)[:10]:<10} {len(latencies):>8} {len(latencies) / result['elapsed']:>9.1f} "
+                f"{p50:>9.1f} {p95:>9.1f} {p99:>9.1f} {result['errors']:>7}"
+            )
+
+    async def run_target(self, parts, options):
+        host, port = parts.hostname, parts.port or 80
+        path = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+        request = (
+            f'GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\nAccept: application/json\r\n'
+            f'Connection: keep-alive\r\n\r\n'
+        ).encode()
+
+        result = {'latencies': [], 'errors': 0}
+        started = time.perf_counter()
+        deadline = started + options['duration']
+        await asyncio.gather(*(
+            self.worker(host, port, request, deadline, options['timeout'], result)
+            for _ in range(options['connections'])
+        ))
+        result['elapsed'] = time.perf_counter() - started
+        return result
+
+    async def worker(self, host, port, request, deadline, timeout, result):
+        reader = writer = None
+        while time.perf_counter() < deadline:
+            try:
+                if writer is None:
+                    reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+
+                sent = time.perf_counter()
+                writer.write(request)
+                await writer.drain()
+                status, keep_alive = await asyncio.wait_for(self.read_response(reader), timeout)
+                if status >= 400:
+                    result['errors'] += 1
+                else:
+                    result['latencies'].append(time.perf_counter() - sent)
+
+                if not keep_alive:
+                    writer.close()
+                    writer = None
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+                result['errors'] += 1
+                if writer is not None:
+                    writer.close()
+                writer = None
+                # Servidor saturado recusando conexões: não transforma o teste em um laço de reconexão
+                await asyncio.sleep(0.05)
+
+        if writer is not None:
+            writer.close()
+
+    async def read_response(self, reader):
+        """Lê uma resposta HTTP/1.1 (Content-Length ou chunked) e devolve (status, keep-alive?)."""
+        status_line = await reader.readuntil(b'\r\n')
+        status = int(status_line.split()[1])
+
+        headers = {}
+        while True:
+            line = await reader.readuntil(b'\r\n')
+            if line == b'\r\n':
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip().lower()
+
+        if 'content-length' in headers:
+            await reader.readexactly(int(headers['content-length']))
+        elif headers.get('transfer-encoding') == 'chunked':
+            while True:
+                size = int((await reader.readuntil(b'\r\n')).split(b';')[0], 16)
+                await reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        elif status not in (204, 304):
+            await reader.read()
+            return status, False
+
+        return status, headers.get('connection') != 'close'
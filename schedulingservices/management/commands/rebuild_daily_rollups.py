@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from schedulingservices.rollups import rebuild, verify
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói (ou apenas confere, com --verify) o resumo diário de agendamentos a partir do histórico.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--barbershop', type=int, help='Apenas o salão com este id.')
+        parser.add_argument('--verify', action='store_true', help='Só compara o resumo gravado com o recalculado.')
+
+    def handle(self, *args, **options):
+        if not options['verify']:
+            total = rebuild(options.get('barbershop'))
+            self.stdout.write(self.style.SUCCESS(f'{total} linhas de resumo recalculadas.'))
+            return
+
+        differences = verify(options.get('barbershop'))
+        for key, stored, expected in differences:
+            self.stdout.write(f'{key}: gravado={stored} esperado={expected}')
+        if differences:
+            raise CommandError(f'{len(differences)} linhas divergentes. Rode o comando sem --verify para corrigir.')
+        self.stdout.write(self.style.SUCCESS('Resumo diário confere com os agendamentos.'))
@@ -0,0 +1,209 @@
+import json
+import platform
+import statistics
+import subprocess
+import time
+from contextlib import nullcontext
+from datetime import timedelta
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from authentication.models import BarberShop
+from schedulingservices.dates import day_bounds
+from schedulingservices.models import Client, Professional, Scheduling, Service
+
+
+class Command(BaseCommand):
+    help = (
+        'Mede cada endpoint da API contra um salão do conjunto de dados (ver generate_dataset): latência '
+        'p50/p95 e número de consultas por requisição. As requisições rodam no próprio processo (sem rede). '
+        'O resultado vai para um arquivo JSON, para comparar execuções entre commits (--compare).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--barbershop', default='bench-0', help='Slug (scheduling_link) do salão.')
+        parser.add_argument('--repeat', type=int, default=30, help='Requisições medidas por endpoint.')
+        parser.add_argument('--warmup', type=int, default=3, help='Requisições descartadas antes de medir.')
+        parser.add_argument('--cold', action='store_true', help='Limpa o cache antes de cada requisição.')
+        parser.add_argument('--only', help='Mede só os endpoints cujo nome contém este texto.')
+        parser.add_argument('--output', default='benchmark-results.json')
+        parser.add_argument('--compare', help='JSON de uma execução anterior para mostrar a diferença.')
+
+    def handle(self, *args, **options):
+        try:
+            barbershop = BarberShop.objects.select_related('owner').get(scheduling_link=options['barbershop'])
+        except BarberShop.DoesNotExist:
+            raise CommandError(f'Salão "{options["barbershop"]}" não encontrado: rode generate_dataset antes.')
+
+        endpoints = self.endpoints(barbershop)
+        if options['only']:
+            endpoints = [endpoint for endpoint in endpoints if options['only'] in endpoint[0]]
+
+        api = APIClient()
+        api.force_authenticate(barbershop.owner)
+        results = []
+        # O cliente de teste usa o host 'testserver'
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            for name, method, path, data, writes in endpoints:
+                results.append(self.measure(api, name, method, path, data, writes, options))
+
+        report = {'meta': self.meta(barbershop, options), 'results': results}
+        Path(options['output']).write_text(json.dumps(report, indent=2, ensure_ascii=False))
+
+        previous = self.load_previous(options['compare'])
+        self.print_table(results, previous)
+        self.stdout.write(self.style.SUCCESS(f'Resultados gravados em {options["output"]}.'))
+
+    def endpoints(self, barbershop):
+        """(nome, método, caminho, dados, grava?) de cada cenário, com ids reais do salão."""
+        slug = barbershop.scheduling_link
+        today = timezone.localdate()
+        tomorrow = today + timedelta(days=1)
+        service = Service.objects.filter(barbershop=barbershop, professionals_aptos__isnull=False).order_by('pk').first()
+        if service is None:
+            raise CommandError('O salão não tem serviços com profissionais aptos.')
+        professional = service.professionals_aptos.order_by('pk').first()
+        client = Client.objects.filter(barbershop=barbershop).order_by('pk').first()
+        month_start = today.replace(day=1)
+
+        # Reserva às 20h de amanhã, fora da agenda gerada (09h-18h): nunca conflita e é desfeita a cada requisição
+        booking_start = day_bounds(tomorrow)[0] + timedelta(hours=20)
+
+        return [
+            ('catálogo público', 'get', f'/api/v1/public/{slug}/', None, False),
+            ('horários livres (profissional)', 'get', f'/api/v1/public/{slug}/available-times/', {
+                'professional_id': professional.pk, 'service_id': service.pk, 'date': tomorrow.isoformat(),
+            }, False),
+            ('horários livres (serviço)', 'get', f'/api/v1/public/{slug}/service-availability/', {
+                'service_id': service.pk, 'date': tomorrow.isoformat(),
+            }, False),
+            ('serviços que cabem', 'get', f'/api/v1/public/{slug}/services-fit/', {'date': tomorrow.isoformat()}, False),
+            ('reserva pública', 'post', f'/api/v1/public/{slug}/', {
+                'client_name': client.name, 'client_phone': client.phone_whatsap, 'service_id': service.pk,
+                'professional_id': professional.pk, 'date_hour_init': booking_start.isoformat(),
+            }, True),
+            ('profissionais', 'get', '/api/v1/profissional/', None, False),
+            ('serviços', 'get', '/api/v1/servico/', None, False),
+            ('clientes (página 1)', 'get', '/api/v1/clientes/', None, False),
+            ('agenda do dia', 'get', '/api/v1/agendamentos/', {
+                'date_from': today.isoformat(), 'date_to': today.isoformat(),
+            }, False),
+            ('agenda (página 1, sem filtro)', 'get', '/api/v1/agendamentos/', None, False),
+            ('export do mês (csv)', 'get', '/api/v1/agendamentos/export/', {
+                'date_from': month_start.isoformat(), 'date_to': today.isoformat(),
+            }, False),
+            ('faturamento do mês', 'get', '/api/v1/relatorios/faturamento/', None, False),
+            ('faturamento do ano por profissional/mês', 'get', '/api/v1/relatorios/faturamento/', {
+                'date_from': (today - timedelta(days=365)).isoformat(), 'group_by': 'professional', 'period': 'month',
+            }, False),
+            ('sugestões de reagendamento', 'get', '/api/v1/ai-sugestoes/', None, False),
+            ('horários de trabalho', 'get', '/api/v1/horarios/', None, False),
+        ]
+
+    def request(self, api, method, path, data):
+        if method == 'get':
+            response = api.get(path, data)
+        else:
+            response = api.post(path, data, format='json')
+        if response.streaming:
+            # O tempo do export inclui gerar o arquivo inteiro
+            for _ in response.streaming_content:
+                pass
+        return response
+
+    def measure(self, api, name, method, path, data, writes, options):
+        latencies, queries, statuses = [], [], set()
+
+        for iteration in range(options['warmup'] + options['repeat']):
+            if options['cold']:
+                cache.clear()
+            # Cenários de escrita rodam em uma transação desfeita ao final: o conjunto de dados não muda
+            with transaction.atomic() if writes else nullcontext():
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    response = self.request(api, method, path, data)
+                    elapsed = time.perf_counter() - started
+                if writes:
+                    transaction.set_rollback(True)
+
+            if iteration >= options['warmup']:
+                latencies.append(elapsed * 1000)
+                queries.append(len(captured.captured_queries))
+                statuses.add(response.status_code)
+
+        latencies.sort()
+        return {
+            'name': name,
+            'method': method.upper(),
+            'path': path,
+            'params': data if method == 'get' else None,
+            'status': sorted(statuses),
+            'p50_ms': round(statistics.median(latencies), 3),
+            'p95_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3),
+            'mean_ms': round(statistics.fmean(latencies), 3),
+            'max_ms': round(latencies[-1], 3),
+            'queries': round(statistics.median(queries)),
+            'queries_max': max(queries),
+        }
+
+    def meta(self, barbershop, options):
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+                cwd=settings.BASE_DIR,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+
+        return {
+            'commit': commit,
+            'timestamp': timezone.now().isoformat(),
+            'barbershop': barbershop.scheduling_link,
+            'dataset': {
+                'professionals': Professional.objects.filter(barbershop=barbershop).count(),
+                'services': Service.objects.filter(barbershop=barbershop).count(),
+                'clients': Client.objects.filter(barbershop=barbershop).count(),
+                'schedulings': Scheduling.objects.filter(barbershop=barbershop).count(),
+            },
+            'database': connection.vendor,
+            'cache': settings.CACHES['default']['BACKEND'],
+            'repeat': options['repeat'],
+            'warmup': options['warmup'],
+            'cold_cache': options['cold'],
+            'python': platform.python_version(),
+            'django': django.get_version(),
+        }
+
+    def load_previous(self, path):
+        if not path:
+            return {}
+        try:
+            previous = json.loads(Path(path).read_text())
+        except (OSError, ValueError) as exc:
+            raise CommandError(f'Não foi possível ler {path}: {exc}')
+        return {result['name']: result for result in previous.get('results', [])}
+
+    def print_table(self, results, previous):
+        header = f"{'endpoint':<42} {'p50 (ms)':>9} {'p95 (ms)':>9} {'consultas':>9} {'status':>8}"
+        if previous:
+            header += f" {'Δ p50':>9}"
+        self.stdout.write(header)
+
+        for result in results:
+            line = (
+                f"{result['name'][:42]:<42} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} "
+                f"{result['queries']:>9} {','.join(map(str, result['status'])):>8}"
+            )
+            before = previous.get(result['name'])
+            if before:
+                change = (result['p50_ms'] - before['p50_ms']) / before['p50_ms'] * 100 if before['p50_ms'] else 0.0
+                line += f' {change:>+8.1f}%'
+            self.stdout.write(line)
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0001_initial'),
+        ('schedulingservices', '0004_alter_scheduling_unique_together'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='scheduling',
+            index=models.Index(fields=['professional', 'date_hour_init', 'date_hour_end'], name='sched_prof_init_end_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scheduling',
+            index=models.Index(fields=['barbershop', 'status', 'date_hour_init'], name='sched_shop_status_init_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scheduling',
+            index=models.Index(fields=['barbershop', 'date_hour_init'], name='sched_shop_init_idx'),
+        ),
+    ]
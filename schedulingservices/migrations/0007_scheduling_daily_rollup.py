@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0001_initial'),
+        ('schedulingservices', '0006_client_name_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SchedulingDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(verbose_name='Dia')),
+                ('booked_minutes', models.IntegerField(default=0, verbose_name='Minutos agendados')),
+                ('completed_count', models.IntegerField(default=0, verbose_name='Concluídos')),
+                ('cancelled_count', models.IntegerField(default=0, verbose_name='Cancelados')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Faturamento')),
+                ('barbershop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='authentication.barbershop', verbose_name='Salão')),
+                ('professional', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='schedulingservices.professional', verbose_name='Profissional')),
+                ('service', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='schedulingservices.service', verbose_name='Serviço')),
+            ],
+            options={
+                'verbose_name': 'Resumo diário',
+                'verbose_name_plural': 'Resumos diários',
+                'indexes': [models.Index(fields=['barbershop', 'day'], name='rollup_shop_day_idx')],
+                'unique_together': {('barbershop', 'professional', 'service', 'day')},
+            },
+        ),
+    ]
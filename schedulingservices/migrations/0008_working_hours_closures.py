@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0001_initial'),
+        ('schedulingservices', '0007_scheduling_daily_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Closure',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start', models.DateTimeField(verbose_name='Início')),
+                ('end', models.DateTimeField(verbose_name='Fim')),
+                ('reason', models.CharField(blank=True, default='', max_length=200, verbose_name='Motivo')),
+                ('barbershop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='closures', to='authentication.barbershop', verbose_name='Salão')),
+                ('professional', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='closures', to='schedulingservices.professional', verbose_name='Profissional')),
+            ],
+            options={
+                'verbose_name': 'Fechamento',
+                'verbose_name_plural': 'Fechamentos',
+                'ordering': ('start',),
+                'indexes': [models.Index(fields=['barbershop', 'start', 'end'], name='closure_shop_start_end_idx')],
+                'constraints': [models.CheckConstraint(condition=models.Q(('start__lt', models.F('end'))), name='closure_start_before_end')],
+            },
+        ),
+        migrations.CreateModel(
+            name='WorkingHours',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.PositiveSmallIntegerField(choices=[(0, 'Segunda-feira'), (1, 'Terça-feira'), (2, 'Quarta-feira'), (3, 'Quinta-feira'), (4, 'Sexta-feira'), (5, 'Sábado'), (6, 'Domingo')], verbose_name='Dia da semana')),
+                ('start', models.TimeField(verbose_name='Início')),
+                ('end', models.TimeField(verbose_name='Fim')),
+                ('barbershop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='working_hours', to='authentication.barbershop', verbose_name='Salão')),
+                ('professional', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='working_hours', to='schedulingservices.professional', verbose_name='Profissional')),
+            ],
+            options={
+                'verbose_name': 'Horário de trabalho',
+                'verbose_name_plural': 'Horários de trabalho',
+                'ordering': ('weekday', 'start'),
+                'constraints': [models.CheckConstraint(condition=models.Q(('start__lt', models.F('end'))), name='working_hours_start_before_end')],
+            },
+        ),
+    ]
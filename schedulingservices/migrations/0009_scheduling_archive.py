@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:58
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0001_initial'),
+        ('schedulingservices', '0008_working_hours_closures'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SchedulingArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('date_hour_init', models.DateTimeField(verbose_name='Data de inicio')),
+                ('date_hour_end', models.DateTimeField(blank=True, null=True, verbose_name='Data de fim')),
+                ('status', models.CharField(choices=[('Pendente', 'Pendente'), ('Confirmado', 'Confirmado'), ('Concluido', 'Concluído'), ('Cancelado', 'Cancelado')], max_length=20, verbose_name='Status')),
+                ('initial_value', models.DecimalField(decimal_places=2, default=0.0, max_digits=10, verbose_name='Valor Inicial')),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Arquivado em')),
+                ('barbershop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_schedulings', to='authentication.barbershop', verbose_name='Salão')),
+                ('client', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_schedulings', to='schedulingservices.client', verbose_name='Cliente')),
+                ('professional', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_schedulings', to='schedulingservices.professional', verbose_name='Profissional')),
+                ('service', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_schedulings', to='schedulingservices.service', verbose_name='Serviço')),
+            ],
+            options={
+                'verbose_name': 'Agendamento arquivado',
+                'verbose_name_plural': 'Agendamentos arquivados',
+                'indexes': [models.Index(fields=['barbershop', 'date_hour_init'], name='sched_arch_shop_init_idx'), models.Index(fields=['barbershop', 'client', 'service', 'status'], name='sched_arch_client_service_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,68 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import Count, DurationField, F, Q, Sum
+from django.db.models.functions import TruncDate
+
+
+# Cópia das regras de schedulingservices/rollups.py no momento desta migração: ela usa só os modelos
+# históricos, para continuar funcionando quando os modelos e o código atual mudarem
+COMPLETED = 'Concluido'
+CANCELLED = 'Cancelado'
+BATCH_SIZE = 1000
+
+
+def backfill(apps, schema_editor):
+    """
+    Preenche o resumo diário a partir dos agendamentos já existentes: sem isso, o relatório de faturamento
+    (que lê o resumo para os dias passados) voltaria zerado até alguém rodar `rebuild_daily_rollups`.
+    """
+    Scheduling = apps.get_model('schedulingservices', 'Scheduling')
+    SchedulingArchive = apps.get_model('schedulingservices', 'SchedulingArchive')
+    SchedulingDailyRollup = apps.get_model('schedulingservices', 'SchedulingDailyRollup')
+    alias = schema_editor.connection.alias
+
+    totals = defaultdict(lambda: {
+        'booked_minutes': 0, 'completed_count': 0, 'cancelled_count': 0, 'revenue': Decimal('0'),
+    })
+    for model in (Scheduling, SchedulingArchive):
+        rows = model.objects.using(alias).annotate(day=TruncDate('date_hour_init')).values(
+            'barbershop_id', 'professional_id', 'service_id', 'day',
+        ).annotate(
+            booked=Sum(F('date_hour_end') - F('date_hour_init'), filter=~Q(status=CANCELLED), output_field=DurationField()),
+            completed_count=Count('id', filter=Q(status=COMPLETED)),
+            cancelled_count=Count('id', filter=Q(status=CANCELLED)),
+            revenue=Sum('initial_value', filter=Q(status=COMPLETED)),
+        ).order_by()
+
+        for row in rows.iterator():
+            booked = row['booked']
+            values = totals[(row['barbershop_id'], row['professional_id'], row['service_id'], row['day'])]
+            values['booked_minutes'] += int(booked.total_seconds() // 60) if booked else 0
+            values['completed_count'] += row['completed_count']
+            values['cancelled_count'] += row['cancelled_count']
+            values['revenue'] += row['revenue'] or Decimal('0')
+
+    rows = []
+    for (barbershop_id, professional_id, service_id, day), values in totals.items():
+        values['revenue'] = values['revenue'].quantize(Decimal('0.01'))
+        if any(values.values()):
+            rows.append(SchedulingDailyRollup(
+                barbershop_id=barbershop_id, professional_id=professional_id, service_id=service_id, day=day,
+                **values,
+            ))
+
+    SchedulingDailyRollup.objects.using(alias).all().delete()
+    SchedulingDailyRollup.objects.using(alias).bulk_create(rows, batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schedulingservices', '0009_scheduling_archive'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
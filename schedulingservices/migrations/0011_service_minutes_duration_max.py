@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:23
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schedulingservices', '0010_backfill_daily_rollups'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='service',
+            name='minutes_duration',
+            field=models.IntegerField(help_text='Tempo médio em minutos para execução do serviço', validators=[django.core.validators.MinValueValidator(5), django.core.validators.MaxValueValidator(1440)]),
+        ),
+    ]
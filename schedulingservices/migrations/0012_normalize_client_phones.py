@@ -0,0 +1,93 @@
+import re
+from collections import defaultdict
+
+from django.db import migrations
+
+
+_NON_DIGITS = re.compile(r'\D')
+
+
+def normalize_phone(value):
+    # Cópia de models.normalize_phone: a migração não deve depender do código atual
+    return _NON_DIGITS.sub('', str(value or ''))
+
+
+def merge_suggestions(RescheduleSuggestion, alias, survivor_id, duplicate_id):
+    """Sugestões do duplicado passam para o cliente mantido; no mesmo serviço, vale o atendimento mais recente."""
+    kept = {
+        row.service_id: row
+        for row in RescheduleSuggestion.objects.using(alias).filter(client_id=survivor_id)
+    }
+    for row in RescheduleSuggestion.objects.using(alias).filter(client_id=duplicate_id):
+        current = kept.get(row.service_id)
+        if current is None:
+            row.client_id = survivor_id
+            row.save(update_fields=['client'])
+            continue
+        if row.last_service_date > current.last_service_date:
+            current.last_service_date = row.last_service_date
+            current.window_start, current.window_end = row.window_start, row.window_end
+            current.save(update_fields=['last_service_date', 'window_start', 'window_end'])
+        row.delete()
+
+
+def normalize_phones(apps, schema_editor):
+    """
+    Grava os telefones já cadastrados só com dígitos, como Client.save() passou a fazer. Clientes do mesmo
+    salão que viram o mesmo telefone são unidos no mais antigo (ou no que já estava normalizado):
+    agendamentos, arquivados e sugestões passam para ele, e os duplicados são apagados.
+    """
+    Client = apps.get_model('schedulingservices', 'Client')
+    Scheduling = apps.get_model('schedulingservices', 'Scheduling')
+    SchedulingArchive = apps.get_model('schedulingservices', 'SchedulingArchive')
+    RescheduleSuggestion = apps.get_model('intelligence', 'RescheduleSuggestion')
+    alias = schema_editor.connection.alias
+
+    groups = defaultdict(list)
+    unreadable = []
+    for client in Client.objects.using(alias).order_by('pk').only('pk', 'barbershop_id', 'phone_whatsap', 'email'):
+        phone = normalize_phone(client.phone_whatsap)
+        if not phone:
+            # Sem nenhum dígito: não há o que normalizar; fica como está e é listado no fim
+            unreadable.append(client.pk)
+            continue
+        groups[(client.barbershop_id, phone)].append(client)
+
+    merged = 0
+    for (_, phone), clients in groups.items():
+        if len(clients) == 1 and clients[0].phone_whatsap == phone:
+            continue
+
+        survivor = next((client for client in clients if client.phone_whatsap == phone), clients[0])
+        duplicates = [client for client in clients if client.pk != survivor.pk]
+        for duplicate in duplicates:
+            for model in (Scheduling, SchedulingArchive):
+                model.objects.using(alias).filter(client_id=duplicate.pk).update(client_id=survivor.pk)
+            merge_suggestions(RescheduleSuggestion, alias, survivor.pk, duplicate.pk)
+            if not survivor.email and duplicate.email:
+                survivor.email = duplicate.email
+        # Os duplicados saem antes de o telefone mudar: (barbershop, phone_whatsap) é único
+        Client.objects.using(alias).filter(pk__in=[client.pk for client in duplicates]).delete()
+        merged += len(duplicates)
+
+        survivor.phone_whatsap = phone
+        survivor.save(update_fields=['phone_whatsap', 'email'])
+
+    if merged or unreadable:
+        print(
+            f'\n  Telefones normalizados: {merged} clientes duplicados unidos; '
+            f'{len(unreadable)} sem telefone válido (ids: {unreadable[:20]})'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schedulingservices', '0011_service_minutes_duration_max'),
+        # As sugestões dos clientes unidos também passam para o cliente mantido
+        ('intelligence', '0004_backfill_reschedule_suggestions'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_phones, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,8 @@
+import re
+
 from django.db import models
-from django.core.validators import MinValueValidator
+from django.core.validators import MaxValueValidator, MinValueValidator
+from django.utils import timezone
 from datetime import timedelta
 
 from authentication.models import BarberShop
@@ -13,6 +16,12 @@ STATUS_CHOICES = (
     ('Cancelado', 'Cancelado'),
 )
 
+# Status que ocupam o horário do profissional (disponibilidade e verificação de conflito)
+OCCUPYING_STATUSES = ('Pendente', 'Confirmado')
+
+# Status finais: depois do horizonte de arquivamento, saem da tabela quente (schedulingservices/archive.py)
+FINISHED_STATUSES = ('Concluido', 'Cancelado')
+
 
 # Class de profissionais
 class Professional(models.Model):
@@ -39,13 +48,17 @@ class Professional(models.Model):
         return f"{self.name} - Salão: ({self.barbershop.name})"
     
 
+# Nenhum serviço passa de um dia: a busca de conflitos (booking.MAX_SCHEDULING_LENGTH) depende disso
+MAX_SERVICE_MINUTES = 24 * 60
+
+
 # Class de serviços
 class Service(models.Model):
     """Representa um serviço oferecido pelo salão."""
     barbershop = models.ForeignKey(BarberShop, on_delete=models.CASCADE, related_name='services', verbose_name='Salão')
     name = models.CharField('Nome', max_length=200)
     minutes_duration = models.IntegerField(
-        validators=[MinValueValidator(5)],
+        validators=[MinValueValidator(5), MaxValueValidator(MAX_SERVICE_MINUTES)],
         help_text='Tempo médio em minutos para execução do serviço',
     )
     value = models.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(0.00)], verbose_name='Valor')
@@ -60,6 +73,14 @@ class Service(models.Model):
         return self.name
 
 
+_NON_DIGITS = re.compile(r'\D')
+
+
+def normalize_phone(value):
+    """Mantém só os dígitos: '(11) 99999-0000' e '11999990000' viram o mesmo cliente."""
+    return _NON_DIGITS.sub('', str(value or ''))
+
+
 # Class de cliente
 class Client(models.Model):
     """Representa o cliente cadastrado para fins de CRM e agendamento."""
@@ -73,9 +94,19 @@ class Client(models.Model):
         verbose_name = 'Cliente'
         verbose_name_plural = "Clientes"
         unique_together = ('barbershop', 'phone_whatsap')
+        indexes = [
+            # Listagem paginada em ordem alfabética (keyset em name, id)
+            models.Index(fields=['barbershop', 'name'], name='client_shop_name_idx'),
+        ]
         
     def __str__(self):
         return self.name
+
+    def save(self, *args, **kwargs):
+        # O telefone identifica o cliente no salão: gravado sempre normalizado, venha de onde vier
+        # (API, link público, admin). A importação usa bulk_create e normaliza por conta própria.
+        self.phone_whatsap = normalize_phone(self.phone_whatsap)
+        super().save(*args, **kwargs)
     
 
 # Class de agendamento
@@ -108,4 +139,145 @@ class Scheduling(models.Model):
         verbose_name = 'Agendamento'
         verbose_name_plural = "Agendamentos"
         #unique_together = ['date_hour_init']
+        indexes = [
+            # Verificação de conflito e disponibilidade por profissional
+            models.Index(fields=['professional', 'date_hour_init', 'date_hour_end'], name='sched_prof_init_end_idx'),
+            # Inteligência (último 'Concluido') e listagens filtradas por status
+            models.Index(fields=['barbershop', 'status', 'date_hour_init'], name='sched_shop_status_init_idx'),
+            # Agenda do salão
+            models.Index(fields=['barbershop', 'date_hour_init'], name='sched_shop_init_idx'),
+        ]
         
+
+
+# Histórico frio: agendamentos finalizados antigos, movidos por `manage.py archive_schedulings`
+class SchedulingArchive(models.Model):
+    """
+    Mesmas colunas (e o mesmo id) de Scheduling. Conflitos, disponibilidade e a agenda só leem a tabela
+    quente; o export, a reconstrução do resumo diário e a das sugestões leem as duas.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    barbershop = models.ForeignKey(BarberShop, on_delete=models.CASCADE, related_name='archived_schedulings', verbose_name='Salão')
+    client = models.ForeignKey(Client, on_delete=models.PROTECT, related_name='archived_schedulings', verbose_name='Cliente')
+    service = models.ForeignKey(Service, on_delete=models.PROTECT, related_name='archived_schedulings', verbose_name='Serviço')
+    professional = models.ForeignKey(Professional, on_delete=models.PROTECT, related_name='archived_schedulings', verbose_name='Profissional')
+    date_hour_init = models.DateTimeField(verbose_name='Data de inicio')
+    date_hour_end = models.DateTimeField(verbose_name='Data de fim', blank=True, null=True)
+    status = models.CharField('Status', max_length=20, choices=STATUS_CHOICES)
+    initial_value = models.DecimalField(max_digits=10, decimal_places=2, default=0.00, verbose_name='Valor Inicial')
+    archived_at = models.DateTimeField('Arquivado em', default=timezone.now)
+
+    class Meta:
+        verbose_name = 'Agendamento arquivado'
+        verbose_name_plural = 'Agendamentos arquivados'
+        indexes = [
+            # Export por período e último 'Concluido' por cliente/serviço (sugestões)
+            models.Index(fields=['barbershop', 'date_hour_init'], name='sched_arch_shop_init_idx'),
+            models.Index(fields=['barbershop', 'client', 'service', 'status'], name='sched_arch_client_service_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.pk} ({self.status}, {self.date_hour_init:%Y-%m-%d})'
+
+
+# Tabela de resumo diário (relatórios e dashboards)
+class SchedulingDailyRollup(models.Model):
+    """
+    Totais de agendamentos por salão, profissional, serviço e dia (data local).
+    Mantida incrementalmente pelos signals (schedulingservices/rollups.py) e reconstruída/conferida com
+    `manage.py rebuild_daily_rollups`.
+    """
+    barbershop = models.ForeignKey(BarberShop, on_delete=models.CASCADE, related_name='daily_rollups', verbose_name='Salão')
+    professional = models.ForeignKey(Professional, on_delete=models.CASCADE, related_name='daily_rollups', verbose_name='Profissional')
+    service = models.ForeignKey(Service, on_delete=models.CASCADE, related_name='daily_rollups', verbose_name='Serviço')
+    day = models.DateField('Dia')
+    # Minutos ocupados por agendamentos não cancelados
+    booked_minutes = models.IntegerField('Minutos agendados', default=0)
+    completed_count = models.IntegerField('Concluídos', default=0)
+    cancelled_count = models.IntegerField('Cancelados', default=0)
+    # Soma do initial_value dos concluídos
+    revenue = models.DecimalField('Faturamento', max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        verbose_name = 'Resumo diário'
+        verbose_name_plural = 'Resumos diários'
+        unique_together = ('barbershop', 'professional', 'service', 'day')
+        indexes = [
+            models.Index(fields=['barbershop', 'day'], name='rollup_shop_day_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.day} - {self.professional_id}/{self.service_id}'
+
+
+WEEKDAY_CHOICES = (
+    (0, 'Segunda-feira'),
+    (1, 'Terça-feira'),
+    (2, 'Quarta-feira'),
+    (3, 'Quinta-feira'),
+    (4, 'Sexta-feira'),
+    (5, 'Sábado'),
+    (6, 'Domingo'),
+)
+
+
+# Expediente semanal
+class WorkingHours(models.Model):
+    """
+    Uma janela de trabalho em um dia da semana. Vários registros no mesmo dia formam os intervalos
+    (ex.: 09:00-12:00 e 13:00-18:00 = pausa para o almoço).
+
+    Sem profissional, vale para o salão todo; um profissional com registros próprios segue apenas
+    os seus (dias sem registro = folga). Salão sem nenhum registro: 09:00-18:00 todos os dias.
+    Compilado em janelas por profissional/dia e guardado no cache (schedulingservices/working_hours.py).
+    """
+    barbershop = models.ForeignKey(BarberShop, on_delete=models.CASCADE, related_name='working_hours', verbose_name='Salão')
+    professional = models.ForeignKey(
+        Professional, on_delete=models.CASCADE, related_name='working_hours', null=True, blank=True,
+        verbose_name='Profissional',
+    )
+    weekday = models.PositiveSmallIntegerField('Dia da semana', choices=WEEKDAY_CHOICES)
+    start = models.TimeField('Início')
+    end = models.TimeField('Fim')
+
+    class Meta:
+        verbose_name = 'Horário de trabalho'
+        verbose_name_plural = 'Horários de trabalho'
+        ordering = ('weekday', 'start')
+        constraints = [
+            models.CheckConstraint(condition=models.Q(start__lt=models.F('end')), name='working_hours_start_before_end'),
+        ]
+
+    def __str__(self):
+        return f'{self.get_weekday_display()} {self.start:%H:%M}-{self.end:%H:%M}'
+
+
+# Feriados, folgas e fechamentos pontuais
+class Closure(models.Model):
+    """
+    Período [início, fim) sem atendimento: feriado (dia inteiro), folga ou compromisso do profissional.
+    Sem profissional, fecha o salão todo. É descontado das janelas de trabalho dos dias que cobre.
+    """
+    barbershop = models.ForeignKey(BarberShop, on_delete=models.CASCADE, related_name='closures', verbose_name='Salão')
+    professional = models.ForeignKey(
+        Professional, on_delete=models.CASCADE, related_name='closures', null=True, blank=True,
+        verbose_name='Profissional',
+    )
+    start = models.DateTimeField('Início')
+    end = models.DateTimeField('Fim')
+    reason = models.CharField('Motivo', max_length=200, blank=True, default='')
+
+    class Meta:
+        verbose_name = 'Fechamento'
+        verbose_name_plural = 'Fechamentos'
+        ordering = ('start',)
+        constraints = [
+            models.CheckConstraint(condition=models.Q(start__lt=models.F('end')), name='closure_start_before_end'),
+        ]
+        indexes = [
+            models.Index(fields=['barbershop', 'start', 'end'], name='closure_shop_start_end_idx'),
+        ]
+
+    def __str__(self):
+        start, end = timezone.localtime(self.start), timezone.localtime(self.end)
+        return f'{start:%d/%m/%Y %H:%M} - {end:%d/%m/%Y %H:%M} {self.reason}'.strip()
@@ -1,17 +1,21 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
-from datetime import timedelta, datetime, time, date
-from django.shortcuts import get_object_or_404
+from rest_framework.exceptions import ValidationError
+from datetime import datetime
 from django.utils import timezone
-from django.db.models import Q
+from django.db.models import Prefetch
 
+from authentication import tenancy
+from project.routers import ReadReplicaMixin
 from authentication.models import BarberShop
-from schedulingservices.api.serializers import SchedulingSerializer, ServiceSerializer
-from .models import Client, Professional, Service, Scheduling
+from schedulingservices.api.serializers import SchedulingSerializer
+from .models import Client, Professional, Service, normalize_phone
+from . import availability_cache, catalog_cache
+from .availability import professionals_free_slots, services_free_slots
 
 
-class PublicSchedulingAPI(APIView):
+class PublicSchedulingAPI(ReadReplicaMixin, APIView):
     """
     API para clientes externos (não logados) visualizarem dados do salão e agendarem.
     Acesso filtrado pelo 'link_agendamento' (slug).
@@ -24,18 +28,21 @@ class PublicSchedulingAPI(APIView):
         """
         try:
             # 1. Encontra o Salão pelo slug (link_agendamento)
-            barbershop = BarberShop.objects.get(scheduling_link=link_slug, ative=True)
+            barbershop = tenancy.get_barbershop_for_slug(link_slug)
         except BarberShop.DoesNotExist:
             return Response({"detail": "Salão não encontrado ou inativo."}, status=status.HTTP_404_NOT_FOUND)
 
-        # 2. Busca todos os serviços ativos daquele salão
-        services = Service.objects.filter(barbershop=barbershop)
-        serializer = ServiceSerializer(services, many=True)
+        # 2. GET condicional: a versão do catálogo (uma leitura no cache) decide o ETag.
+        # Se o cliente já tem essa versão, responde 304 sem tocar no banco nem serializar nada.
+        version = catalog_cache.catalog_version(barbershop.id)
+        etag = catalog_cache.catalog_etag(barbershop.id, version, request.accepted_renderer.format)
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
 
-        return Response({
-            "barbershop_name": barbershop.name,
-            "services": serializer.data
-        })
+        if catalog_cache.etag_matches(request.headers.get('If-None-Match'), etag):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        # 3. Serviços ativos daquele salão: do cache, ou renderizados com prefetch na versão atual
+        return Response(catalog_cache.get_catalog(barbershop, version), headers=headers)
     
     # Próxima etapa: O método POST para criar o Agendamento
     def post(self, request, link_slug, format=None):
@@ -43,55 +50,72 @@ class PublicSchedulingAPI(APIView):
         Cria um novo agendamento para o cliente.
         """
         try:
-            barbershop = BarberShop.objects.get(link_agendamento=link_slug, ative=True)
+            barbershop = tenancy.get_barbershop_for_slug(link_slug)
         except BarberShop.DoesNotExist:
             return Response({"detail": "Salão não encontrado ou inativo."}, status=status.HTTP_404_NOT_FOUND)
 
-        data = request.data
-        
-        # 1. Encontra ou Cria o Cliente (Baseado no telefone/nome)
-        # Assume que o cliente fornece nome e telefone
-        client_data = {
-            'barbershop': barbershop,
-            'name': data.get('client_name'),
-            'phone_whatsap': data.get('client_phone'),
-            'email': data.get('client_email'),
-        }
-        
-        # Tenta encontrar cliente existente pelo telefone e salão
-        client, created = Client.objects.get_or_create(
-            barbershop=barbershop,
-            phone_whatsap=client_data['phone_whatsap'],
-            defaults=client_data # Usa estes dados se for criado
-        )
-        
-        # 2. Prepara os dados do Agendamento
-        scheduling_data = {
-            'client': client.id,
-            'service': data.get('service_id'),
-            'professional': data.get('professional_id'),
-            'date_hour_init': data.get('date_hour_init'),
-            # 'barbershop' será injetado abaixo
-        }
-        
-        # 3. Serialização e Validação
-        serializer = SchedulingSerializer(data=scheduling_data)
-        
-        if serializer.is_valid():
-            # Injeta o barbershop antes de salvar (segurança)
+        if not isinstance(request.data, dict):
+            return Response({"detail": "JSON inválido."}, status=status.HTTP_400_BAD_REQUEST)
+
+        payload, response_status = create_public_scheduling(barbershop, request.data)
+        return Response(payload, status=response_status)
+
+
+def create_public_scheduling(barbershop, data):
+    """
+    Agendamento feito pelo cliente no link público: (corpo da resposta, status HTTP).
+    Compartilhado pela view síncrona (DRF) e pela assíncrona (async_views.py).
+    """
+    # 1. Encontra ou Cria o Cliente (Baseado no telefone/nome)
+    # Assume que o cliente fornece nome e telefone
+    client_data = {
+        'barbershop': barbershop,
+        'name': data.get('client_name'),
+        'phone_whatsap': normalize_phone(data.get('client_phone')),
+        'email': data.get('client_email'),
+    }
+    if not client_data['phone_whatsap']:
+        return {"client_phone": ["Informe um telefone válido."]}, status.HTTP_400_BAD_REQUEST
+
+    # Tenta encontrar cliente existente pelo telefone (normalizado, como é gravado) e salão
+    client, created = Client.objects.get_or_create(
+        barbershop=barbershop,
+        phone_whatsap=client_data['phone_whatsap'],
+        defaults=client_data # Usa estes dados se for criado
+    )
+
+    # 2. Prepara os dados do Agendamento
+    scheduling_data = {
+        'client': client.id,
+        'service': data.get('service_id'),
+        'professional': data.get('professional_id'),
+        'date_hour_init': data.get('date_hour_init'),
+        # 'barbershop' será injetado abaixo
+    }
+
+    # 3. Serialização e Validação
+    serializer = SchedulingSerializer(data=scheduling_data)
+
+    if serializer.is_valid():
+        # Injeta o barbershop antes de salvar (segurança)
+        try:
             scheduling = serializer.save(barbershop=barbershop)
-            
-            # Envio de notificação (Lembrete de Email/WhatsApp - futura integração)
-            
-            return Response({
-                "detail": "Agendamento criado com sucesso.",
-                "scheduling_id": scheduling.id
-            }, status=status.HTTP_201_CREATED)
-        
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
-
-
-class PublicAvailableTimesAPI(APIView):
+        except ValidationError as exc:
+            # Conflito detectado na nova verificação, feita com o profissional travado
+            return exc.detail, status.HTTP_400_BAD_REQUEST
+
+        # Confirmação e lembrete (WhatsApp/email) já foram gravados na outbox, na transação do
+        # agendamento (notifications/signals.py); quem envia é o worker process_outbox
+
+        return {
+            "detail": "Agendamento criado com sucesso.",
+            "scheduling_id": scheduling.id
+        }, status.HTTP_201_CREATED
+
+    return serializer.errors, status.HTTP_400_BAD_REQUEST
+
+
+class PublicAvailableTimesAPI(ReadReplicaMixin, APIView):
     """
     Retorna os horários disponíveis para um profissional em uma data e serviço específicos.
     Endpoint: /api/v1/public/<slug>/available-times/?professional_id=X&service_id=Y&date=YYYY-MM-DD
@@ -100,87 +124,141 @@ class PublicAvailableTimesAPI(APIView):
     permission_classes = [permissions.AllowAny]
 
     def get(self, request, link_slug, format=None):
-        # 1. Obter e validar parâmetros (JSON ou Query Params)
+        # 1. Obter e validar parâmetros (Query Params): erros de formato são 400, recursos inexistentes 404
+        professional_id = request.query_params.get('professional_id')
+        service_id = request.query_params.get('service_id')
+        date_str = request.query_params.get('date')
+
+        if not all([professional_id, service_id, date_str]):
+            return Response({"detail": "professional_id, service_id e date são obrigatórios."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
         try:
-            barbershop = BarberShop.objects.get(scheduling_link=link_slug, ative=True)
-            
-            # Parâmetros esperados na URL:
-            professional_id = request.query_params.get('professional_id')
-            service_id = request.query_params.get('service_id')
-            date_str = request.query_params.get('date')
-
-            if not all([professional_id, service_id, date_str]):
-                return Response({"detail": "professional_id, service_id e date são obrigatórios."}, 
-                                status=status.HTTP_400_BAD_REQUEST)
-
-            professional = get_object_or_404(Professional, id=professional_id, barbershop=barbershop)
-            service = get_object_or_404(Service, id=service_id, barbershop=barbershop)
-            
             # Converte a string de data para objeto date
             target_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-            service_duration = service.minutes_duration
+        except ValueError as e:
+            return Response({"detail": f"Data inválida: {e}"}, status=status.HTTP_400_BAD_REQUEST)
 
-        except Exception as e:
-            # Captura erros de DataNotFound (404) ou conversão de data (ValueError)
-            return Response({"detail": f"Erro de validação ou recurso não encontrado: {e}"}, 
-                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            barbershop = tenancy.get_barbershop_for_slug(link_slug)
+        except BarberShop.DoesNotExist:
+            return Response({"detail": "Salão não encontrado ou inativo."}, status=status.HTTP_404_NOT_FOUND)
+        try:
+            professional = Professional.objects.get(id=professional_id, barbershop=barbershop, ative=True)
+            service = Service.objects.get(id=service_id, barbershop=barbershop)
+        except (Professional.DoesNotExist, Service.DoesNotExist, ValueError):
+            return Response({"detail": "Profissional ou serviço não encontrado."}, status=status.HTTP_404_NOT_FOUND)
+        service_duration = service.minutes_duration
+
+        # 2. Slots livres: servidos do cache por profissional/dia, calculados só quando o dia mudou
+        available_slots = availability_cache.get_slots(
+            professional.id, target_date, service_duration,
+            lambda: professionals_free_slots([professional.id], target_date, service_duration)[professional.id],
+        )
 
-        # 2. Definir Horário de Trabalho (MVP Simples: 9h às 18h)
-        # Importante: Usar a timezone correta
-        current_tz = timezone.get_current_timezone()
-        
-        # Horário de Início/Fim do dia de trabalho
-        start_time_of_day = time(9, 0)
-        end_time_of_day = time(18, 0)
-        
-        # Datetime completo do início do trabalho
-        start_datetime = datetime.combine(target_date, start_time_of_day, tzinfo=current_tz)
-        # Datetime do Fim do dia (para o loop)
-        end_datetime = datetime.combine(target_date, end_time_of_day, tzinfo=current_tz)
-
-        # 3. Buscar Agendamentos Ocupados
-        occupied_times = Scheduling.objects.filter(
-            professional=professional,
-            date_hour_init__date=target_date,
-            status__in=['Pendente', 'Confirmado'] # Apenas agendamentos que ocupam o tempo
-        ).order_by('date_hour_init').values('date_hour_init', 'date_hour_end')
-
-        # 4. Gerar e Filtrar Slots Livres
-        available_slots = []
-        current_slot_start = start_datetime
-        step = timedelta(minutes=service_duration) # Avança pelo tempo de duração do SERVIÇO
-
-        # Loop enquanto o slot atual (início) mais a duração do serviço não exceder o fim do dia
-        while current_slot_start + timedelta(minutes=service_duration) <= end_datetime:
-            slot_end = current_slot_start + timedelta(minutes=service_duration)
-            is_available = True
-            
-            # Verifica se o slot atual colide com qualquer agendamento existente
-            for occupied in occupied_times:
-                occupied_start = occupied['date_hour_init']
-                occupied_end = occupied['date_hour_end']
-                
-                # Regra de Conflito: O novo slot se sobrepõe a um agendamento existente
-                # Se (Novo Início < Fim Existente) E (Novo Fim > Início Existente) -> CONFLITO
-                if (current_slot_start < occupied_end) and (slot_end > occupied_start):
-                    is_available = False
-                    
-                    # Se há conflito, pulamos para o fim do agendamento ocupado.
-                    # Adicionamos um minuto para garantir que a próxima iteração seja após o término.
-                    current_slot_start = occupied_end + timedelta(minutes=1)
-                    break # Sai do loop 'occupied_times' e volta para o 'while' principal
-
-            if is_available:
-                # Se não houve conflito, adiciona o slot e avança o slot para o próximo passo
-                available_slots.append(current_slot_start.strftime('%H:%M'))
-                current_slot_start += step # Avança pelo tempo de duração do SERVIÇO
-            
-            # Se 'is_available' foi False, o 'current_slot_start' já foi avançado pelo 'break'.
-
-        # 5. Retorno
+        # 3. Retorno
         return Response({
             "professional_name": professional.name,
             "date": date_str,
             "service_duration_minutes": service_duration,
             "available_slots": available_slots
         })
+
+
+class PublicServiceAvailabilityAPI(ReadReplicaMixin, APIView):
+    """
+    Retorna, em uma única chamada, os horários disponíveis de TODOS os profissionais aptos a um serviço.
+    Endpoint: /api/v1/public/<slug>/service-availability/?service_id=Y&date=YYYY-MM-DD
+    """
+
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, link_slug, format=None):
+        # 1. Obter e validar parâmetros
+        service_id = request.query_params.get('service_id')
+        date_str = request.query_params.get('date')
+
+        if not all([service_id, date_str]):
+            return Response({"detail": "service_id e date são obrigatórios."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            target_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+        except ValueError as e:
+            return Response({"detail": f"Data inválida: {e}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            barbershop = tenancy.get_barbershop_for_slug(link_slug)
+            service = Service.objects.get(id=service_id, barbershop=barbershop)
+        except (BarberShop.DoesNotExist, Service.DoesNotExist, ValueError):
+            return Response({"detail": "Salão ou serviço não encontrado."}, status=status.HTTP_404_NOT_FOUND)
+
+        professionals = list(service.professionals_aptos.filter(ative=True).order_by('name'))
+
+        # 2. Slots do cache; os profissionais sem cache são calculados juntos, com uma única consulta
+        slots_by_professional = availability_cache.get_many_slots(
+            [professional.id for professional in professionals], target_date, service.minutes_duration,
+            lambda missing_ids: professionals_free_slots(missing_ids, target_date, service.minutes_duration),
+        )
+
+        results = [{
+            "professional_id": professional.id,
+            "professional_name": professional.name,
+            "available_slots": slots_by_professional[professional.id],
+        } for professional in professionals]
+
+        return Response({
+            "service_id": service.id,
+            "service_name": service.name,
+            "date": date_str,
+            "service_duration_minutes": service.minutes_duration,
+            "professionals": results,
+        })
+
+
+class PublicServicesFitAPI(ReadReplicaMixin, APIView):
+    """
+    "Quais serviços cabem onde": horários livres de TODOS os serviços do salão, por profissional apto.
+    Endpoint: /api/v1/public/<slug>/services-fit/?date=YYYY-MM-DD (padrão: hoje)
+    """
+
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, link_slug, format=None):
+        date_str = request.query_params.get('date')
+        try:
+            target_date = datetime.strptime(date_str, '%Y-%m-%d').date() if date_str else timezone.localdate()
+        except ValueError as e:
+            return Response({"detail": f"Data inválida: {e}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            barbershop = tenancy.get_barbershop_for_slug(link_slug)
+        except BarberShop.DoesNotExist:
+            return Response({"detail": "Salão não encontrado ou inativo."}, status=status.HTTP_404_NOT_FOUND)
+
+        services = list(
+            Service.objects.filter(barbershop=barbershop).order_by('name').prefetch_related(Prefetch(
+                'professionals_aptos', queryset=Professional.objects.filter(ative=True).order_by('name'),
+            ))
+        )
+
+        # Um bitmap livre por profissional/dia (cache) atende todos os serviços, sem uma consulta por serviço
+        slots = services_free_slots([
+            (service.id, service.minutes_duration, [professional.id for professional in service.professionals_aptos.all()])
+            for service in services
+        ], target_date)
+
+        return Response({
+            "date": target_date.isoformat(),
+            "services": [{
+                "service_id": service.id,
+                "service_name": service.name,
+                "service_duration_minutes": service.minutes_duration,
+                "professionals": [{
+                    "professional_id": professional.id,
+                    "professional_name": professional.name,
+                    "available_slots": slots[service.id][professional.id],
+                } for professional in service.professionals_aptos.all()],
+            } for service in services],
+        })
+
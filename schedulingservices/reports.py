@@ -0,0 +1,139 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Count, DateField, DecimalField, DurationField, F, Q, Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+
+from .dates import day_bounds
+from .models import Scheduling, SchedulingDailyRollup
+
+
+# Agrupamentos aceitos -> colunas devolvidas (o nome vem do JOIN, na mesma consulta)
+REPORT_GROUPS = {
+    'professional': ('professional_id', 'professional__name'),
+    'service': ('service_id', 'service__name'),
+}
+REPORT_PERIODS = ('day', 'week', 'month')
+
+# Só atendimentos concluídos geram faturamento e comissão
+REVENUE_STATUS = 'Concluido'
+CANCELLED_STATUS = 'Cancelado'
+
+_CENTS = Decimal('0.01')
+
+
+def _money():
+    return DecimalField(max_digits=14, decimal_places=2)
+
+
+def _rollup_metrics():
+    return {
+        'total_count': Sum('completed_count'),
+        'total_revenue': Sum('revenue', output_field=_money()),
+        # O percentual é o atual do profissional, igual ao cálculo sobre os agendamentos
+        'total_commission': Sum(F('revenue') * F('professional__commission_standard'), output_field=_money()),
+        'total_booked_minutes': Sum('booked_minutes'),
+        'total_cancelled_count': Sum('cancelled_count'),
+    }
+
+
+def _raw_metrics():
+    completed = Q(status=REVENUE_STATUS)
+    return {
+        'total_count': Count('id', filter=completed),
+        'total_revenue': Sum('initial_value', filter=completed, output_field=_money()),
+        'total_commission': Sum(
+            F('initial_value') * F('professional__commission_standard'), filter=completed, output_field=_money(),
+        ),
+        'total_booked_minutes': Sum(
+            F('date_hour_end') - F('date_hour_init'), filter=~Q(status=CANCELLED_STATUS),
+            output_field=DurationField(),
+        ),
+        'total_cancelled_count': Count('id', filter=Q(status=CANCELLED_STATUS)),
+    }
+
+
+def _truncate(day, period):
+    if period == 'week':
+        return day - timedelta(days=day.weekday())
+    if period == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def _grouped(queryset, fields, metrics):
+    # As métricas se chamam total_*: no resumo, 'revenue' etc. já são nomes de colunas
+    if not fields:
+        return [queryset.aggregate(**metrics)]
+    return queryset.values(*fields).annotate(**metrics).order_by()
+
+
+def _empty():
+    return {'count': 0, 'revenue': Decimal('0'), 'commission': Decimal('0'), 'booked_minutes': 0, 'cancelled_count': 0}
+
+
+def _accumulate(target, row, prefix='total_'):
+    booked = row[f'{prefix}booked_minutes'] or 0
+    if isinstance(booked, timedelta):
+        booked = int(booked.total_seconds() // 60)
+
+    target['count'] += row[f'{prefix}count'] or 0
+    target['revenue'] += row[f'{prefix}revenue'] or 0
+    target['commission'] += row[f'{prefix}commission'] or 0
+    target['booked_minutes'] += booked
+    target['cancelled_count'] += row[f'{prefix}cancelled_count'] or 0
+
+
+def _merge(groups, rows, fields, prefix=()):
+    for row in rows:
+        key = prefix + tuple(row[field] for field in fields)
+        _accumulate(groups.setdefault(key, _empty()), row)
+
+
+def _finish(values):
+    values['revenue'] = values['revenue'].quantize(_CENTS)
+    values['commission'] = values['commission'].quantize(_CENTS)
+    values['average_ticket'] = (values['revenue'] / values['count']).quantize(_CENTS) if values['count'] else None
+    return values
+
+
+def revenue_report(barbershop, date_from, date_to, group_by=(), period=None):
+    """
+    Faturamento, quantidade, ticket médio e comissão dos atendimentos concluídos em [date_from, date_to],
+    mais a ocupação (minutos agendados) e os cancelamentos.
+
+    Os demais dias vêm do resumo diário (SchedulingDailyRollup): uma linha por profissional/serviço/dia,
+    em vez de uma por agendamento. Só o dia de hoje, que ainda está mudando, é agregado direto dos
+    agendamentos. A soma é feita no banco (GROUP BY); em Python só se juntam os grupos das duas fontes.
+    """
+    fields = [field for group in group_by for field in REPORT_GROUPS[group]]
+    key_fields = (['period'] if period else []) + fields
+    today = timezone.localdate()
+    groups = {}
+
+    rollup = SchedulingDailyRollup.objects.filter(
+        barbershop=barbershop, day__gte=date_from, day__lte=date_to,
+    ).exclude(day=today)
+    if period:
+        rollup = rollup.annotate(period=Trunc('day', period, output_field=DateField()))
+    _merge(groups, _grouped(rollup, key_fields, _rollup_metrics()), key_fields)
+
+    if date_from <= today <= date_to:
+        start, end = day_bounds(today)
+        raw = Scheduling.objects.filter(barbershop=barbershop, date_hour_init__gte=start, date_hour_init__lt=end)
+        # Hoje é um único dia: o período é calculado aqui, sem Trunc por linha
+        prefix = (_truncate(today, period),) if period else ()
+        _merge(groups, _grouped(raw, fields, _raw_metrics()), fields, prefix)
+
+    totals = _empty()
+    for values in groups.values():
+        _accumulate(totals, values, prefix='')
+
+    report = {'date_from': date_from, 'date_to': date_to, 'totals': _finish(totals)}
+    if key_fields:
+        # Grupos só com agendamentos pendentes/confirmados também aparecem (ocupação), com count 0
+        report['results'] = [
+            {**dict(zip(key_fields, key)), **_finish(values)} for key, values in sorted(groups.items())
+        ]
+    return report
@@ -0,0 +1,218 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, DurationField, F, Q, Sum, Value, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Scheduling, SchedulingArchive, SchedulingDailyRollup
+
+
+COMPLETED = 'Concluido'
+CANCELLED = 'Cancelado'
+
+ROLLUP_FIELDS = ('booked_minutes', 'completed_count', 'cancelled_count', 'revenue')
+
+_ZERO = {'booked_minutes': 0, 'completed_count': 0, 'cancelled_count': 0, 'revenue': Decimal('0.00')}
+
+
+def _key(barbershop_id, professional_id, service_id, date_hour_init):
+    return barbershop_id, professional_id, service_id, timezone.localdate(date_hour_init)
+
+
+def contribution(data):
+    """
+    Quanto um agendamento soma na linha do seu dia: (chave, valores).
+    data é um dict com os campos do agendamento (o mesmo formato de instance._previous).
+    """
+    status = data['status']
+    init, end = data['date_hour_init'], data.get('date_hour_end')
+    minutes = int((end - init).total_seconds() // 60) if end and status != CANCELLED else 0
+    values = {
+        'booked_minutes': minutes,
+        'completed_count': int(status == COMPLETED),
+        'cancelled_count': int(status == CANCELLED),
+        'revenue': Decimal(str(data['initial_value'])) if status == COMPLETED else Decimal('0.00'),
+    }
+    return _key(data['barbershop_id'], data['professional_id'], data['service_id'], init), values
+
+
+def snapshot(instance):
+    """Campos do agendamento usados pelo resumo, no formato de contribution()."""
+    return {
+        'barbershop_id': instance.barbershop_id,
+        'professional_id': instance.professional_id,
+        'service_id': instance.service_id,
+        'date_hour_init': instance.date_hour_init,
+        'date_hour_end': instance.date_hour_end,
+        'status': instance.status,
+        'initial_value': instance.initial_value,
+    }
+
+
+def _add(deltas, data, sign):
+    key, values = contribution(data)
+    for field, value in values.items():
+        deltas[key][field] += sign * value
+
+
+def _existing(keys):
+    """{chave: pk} das linhas do resumo que já existem, em uma consulta."""
+    rows = SchedulingDailyRollup.objects.filter(
+        barbershop_id__in={key[0] for key in keys},
+        professional_id__in={key[1] for key in keys},
+        service_id__in={key[2] for key in keys},
+        day__in={key[3] for key in keys},
+    ).values_list('pk', 'barbershop_id', 'professional_id', 'service_id', 'day')
+    keys = set(keys)
+    return {tuple(row[1:]): row[0] for row in rows if tuple(row[1:]) in keys}
+
+
+def _increment(deltas_by_pk):
+    """UPDATE ... SET campo = campo + delta (atômico no banco), um único comando para todas as linhas."""
+    if len(deltas_by_pk) == 1:
+        [(pk, values)] = deltas_by_pk.items()
+        SchedulingDailyRollup.objects.filter(pk=pk).update(**{field: F(field) + value for field, value in values.items()})
+        return
+
+    increments = {}
+    for field in ROLLUP_FIELDS:
+        output_field = SchedulingDailyRollup._meta.get_field(field)
+        increments[field] = F(field) + Case(
+            *(When(pk=pk, then=Value(values[field])) for pk, values in deltas_by_pk.items()),
+            default=Value(_ZERO[field]), output_field=output_field,
+        )
+    SchedulingDailyRollup.objects.filter(pk__in=deltas_by_pk).update(**increments)
+
+
+def apply(deltas):
+    """
+    Soma os deltas {chave: valores} nas linhas do resumo, com um número fixo de consultas por lote:
+    uma leitura das linhas existentes, um INSERT das que faltam e um UPDATE com os incrementos.
+    O incremento é feito pelo banco, então gravações concorrentes no mesmo dia não perdem valores.
+    """
+    deltas = {key: values for key, values in deltas.items() if any(values.values())}
+    if not deltas:
+        return
+
+    existing = _existing(deltas)
+    missing = [key for key in deltas if key not in existing]
+    if missing:
+        try:
+            with transaction.atomic():
+                SchedulingDailyRollup.objects.bulk_create([
+                    SchedulingDailyRollup(
+                        barbershop_id=key[0], professional_id=key[1], service_id=key[2], day=key[3], **deltas[key],
+                    )
+                    for key in missing
+                ])
+        except IntegrityError:
+            # Outra transação criou alguma das linhas entre a leitura e o INSERT: recomeça
+            return apply(deltas)
+
+    if existing:
+        _increment({pk: deltas[key] for key, pk in existing.items()})
+
+
+def record_save(instance, previous):
+    """Criação, mudança de status, reagendamento: tira a contribuição antiga e soma a nova."""
+    deltas = defaultdict(lambda: dict(_ZERO))
+    if previous:
+        _add(deltas, previous, -1)
+    _add(deltas, snapshot(instance), 1)
+    apply(deltas)
+
+
+def record_delete(instance):
+    deltas = defaultdict(lambda: dict(_ZERO))
+    _add(deltas, snapshot(instance), -1)
+    apply(deltas)
+
+
+def record_created(schedulings):
+    """Para bulk_create (que não dispara signals): agrega o lote por dia antes de gravar."""
+    deltas = defaultdict(lambda: dict(_ZERO))
+    for scheduling in schedulings:
+        _add(deltas, snapshot(scheduling), 1)
+    apply(deltas)
+
+
+def expected(barbershop_id=None):
+    """
+    Resumo calculado do zero a partir dos agendamentos (tabela quente e arquivo), agregado pelo banco:
+    {chave: valores}.
+    """
+    totals = defaultdict(lambda: dict(_ZERO))
+    for model in (Scheduling, SchedulingArchive):
+        queryset = model.objects.all()
+        if barbershop_id:
+            queryset = queryset.filter(barbershop_id=barbershop_id)
+
+        rows = queryset.annotate(day=TruncDate('date_hour_init')).values(
+            'barbershop_id', 'professional_id', 'service_id', 'day',
+        ).annotate(
+            booked=Sum(F('date_hour_end') - F('date_hour_init'), filter=~Q(status=CANCELLED), output_field=DurationField()),
+            completed_count=Count('id', filter=Q(status=COMPLETED)),
+            cancelled_count=Count('id', filter=Q(status=CANCELLED)),
+            revenue=Sum('initial_value', filter=Q(status=COMPLETED)),
+        ).order_by()
+
+        for row in rows.iterator():
+            booked = row['booked']
+            values = totals[(row['barbershop_id'], row['professional_id'], row['service_id'], row['day'])]
+            values['booked_minutes'] += int(booked.total_seconds() // 60) if booked else 0
+            values['completed_count'] += row['completed_count']
+            values['cancelled_count'] += row['cancelled_count']
+            values['revenue'] += row['revenue'] or Decimal('0')
+
+    result = {}
+    for key, values in totals.items():
+        values['revenue'] = values['revenue'].quantize(Decimal('0.01'))
+        if any(values.values()):
+            result[key] = values
+    return result
+
+
+def current(barbershop_id=None):
+    """Linhas gravadas no resumo (ignorando as que zeraram): {chave: valores}."""
+    queryset = SchedulingDailyRollup.objects.exclude(
+        booked_minutes=0, completed_count=0, cancelled_count=0, revenue=0,
+    )
+    if barbershop_id:
+        queryset = queryset.filter(barbershop_id=barbershop_id)
+
+    return {
+        (row['barbershop_id'], row['professional_id'], row['service_id'], row['day']):
+            {field: row[field] for field in ROLLUP_FIELDS}
+        for row in queryset.values('barbershop_id', 'professional_id', 'service_id', 'day', *ROLLUP_FIELDS).iterator()
+    }
+
+
+def verify(barbershop_id=None):
+    """Diferenças entre o resumo gravado e o recalculado: [(chave, gravado, esperado)]."""
+    stored, computed = current(barbershop_id), expected(barbershop_id)
+    return [
+        (key, stored.get(key), computed.get(key))
+        for key in sorted(set(stored) | set(computed), key=str)
+        if stored.get(key) != computed.get(key)
+    ]
+
+
+def rebuild(barbershop_id=None, batch_size=1000):
+    """Apaga e recalcula o resumo (todo ou de um salão). Retorna o número de linhas gravadas."""
+    with transaction.atomic():
+        rows = [
+            SchedulingDailyRollup(
+                barbershop_id=key[0], professional_id=key[1], service_id=key[2], day=key[3], **values,
+            )
+            for key, values in expected(barbershop_id).items()
+        ]
+
+        existing = SchedulingDailyRollup.objects.all()
+        if barbershop_id:
+            existing = existing.filter(barbershop_id=barbershop_id)
+        existing.delete()
+        SchedulingDailyRollup.objects.bulk_create(rows, batch_size=batch_size)
+
+    return len(rows)
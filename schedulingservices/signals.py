@@ -0,0 +1,159 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from authentication.models import BarberShop
+
+from . import archive, availability_cache, catalog_cache, rollups
+from .models import Closure, Professional, Scheduling, Service, WorkingHours
+
+
+# Enviado por booking.bulk_book dentro da transação, depois do bulk_create (que não dispara post_save).
+# Argumento: schedulings, a lista de agendamentos criados (já com pk).
+schedulings_bulk_created = Signal()
+
+# --- Agendamentos: invalidam apenas o dia do profissional afetado ---
+
+def invalidate_days_on_commit(days):
+    """
+    Incrementa as versões dos dias {(professional_id, data)} só depois do COMMIT. Dentro da transação,
+    um leitor concorrente pegaria a versão nova, recalcularia os slots sem a escrita (ainda não visível)
+    e os guardaria sob essa versão: o agendamento ficaria invisível até a próxima invalidação.
+    Fora de uma transação, on_commit executa na hora.
+    """
+    def invalidate():
+        for professional_id, target_date in days:
+            availability_cache.invalidate_day(professional_id, target_date)
+
+    transaction.on_commit(invalidate)
+
+
+@receiver(pre_save, sender=Scheduling)
+def remember_previous_scheduling(sender, instance, **kwargs):
+    # Guarda o estado anterior (uma consulta, só em updates) para os receivers de post_save:
+    # invalidar também o dia antigo em caso de reagendamento, detectar mudança de status etc.
+    instance._previous = None
+    if instance.pk:
+        instance._previous = Scheduling.objects.filter(pk=instance.pk).values(
+            'barbershop_id', 'client_id', 'service_id', 'professional_id', 'date_hour_init', 'date_hour_end',
+            'status', 'initial_value',
+        ).first()
+
+
+@receiver(post_save, sender=Scheduling)
+def invalidate_availability_on_save(sender, instance, **kwargs):
+    days = {(instance.professional_id, timezone.localdate(instance.date_hour_init))}
+
+    previous = getattr(instance, '_previous', None)
+    if previous:
+        days.add((previous['professional_id'], timezone.localdate(previous['date_hour_init'])))
+
+    invalidate_days_on_commit(days)
+
+
+@receiver(post_delete, sender=Scheduling)
+def invalidate_availability_on_delete(sender, instance, **kwargs):
+    if archive.in_progress():
+        return  # Arquivados são antigos e finalizados: não ocupavam horário nenhum
+    invalidate_days_on_commit({(instance.professional_id, timezone.localdate(instance.date_hour_init))})
+
+
+# --- Resumo diário: soma a contribuição nova e desconta a antiga ---
+
+@receiver(post_save, sender=Scheduling)
+def update_rollup_on_save(sender, instance, **kwargs):
+    rollups.record_save(instance, getattr(instance, '_previous', None))
+
+
+@receiver(post_delete, sender=Scheduling)
+def update_rollup_on_delete(sender, instance, **kwargs):
+    # Arquivar não muda o histórico: o agendamento continua contando no resumo
+    if not archive.in_progress():
+        rollups.record_delete(instance)
+
+
+# --- Profissionais: ativar/desativar muda a disponibilidade de todos os dias ---
+
+@receiver(pre_save, sender=Professional)
+def remember_previous_professional(sender, instance, **kwargs):
+    instance._previous_ative = None
+    if instance.pk:
+        instance._previous_ative = Professional.objects.filter(pk=instance.pk).values_list('ative', flat=True).first()
+
+
+@receiver(post_save, sender=Professional)
+def invalidate_availability_on_professional_change(sender, instance, created, **kwargs):
+    if not created and getattr(instance, '_previous_ative', None) != instance.ative:
+        invalidate_professional_on_commit(instance.pk)
+
+
+@receiver(post_delete, sender=Professional)
+def invalidate_availability_on_professional_delete(sender, instance, **kwargs):
+    invalidate_professional_on_commit(instance.pk)
+
+
+def invalidate_professional_on_commit(professional_id):
+    # Depois do COMMIT, como em invalidate_days_on_commit
+    transaction.on_commit(lambda: availability_cache.invalidate_professional(professional_id))
+
+
+# --- Expediente e fechamentos: as janelas compiladas (e os slots) dos profissionais afetados mudam ---
+
+@receiver(pre_save, sender=WorkingHours)
+@receiver(pre_save, sender=Closure)
+def remember_previous_rule_owner(sender, instance, **kwargs):
+    # Uma regra que troca de dono (salão <-> profissional) afeta também o anterior
+    instance._previous_professional_ids = set()
+    if instance.pk:
+        instance._previous_professional_ids = set(
+            sender.objects.filter(pk=instance.pk).values_list('professional_id', flat=True)
+        )
+
+
+@receiver(post_save, sender=WorkingHours)
+@receiver(post_delete, sender=WorkingHours)
+@receiver(post_save, sender=Closure)
+@receiver(post_delete, sender=Closure)
+def invalidate_availability_on_rule_change(sender, instance, **kwargs):
+    owners = {instance.professional_id} | getattr(instance, '_previous_professional_ids', set())
+    if None in owners:
+        # Regra do salão: vale para todos os profissionais
+        owners = set(Professional.objects.filter(barbershop_id=instance.barbershop_id).values_list('pk', flat=True))
+
+    def invalidate():
+        for professional_id in owners:
+            availability_cache.invalidate_professional(professional_id)
+
+    # Depois do COMMIT, como em invalidate_days_on_commit
+    transaction.on_commit(invalidate)
+
+
+# --- Catálogo público: qualquer mudança em serviços, profissionais ou no salão gera nova versão ---
+
+def invalidate_catalog_on_commit(barbershop_id):
+    # Depois do COMMIT, pelo mesmo motivo de invalidate_days_on_commit: o catálogo renderizado
+    # sob a versão nova precisa enxergar a escrita
+    transaction.on_commit(lambda: catalog_cache.invalidate(barbershop_id))
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+@receiver(post_save, sender=Professional)
+@receiver(post_delete, sender=Professional)
+def invalidate_catalog(sender, instance, **kwargs):
+    invalidate_catalog_on_commit(instance.barbershop_id)
+
+
+@receiver(m2m_changed, sender=Service.professionals_aptos.through)
+def invalidate_catalog_on_professionals_change(sender, instance, action, **kwargs):
+    # instance é o Service (lado direto) ou o Professional (lado reverso); ambos pertencem ao salão
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_catalog_on_commit(instance.barbershop_id)
+
+
+@receiver(post_save, sender=BarberShop)
+def invalidate_catalog_on_barbershop_change(sender, instance, created, **kwargs):
+    # O nome do salão aparece no catálogo
+    if not created:
+        invalidate_catalog_on_commit(instance.pk)
@@ -1,3 +1,1706 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime, time as clock, timedelta
+from decimal import Decimal
+from unittest import skipUnless
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from authentication import tenancy
+from authentication.models import BarberShop
+from intelligence.models import RescheduleSuggestion
+from intelligence.suggestions import rebuild as rebuild_suggestions
+from notifications.models import OutboxMessage
+from project import metrics, routers
+from schedulingservices import availability_cache, day_bitmap, rollups
+from schedulingservices.api.viewsets import SchedulingViewSet
+from schedulingservices.archive import archivable
+from schedulingservices.availability import free_slots, merge_intervals, occupied_queryset
+from schedulingservices.booking import conflicting_schedulings
+from schedulingservices.dates import day_bounds
+from schedulingservices.importers import import_clients
+from schedulingservices.models import (
+    Client, Closure, Professional, Scheduling, SchedulingArchive, SchedulingDailyRollup, Service, WorkingHours,
+)
+from schedulingservices.working_hours import subtract
+
+
+logger = logging.getLogger(__name__)
+
+
+def reset_caches():
+    """Os caches sobrevivem ao rollback entre testes (que não dispara signals): começa sempre do zero."""
+    cache.clear()
+    tenancy.clear()
+
+
+def at(hour, minute=0, day=None):
+    """Atalho para criar datetimes aware no fuso do projeto."""
+    day = day or timezone.localdate()
+    return datetime.combine(day, datetime.min.time(), tzinfo=timezone.get_current_timezone()) + timedelta(
+        hours=hour, minutes=minute
+    )
+
+
+class AvailabilityEngineTests(SimpleTestCase):
+
+    def test_empty_day_returns_full_grid(self):
+        slots = free_slots([], [(at(9), at(11))], timedelta(minutes=30))
+        self.assertEqual(slots, [at(9), at(9, 30), at(10), at(10, 30)])
+
+    def test_slots_stay_on_grid_after_busy_interval(self):
+        # Agendamento 9:10-9:40 -> o próximo slot deve ser 10:00 (grade de 30 min), e não 9:41
+        busy = [(at(9, 10), at(9, 40))]
+        slots = free_slots(busy, [(at(9), at(11))], timedelta(minutes=30))
+        self.assertEqual(slots, [at(10), at(10, 30)])
+
+    def test_overlapping_busy_intervals_are_merged(self):
+        busy = [(at(9), at(10)), (at(9, 30), at(10, 30)), (at(10, 30), at(11))]
+        self.assertEqual(merge_intervals(busy), [[at(9), at(11)]])
+
+    def test_multiple_windows(self):
+        busy = [(at(11), at(11, 30))]
+        windows = [(at(9), at(12)), (at(13), at(14))]
+        slots = free_slots(busy, windows, timedelta(minutes=60))
+        self.assertEqual(slots, [at(9), at(10), at(13)])
+
+    def test_custom_step(self):
+        busy = [(at(9), at(9, 15))]
+        slots = free_slots(busy, [(at(9), at(10))], timedelta(minutes=30), step=timedelta(minutes=15))
+        self.assertEqual(slots, [at(9, 15), at(9, 30)])
+
+    def test_dense_day(self):
+        # 60 agendamentos de 5 minutos intercalados com 5 minutos livres
+        busy = [(at(9, m), at(9, m + 5)) for m in range(0, 600, 10)]
+        slots = free_slots(busy, [(at(9), at(19))], timedelta(minutes=5))
+        self.assertEqual(len(slots), 60)
+        self.assertTrue(all(slot.minute % 10 == 5 for slot in slots))
+
+
+class DayBitmapTests(SimpleTestCase):
+
+    def minutes(self, moment):
+        return moment.hour * 60 + moment.minute
+
+    def test_fitting_starts_is_a_sliding_and(self):
+        # Células livres 0-3 e 5-11: cabem 3 células a partir de 0, 1, 5, 6, 7, 8 e 9
+        mask = 0b111111101111
+        self.assertEqual(day_bitmap.fitting_starts(mask, 3), 0b1111100011)
+        self.assertEqual(day_bitmap.fitting_starts(mask, 1), mask)
+        self.assertEqual(day_bitmap.fitting_starts(mask, 8), 0)
+
+    def test_matches_the_sweep_line_on_random_days(self):
+        rng = random.Random(7)
+        windows = [(at(9), at(12)), (at(13), at(18, 30))]
+        window_minutes = [(self.minutes(start), self.minutes(end)) for start, end in windows]
+
+        for _ in range(200):
+            busy = []
+            for _ in range(rng.randrange(8)):
+                # Agendamentos em minutos quaisquer, não só múltiplos de 5
+                start = at(8, rng.randrange(11 * 60))
+                busy.append((start, start + timedelta(minutes=rng.randrange(5, 90))))
+            busy.sort()
+            mask = day_bitmap.free_mask(
+                window_minutes, [(self.minutes(start), self.minutes(end)) for start, end in busy],
+            )
+
+            for duration in (15, 30, 45, 60, 90):
+                expected = [slot.strftime('%H:%M') for slot in free_slots(busy, windows, timedelta(minutes=duration))]
+                self.assertEqual(day_bitmap.slots(mask, window_minutes, duration), expected)
+
+    def test_alignment_check(self):
+        self.assertTrue(day_bitmap.is_aligned(((540, 1080),), 45))
+        self.assertFalse(day_bitmap.is_aligned(((540, 1080),), 42))
+        self.assertFalse(day_bitmap.is_aligned(((542, 1080),), 45))
+
+
+class PublicAvailableTimesAPITests(TestCase):
+
+    def setUp(self):
+        reset_caches()
+        owner = User.objects.create_user(username='dono@teste.com', password='senha-forte-123')
+        self.barbershop = BarberShop.objects.create(
+            name='Salão Teste', email='dono@teste.com', owner=owner, scheduling_link='salao-teste'
+        )
+        self.professional = Professional.objects.create(barbershop=self.barbershop, name='João', phone='1')
+        self.service = Service.objects.create(barbershop=self.barbershop, name='Corte', minutes_duration=30, value=40)
+        self.service.professionals_aptos.add(self.professional)
+        self.client_obj = Client.objects.create(barbershop=self.barbershop, name='Maria', phone_whatsap='11999990000')
+        self.day = timezone.localdate() + timedelta(days=1)
+        self.api = APIClient()
+
+    def test_available_times_skip_booked_slots(self):
+        Scheduling.objects.create(
+            barbershop=self.barbershop, client=self.client_obj, service=self.service,
+            professional=self.professional, date_hour_init=at(9, 10, self.day),
+        )
+
+        response = self.api.get('/api/v1/public/salao-teste/available-times/', {
+            'professional_id': self.professional.id,
+            'service_id': self.service.id,
+            'date': self.day.isoformat(),
+        })
+
+        self.assertEqual(response.status_code, 200)
+        slots = response.data['available_slots']
+        self.assertEqual(slots[:2], ['10:00', '10:30'])
+        self.assertEqual(slots[-1], '17:30')
+        self.assertEqual(len(slots), 16)
+
+
+class PublicServiceAvailabilityAPITests(TestCase):
+
+    def setUp(self):
+        reset_caches()
+        owner = User.objects.create_user(username='dono@teste.com', password='senha-forte-123')
+        self.barbershop = BarberShop.objects.create(
+            name='Salão Teste', email='dono@teste.com', owner=owner, scheduling_link='salao-teste'
+        )
+        self.service = Service.objects.create(barbershop=self.barbershop, name='Corte', minutes_duration=60, value=40)
+        self.professionals = [
+            Professional.objects.create(barbershop=self.barbershop, name=f'Profissional {i}', phone=str(i))
+            for i in range(6)
+        ]
+        self.service.professionals_aptos.set(self.professionals)
+        self.client_obj = Client.objects.create(barbershop=self.barbershop, name='Maria', phone_whatsap='11999990000')
+        self.day = timezone.localdate() + timedelta(days=1)
+        self.api = APIClient()
+
+    def test_returns_slots_for_every_professional_with_constant_queries(self):
+        busy = self.professionals[0]
+        Scheduling.objects.create(
+            barbershop=self.barbershop, client=self.client_obj, service=self.service,
+            professional=busy, date_hour_init=at(9, 0, self.day),
+        )
+
+        # Salão + serviço + profissionais aptos + compilação das regras de expediente (salão dos profissionais,
+        # horários e fechamentos; uma vez por profissional/dia) + uma única consulta de agendamentos
+        with self.assertNumQueries(7):
+            response = self.api.get('/api/v1/public/salao-teste/service-availability/', {
+                'service_id': self.service.id,
+                'date': self.day.isoformat(),
+            })
+
+        self.assertEqual(response.status_code, 200)
+        by_professional = {item['professional_id']: item['available_slots'] for item in response.data['professionals']}
+        self.assertEqual(len(by_professional), 6)
+        self.assertNotIn('09:00', by_professional[busy.id])
+        self.assertIn('09:00', by_professional[self.professionals[1].id])
+
+        # Segunda leitura do mesmo dia: salão vem do cache de tenant e nada é lido da tabela de agendamentos
+        with self.assertNumQueries(2):
+            self.api.get('/api/v1/public/salao-teste/service-availability/', {
+                'service_id': self.service.id,
+                'date': self.day.isoformat(),
+            })
+
+        # Uma reserva invalida os slots do dia, mas as janelas de trabalho compiladas continuam no cache
+        with self.captureOnCommitCallbacks(execute=True):
+            Scheduling.objects.create(
+                barbershop=self.barbershop, client=self.client_obj, service=self.service,
+                professional=self.professionals[1], date_hour_init=at(9, 0, self.day),
+            )
+        with self.assertNumQueries(3):
+            self.api.get('/api/v1/public/salao-teste/service-availability/', {
+                'service_id': self.service.id,
+                'date': self.day.isoformat(),
+            })
+
+    def test_unknown_service_returns_404(self):
+        response = self.api.get('/api/v1/public/salao-teste/service-availability/', {
+            'service_id': 999, 'date': self.day.isoformat(),
+        })
+        self.assertEqual(response.status_code, 404)
+
+
+class AvailabilityCacheTests(TestCase):
+
+    def setUp(self):
+        reset_caches()
+        availability_cache.reset_stats()
+        owner = User.objects.create_user(username='dono@teste.com', password='senha-forte-123')
+        self.barbershop = BarberShop.objects.create(
+            name='Salão Teste', email='dono@teste.com', owner=owner, scheduling_link='salao-teste'
+        )
+        self.professional = Professional.objects.create(barbershop=self.barbershop, name='João', phone='1')
+        self.service = Service.objects.create(barbershop=self.barbershop, name='Corte', minutes_duration=60, value=40)
+        self.client_obj = Client.objects.create(barbershop=self.barbershop, name='Maria', phone_whatsap='11999990000')
+        self.day = timezone.localdate() + timedelta(days=1)
+        self.params = {'professional_id': self.professional.id, 'service_id': self.service.id, 'date': self.day.isoformat()}
+        self.api = APIClient()
+
+    def get_slots(self):
+        return self.api.get('/api/v1/public/salao-teste/available-times/', self.params).data['available_slots']
+
+    def test_second_read_is_a_cache_hit(self):
+        self.get_slots()
+        self.get_slots()
+        self.assertEqual(availability_cache.stats(), {'hits': 1, 'misses': 1, 'hit_rate': 0.5})
+
+    def test_booking_invalidates_only_its_day(self):
+        self.assertIn('10:00', self.get_slots())
+        other_day = dict(self.params, date=(self.day + timedelta(days=1)).isoformat())
+        self.api.get('/api/v1/public/salao-teste/available-times/', other_day)
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            scheduling = Scheduling.objects.create(
+                barbershop=self.barbershop, client=self.client_obj, service=self.service,
+                professional=self.professional, date_hour_init=at(10, 0, self.day),
+            )
+            # Antes do COMMIT a versão não muda: quem recalcular agora não grava sob a versão nova
+            self.assertIn('10:00', self.get_slots())
+        for callback in callbacks:
+            callback()
+        self.assertNotIn('10:00', self.get_slots())
+
+        # O outro dia continua no cache
+        availability_cache.reset_stats()
+        self.api.get('/api/v1/public/salao-teste/available-times/', other_day)
+        self.assertEqual(availability_cache.stats()['hits'], 1)
+
+        # Reagendar libera o horário antigo
+        scheduling.date_hour_init = at(10, 0, self.day + timedelta(days=1))
+        scheduling.date_hour_end = None
+        with self.captureOnCommitCallbacks(execute=True):
+            scheduling.save()
+        self.assertIn('10:00', self.get_slots())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            scheduling.delete()
+        self.assertIn('10:00', self.api.get(
+            '/api/v1/public/salao-teste/available-times/', other_day
+        ).data['available_slots'])
+
+    def test_professional_active_flag_invalidates_cache(self):
+        self.get_slots()
+        self.professional.ative = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.professional.save()
+
+        # Inativo não tem horários
+        response = self.api.get('/api/v1/public/salao-teste/available-times/', self.params)
+        self.assertNotIn('available_slots', response.data)
+
+        self.professional.ative = True
+        with self.captureOnCommitCallbacks(execute=True):
+            self.professional.save()
+        availability_cache.reset_stats()
+        self.get_slots()
+        self.assertEqual(availability_cache.stats()['misses'], 1)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Os planos esperados são os do SQLite')
+class SchedulingIndexUsageTests(TestCase):
+    """Garante (via EXPLAIN) que os filtros de data dos caminhos quentes usam os índices compostos."""
+
+    def setUp(self):
+        reset_caches()
+        owner = User.objects.create_user(username='dono@teste.com', password='senha-forte-123')
+        self.barbershop = BarberShop.objects.create(
+            name='Salão Teste', email='dono@teste.com', owner=owner, scheduling_link='salao-teste'
+        )
+        self.professional = Professional.objects.create(barbershop=self.barbershop, name='João', phone='1')
+        self.day_start, self.day_end = day_bounds(timezone.localdate())
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(index_name, plan, plan)
+
+    def test_availability_day_query(self):
+        queryset = occupied_queryset([self.professional.id], timezone.localdate())
+        self.assertUsesIndex(queryset, 'sched_prof_init_end_idx')
+
+    def test_conflict_check_query(self):
+        init = self.day_start + timedelta(hours=10)
+        queryset = conflicting_schedulings(self.professional, init, init + timedelta(minutes=30))
+        self.assertUsesIndex(queryset, 'sched_prof_init_end_idx')
+
+    def test_finished_history_query(self):
+        self.assertUsesIndex(archivable(self.barbershop.id, self.day_end), 'sched_shop_status_init_idx')
+
+    def test_agenda_range_query(self):
+        today = timezone.localdate().isoformat()
+        view = SchedulingViewSet()
+        view.request = Request(APIRequestFactory().get('/', {'date_from': today, 'date_to': today}))
+        queryset = view.filter_queryset(Scheduling.objects.filter(barbershop=self.barbershop).order_by('date_hour_init'))
+        self.assertUsesIndex(queryset, 'sched_shop_init_idx')
+
+
+class ConcurrentBookingTests(TransactionTestCase):
+    """Dispara centenas de reservas simultâneas (threads) e garante que nenhum horário é reservado duas vezes."""
+
+    THREADS = 200
+
+    def setUp(self):
+        reset_caches()
+        owner = User.objects.create_user(username='dono@teste.com', password='senha-forte-123')
+        self.barbershop = BarberShop.objects.create(
+            name='Salão Teste', email='dono@teste.com', owner=owner, scheduling_link='salao-teste'
+        )
+        self.service = Service.objects.create(barbershop=self.barbershop, name='Corte', minutes_duration=30, value=40)
+        self.professionals = [
+            Professional.objects.create(barbershop=self.barbershop, name=f'Profissional {i}', phone=str(i))
+            for i in range(4)
+        ]
+        self.day = timezone.localdate() + timedelta(days=1)
+
+    def book(self, index, barrier, results):
+        # Horários de 15 em 15 minutos com serviço de 30: metade das combinações se sobrepõe
+        professional = self.professionals[index % len(self.professionals)]
+        start = at(9, 15 * ((index // len(self.professionals)) % 8), self.day)
+        try:
+            barrier.wait()
+            response = APIClient().post('/api/v1/public/salao-teste/', {
+                'client_name': f'Cliente {index}',
+                'client_phone': f'1199999{index:04d}',
+                'service_id': self.service.id,
+                'professional_id': professional.id,
+                'date_hour_init': start.isoformat(),
+            }, format='json')
+            results.append(response.status_code)
+        finally:
+            connection.close()
+
+    def test_no_double_booking_under_concurrency(self):
+        barrier = threading.Barrier(self.THREADS)
+        results = []
+        threads = [threading.Thread(target=self.book, args=(i, barrier, results)) for i in range(self.THREADS)]
+
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(len(results), self.THREADS)
+        self.assertTrue(set(results) <= {201, 400}, results)
+
+        # Nenhuma sobreposição por profissional
+        for professional in self.professionals:
+            bookings = list(
+                Scheduling.objects.filter(professional=professional)
+                .order_by('date_hour_init').values_list('date_hour_init', 'date_hour_end')
+            )
+            self.assertTrue(bookings)
+            for (_, previous_end), (next_start, _) in zip(bookings, bookings[1:]):
+                self.assertLessEqual(previous_end, next_start)
+
+        logger.info(
+            '%d reservas concorrentes em %.2fs (%.0f reservas/s, %d aceitas)',
+            self.THREADS, elapsed, self.THREADS / elapsed, results.count(201),
+        )
+
+
+class ListQueryCountTests(TestCase):
+    """O número de consultas de cada listagem não pode depender da quantidade de linhas."""
+
+    def setUp(self):
+        reset_caches()
+        self.owner = User.objects.create_user(username='dono@teste.com', password='senha-forte-123')
+        self.barbershop = BarberShop.objects.create(
+            name='Salão Teste', email='dono@teste.com', owner=self.owner, scheduling_link='salao-teste'
+        )
+        self.api = APIClient()
+        self.api.force_authenticate(self.owner)
+        self.day = timezone.localdate() + timedelta(days=1)
+        self.rows = 0
+
+    def add_rows(self, total):
+        for _ in range(total):
+            i = self.rows
+            self.rows += 1
+            professional = Professional.objects.create(barbershop=self.barbershop, name=f'Profissional {i}', phone=str(i))
+            service = Service.objects.create(barbershop=self.barbershop, name=f'Serviço {i}', minutes_duration=30, value=40)
+            service.professionals_aptos.add(professional)
+            client = Client.objects.create(barbershop=self.barbershop, name=f'Cliente {i}', phone_whatsap=str(i))
+            Scheduling.objects.create(
+                barbershop=self.barbershop, client=client, service=service,
+                professional=professional, date_hour_init=at(9, 0, self.day) + timedelta(days=i),
+            )
+
+    def count_queries(self, url):
+        tenancy.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.api.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_list_endpoints_have_constant_query_count(self):
+        urls = ['/api/v1/profissional/', '/api/v1/servico/', '/api/v1/clientes/', '/api/v1/agendamentos/']
+
+        self.add_rows(2)
+        small = {url: self.count_queries(url) for url in urls}
+        self.add_rows(10)
+        large = {url: self.count_queries(url) for url in urls}
+
+        self.assertEqual(small, large)
+
+
+class SchedulingListPaginationTests(TestCase):
+
+    def setUp(self):
+        reset_caches()
+        owner = User.objects.create_user(username='dono@teste.com', password='senha-forte-123')
+        self.barbershop = BarberShop.objects.create(
+            name='Salão Teste', email='dono@teste.com', owner=owner, scheduling_link='salao-teste'
+        )
+        self.professionals = [
+            Professional.objects.create(barbershop=self.barbershop, name=f'Profissional {i}', phone=str(i))
+            for i in range(3)
+        ]
+        self.service = Service.objects.create(barbershop=self.barbershop, name='Corte', minutes_duration=30, value=40)
+        self.client_obj = Client.objects.create(barbershop=self.barbershop, name='Maria', phone_whatsap='1')
+        self.day = timezone.localdate() + timedelta(days=1)
+        # 3 dias x 4 horários x 3 profissionais: vários agendamentos com o MESMO date_hour_init (empates)
+        for offset in range(3):
+            for hour in (9, 10, 11, 12):
+                for professional in self.professionals:
+                    Scheduling.objects.create(
+                        barbershop=self.barbershop, client=self.client_obj, service=self.service,
+                        professional=professional, date_hour_init=at(hour, 0, self.day + timedelta(days=offset)),
+                        status='Concluido' if hour == 9 else 'Pendente',
+                    )
+        self.api = APIClient()
+        self.api.force_authenticate(owner)
+
+    def walk(self, params):
+        ids, url = [], '/api/v1/agendamentos/'
+        while url:
+            response = self.api.get(url, params)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(item['id'] for item in response.data['results'])
+            url, params = response.data['next'], None
+        return ids
+
+    def test_walking_the_cursor_returns_every_row_once_in_order(self):
+        ids = self.walk({'page_size': 5})
+        expected = list(Scheduling.objects.order_by('date_hour_init', 'id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+
+    def test_filters(self):
+        second_day = (self.day + timedelta(days=1)).isoformat()
+        ids = self.walk({'date_from': second_day, 'date_to': second_day, 'page_size': 4})
+        self.assertEqual(len(ids), 12)
+
+        ids = self.walk({'professional': self.professionals[0].id, 'status': 'Concluido'})
+        self.assertEqual(len(ids), 3)
+
+        self.assertEqual(self.api.get('/api/v1/agendamentos/', {'status': 'Outro'}).status_code, 400)
+        self.assertEqual(self.api.get('/api/v1/agendamentos/', {'date_from': '18/10/2026'}).status_code, 400)
+        self.assertEqual(self.api.get('/api/v1/agendamentos/', {'cursor': 'lixo'}).status_code, 404)
+
+
+class PublicCatalogTests(TestCase):
+
+    def setUp(self):
+        reset_caches()
+        owner = User.objects.create_user(username='dono@teste.com', password='senha-forte-123')
+        self.barbershop = BarberShop.objects.create(
+            name='Salão Teste', email='dono@teste.com', owner=owner, scheduling_link='salao-teste'
+        )
+        self.professionals = [
+            Professional.objects.create(barbershop=self.barbershop, name=f'Profissional {i}', phone=str(i))
+            for i in range(3)
+        ]
+        for i in range(5):
+            service = Service.objects.create(barbershop=self.barbershop, name=f'Serviço {i}', minutes_duration=30, value=40)
+            service.professionals_aptos.set(self.professionals)
+        self.api = APIClient()
+
+    def get(self, **headers):
+        return self.api.get('/api/v1/public/salao-teste/', headers=headers)
+
+    def test_cold_render_uses_prefetch_and_warm_reads_skip_the_database(self):
+        # Salão + serviços + profissionais aptos (prefetch), independente do número de serviços
+        with self.assertNumQueries(3):
+            response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['services']), 5)
+        self.assertEqual(len(response.data['services'][0]['professionals_aptos_names']), 3)
+
+        with self.assertNumQueries(0):
+            cached = self.get()
+        self.assertEqual(cached.data, response.data)
+        self.assertEqual(cached['ETag'], response['ETag'])
+
+    def test_if_none_match_returns_304(self):
+        etag = self.get()['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.get(if_none_match=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        self.assertEqual(self.get(if_none_match='"outro"').status_code, 200)
+
+    def test_changes_bump_the_version(self):
+        etags = {self.get()['ETag']}
+
+        service = Service.objects.get(name='Serviço 0')
+        with self.captureOnCommitCallbacks(execute=True):
+            service.professionals_aptos.remove(self.professionals[0])
+        etags.add(self.get()['ETag'])
+
+        self.professionals[1].name = 'Renomeado'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.professionals[1].save()
+        response = self.get()
+        etags.add(response['ETag'])
+        self.assertIn('Renomeado', str(response.data))
+
+        service.value = 55
+        with self.captureOnCommitCallbacks(execute=True):
+            service.save()
+        etags.add(self.get()['ETag'])
+
+        self.barbershop.name = 'Novo Nome'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.barbershop.save()
+        response = self.get()
+        etags.add(response['ETag'])
+        self.assertEqual(response.data['barbershop_name'], 'Novo Nome')
+
+        self.assertEqual(len(etags), 5)
+
+
+class BulkSchedulingTests(TestCase):
+
+    def setUp(self):
+        reset_caches()
+        owner = User.objects.create_user(username='dono@teste.com', password='senha-forte-123')
+        self.barbershop = BarberShop.objects.create(
+            name='Salão Teste', email='dono@teste.com', owner=owner, scheduling_link='salao-teste'
+        )
+        self.professionals = [
+            Professional.objects.create(barbershop=self.barbershop, name=f'Profissional {i}', phone=str(i))
+            for i in range(4)
+        ]
+        self.service = Service.objects.create(barbershop=self.barbershop, name='Corte', minutes_duration=30, value=40)
+        self.client_obj = Client.objects.create(barbershop=self.barbershop, name='Maria', phone_whatsap='1')
+        self.day = timezone.localdate() + timedelta(days=1)
+        self.api = APIClient()
+        self.api.force_authenticate(owner)
+
+    def item(self, professional, start, **extra):
+        return {
+            'client': self.client_obj.id, 'service': self.service.id, 'professional': professional.id,
+            'date_hour_init': start.isoformat(), **extra,
+        }
+
+    def post(self, items):
+        return self.api.post('/api/v1/agendamentos/bulk/', items, format='json')
+
+    def test_a_week_of_appointments_uses_a_constant_number_of_queries(self):
+        # 4 profissionais x 5 dias x 10 horários = 200 agendamentos
+        items = [
+            self.item(professional, at(9 + slot // 2, 30 * (slot % 2), self.day + timedelta(days=offset)))
+            for professional in self.professionals
+            for offset in range(5)
+            for slot in range(10)
+        ]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post(items)
+        selects = [query['sql'] for query in queries.captured_queries if query['sql'].startswith('SELECT')]
+        inserts = [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('INSERT') and 'notifications_' not in query['sql']
+        ]
+        # Salão + 3 FKs + lock + 1 busca de conflitos por profissional + linhas do resumo diário.
+        # Os INSERTs (agendamentos e resumo) só são quebrados pelo limite de parâmetros do banco
+        # (999 no SQLite), nunca por linha. Os da outbox são conferidos em notifications/tests.py
+        self.assertEqual(len(selects), 1 + 3 + 1 + len(self.professionals) + 1)
+        self.assertLessEqual(len(inserts), 3)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data['created']), 200)
+        self.assertEqual(response.data['errors'], [])
+        self.assertEqual(Scheduling.objects.count(), 200)
+        first = Scheduling.objects.order_by('id').first()
+        self.assertEqual(first.initial_value, 40)
+        self.assertEqual(first.date_hour_end, first.date_hour_init + timedelta(minutes=30))
+        self.assertEqual(response.data['created'][0]['professional_name'], 'Profissional 0')
+
+    def test_invalid_items_are_reported_and_the_rest_is_created(self):
+        other_owner = User.objects.create_user(username='outro@teste.com', password='senha-forte-123')
+        other_shop = BarberShop.objects.create(name='Outro', email='outro@teste.com', owner=other_owner)
+        foreign = Professional.objects.create(barbershop=other_shop, name='Intruso', phone='9')
+        joao, ana = self.professionals[:2]
+        Scheduling.objects.create(
+            barbershop=self.barbershop, client=self.client_obj, service=self.service,
+            professional=joao, date_hour_init=at(10, 0, self.day),
+        )
+
+        response = self.post([
+            self.item(joao, at(9, 0, self.day)),
+            self.item(joao, at(10, 15, self.day)),      # conflita com o banco
+            self.item(ana, at(10, 0, self.day)),
+            self.item(ana, at(10, 15, self.day)),       # conflita com o item anterior do lote
+            self.item(foreign, at(11, 0, self.day)),    # profissional de outro salão
+            self.item(ana, at(11, 0, self.day), date_hour_init='amanhã'),
+            'lixo',
+        ])
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data['created']), 2)
+        self.assertEqual([error['index'] for error in response.data['errors']], [1, 3, 4, 5, 6])
+        self.assertIn('date_hour_init', response.data['errors'][0]['errors'])
+        self.assertIn('professional', response.data['errors'][2]['errors'])
+        self.assertEqual(Scheduling.objects.count(), 3)
+
+    def test_bulk_creation_invalidates_cached_availability(self):
+        professional = self.professionals[0]
+        read = lambda: availability_cache.get_slots(professional.id, self.day, 30, lambda: ['stale'])
+        self.assertEqual(read(), ['stale'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post([self.item(professional, at(9, 0, self.day))])
+
+        self.assertEqual(availability_cache.get_slots(professional.id, self.day, 30, lambda: ['fresh']), ['fresh'])
+
+    def test_services_cannot_outlast_the_conflict_window(self):
+        # A busca de conflitos só olha MAX_SCHEDULING_LENGTH para trás
+        too_long = self.api.post('/api/v1/servico/', {'name': 'Dia todo', 'minutes_duration': 24 * 60 + 1, 'value': '1'})
+        self.assertEqual(too_long.status_code, 400)
+        self.assertIn('minutes_duration', too_long.data)
+        full_day = self.api.post('/api/v1/servico/', {'name': 'Dia todo', 'minutes_duration': 24 * 60, 'value': '1'})
+        self.assertEqual(full_day.status_code, 201)
+
+    def test_rejects_non_list_and_empty_results(self):
+        self.assertEqual(self.post({'client': 1}).status_code, 400)
+        response = self.post([self.item(self.professionals[0], at(9, 0, self.day), client=999)])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['errors'][0]['errors'], {'client': ['Objeto não encontrado.']})
+
+
+class ClientImportTests(TestCase):
+
+    def setUp(self):
+        reset_caches()
+        owner = User.objects.create_user(username='dono@teste.com', password='senha-forte-123')
+        self.barbershop = BarberShop.objects.create(
+            name='Salão Teste', email='dono@teste.com', owner=owner, scheduling_link='salao-teste'
+        )
+        Client.objects.create(barbershop=self.barbershop, name='Antigo', phone_whatsap='11999990000', email='a@a.com')
+        self.api = APIClient()
+        self.api.force_authenticate(owner)
+
+    def upload(self, name, content, **data):
+        return self.api.post(
+            '/api/v1/clientes/import/',
+            {'file': SimpleUploadedFile(name, content if isinstance(content, bytes) else content.encode()), **data},
+            format='multipart',
+        )
+
+    def test_csv_import_normalizes_dedupes_and_upserts(self):
+        content = (
+            'name,phone_whatsap,email\n'
+            'Novo Nome,(11) 99999-0000,\n'          # já existe: atualiza o nome e mantém o email
+            'Bia,+55 21 98888-7777,bia@teste.com\n'
+            'Bia Repetida,5521988887777,\n'         # repetida no arquivo: vale a última
+            'Sem Telefone,,\n'
+            'Email Ruim,21977776666,nao-e-email\n'
+        )
+        response = self.upload('clientes.csv', content)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {'inserted': 1, 'updated': 1, 'skipped': 3})
+        old = Client.objects.get(phone_whatsap='11999990000')
+        self.assertEqual((old.name, old.email), ('Novo Nome', 'a@a.com'))
+        self.assertEqual(Client.objects.get(phone_whatsap='5521988887777').name, 'Bia Repetida')
+
+    @override_settings(FILE_UPLOAD_MAX_MEMORY_SIZE=0)
+    def test_ndjson_import_streams_from_a_temporary_file_in_chunks(self):
+        lines = [json.dumps({'name': f'Cliente {i}', 'phone_whatsap': f'2100000{i:04d}'}) for i in range(25)]
+        lines.insert(3, '{quebrado')
+        content = '\n'.join(lines) + '\n'
+
+        # 1 bloco = 1 consulta de telefones existentes + 1 upsert (+ savepoints da transação do bloco)
+        with CaptureQueriesContext(connection) as queries:
+            counts = import_clients(self.barbershop, io.BytesIO(content.encode()), 'ndjson', chunk_size=10)
+        self.assertEqual(counts, {'inserted': 25, 'updated': 0, 'skipped': 1})
+        self.assertEqual(sum(query['sql'].startswith('INSERT') for query in queries.captured_queries), 3)
+
+        response = self.upload('clientes.ndjson', content)
+        self.assertEqual(response.data, {'inserted': 0, 'updated': 25, 'skipped': 1})
+        self.assertEqual(Client.objects.filter(barbershop=self.barbershop).count(), 26)
+
+    def test_rejects_missing_file_and_unknown_format(self):
+        self.assertEqual(self.api.post('/api/v1/clientes/import/', {}, format='multipart').status_code, 400)
+        self.assertEqual(self.upload('clientes.csv', 'name\n', file_format='xlsx').status_code, 400)
+
+    def test_rejects_unreadable_files(self):
+        latin1 = self.upload('clientes.csv', 'name,phone_whatsap\nJoão,11988887777\n'.encode('latin-1'))
+        self.assertEqual(latin1.status_code, 400)
+        self.assertIn('file', latin1.data)
+
+        oversized = self.upload('clientes.csv', 'name,phone_whatsap\n"' + 'x' * (csv.field_size_limit() + 1) + '",1\n')
+        self.assertEqual(oversized.status_code, 400)
+
+    def test_phone_is_normalized_on_every_path(self):
+        response = self.api.post('/api/v1/clientes/', {'name': 'Bia', 'phone_whatsap': '+55 (21) 98888-7777'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['phone_whatsap'], '5521988887777')
+        self.assertEqual(self.api.post('/api/v1/clientes/', {'name': 'Sem', 'phone_whatsap': '--'}).status_code, 400)
+
+        service = Service.objects.create(barbershop=self.barbershop, name='Corte', minutes_duration=30, value=50)
+        professional = Professional.objects.create(barbershop=self.barbershop, name='João', phone='1')
+        service.professionals_aptos.add(professional)
+        response = APIClient().post('/api/v1/public/salao-teste/', {
+            'client_name': 'Antigo', 'client_phone': '11 99999-0000', 'service_id': service.id,
+            'professional_id': professional.id, 'date_hour_init': (timezone.now() + timedelta(days=1)).isoformat(),
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Client.objects.filter(barbershop=self.barbershop).count(), 2)
+        self.assertEqual(Scheduling.objects.get().client.name, 'Antigo')
+
+    def test_management_command(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as handle:
+            handle.write('name,phone_whatsap\nCarla,31 3333-4444\n')
+        self.addCleanup(os.unlink, handle.name)
+
+        out = io.StringIO()
+        call_command('import_clients', handle.name, barbershop=self.barbershop.id, stdout=out)
+        self.assertIn('1 inseridos', out.getvalue())
+        self.assertTrue(Client.objects.filter(phone_whatsap='3133334444').exists())
+
+
+class SchedulingExportTests(TestCase):
+
+    def setUp(self):
+        reset_caches()
+        owner = User.objects.create_user(username='dono@teste.com', password='senha-forte-123')
+        self.barbershop = BarberShop.objects.create(
+            name='Salão Teste', email='dono@teste.com', owner=owner, scheduling_link='salao-teste'
+        )
+        self.professionals = [
+            Professional.objects.create(barbershop=self.barbershop, name=f'Profissional {i}', phone=str(i))
+            for i in range(2)
+        ]
+        self.service = Service.objects.create(barbershop=self.barbershop, name='Corte', minutes_duration=30, value=40)
+        self.client_obj = Client.objects.create(barbershop=self.barbershop, name='José, "Zé"', phone_whatsap='1')
+        self.day = timezone.localdate() + timedelta(days=1)
+        for offset in range(3):
+            for hour in (9, 10):
+                for professional in self.professionals:
+                    Scheduling.objects.create(
+                        barbershop=self.barbershop, client=self.client_obj, service=self.service,
+                        professional=professional, date_hour_init=at(hour, 0, self.day + timedelta(days=offset)),
+                        initial_value=40, status='Concluido' if hour == 9 else 'Pendente',
+                    )
+        self.api = APIClient()
+        self.api.force_authenticate(owner)
+
+    def export(self, **params):
+        response = self.api.get('/api/v1/agendamentos/export/', params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_export_streams_every_row_with_joined_names(self):
+        # Salão + uma única consulta para as linhas, independente do total
+        with self.assertNumQueries(2):
+            content = self.export()
+
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 12)
+        self.assertEqual(rows[0]['client'], 'José, "Zé"')
+        self.assertEqual(rows[0]['professional'], 'Profissional 0')
+        self.assertEqual(rows[0]['date_hour_init'], at(9, 0, self.day).isoformat())
+        self.assertEqual(rows[0]['initial_value'], '40.00')
+
+    def test_ndjson_export_applies_the_agenda_filters(self):
+        second_day = (self.day + timedelta(days=1)).isoformat()
+        content = self.export(
+            file_format='ndjson', date_from=second_day, date_to=second_day,
+            professional=self.professionals[1].id, status='Concluido',
+        )
+
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['professional'], 'Profissional 1')
+        self.assertEqual(rows[0]['status'], 'Concluido')
+
+    def test_invalid_format(self):
+        response = self.api.get('/api/v1/agendamentos/export/', {'file_format': 'xlsx'})
+        self.assertEqual(response.status_code, 400)
+
+
+class RevenueReportTests(TestCase):
+
+    def setUp(self):
+        reset_caches()
+        owner = User.objects.create_user(username='dono@teste.com', password='senha-forte-123')
+        self.barbershop = BarberShop.objects.create(
+            name='Salão Teste', email='dono@teste.com', owner=owner, scheduling_link='salao-teste'
+        )
+        self.joao = Professional.objects.create(barbershop=self.barbershop, name='João', phone='1', commission_standard=0.40)
+        self.ana = Professional.objects.create(barbershop=self.barbershop, name='Ana', phone='2', commission_standard=0.50)
+        self.haircut = Service.objects.create(barbershop=self.barbershop, name='Corte', minutes_duration=30, value=40)
+        self.beard = Service.objects.create(barbershop=self.barbershop, name='Barba', minutes_duration=30, value=30)
+        self.client_obj = Client.objects.create(barbershop=self.barbershop, name='Maria', phone_whatsap='1')
+        # Segunda e terça de uma semana passada, e a segunda da semana seguinte
+        self.monday = timezone.localdate() - timedelta(days=timezone.localdate().weekday() + 14)
+        self.book(self.joao, self.haircut, at(9, 0, self.monday), 40)
+        self.book(self.joao, self.beard, at(10, 0, self.monday), 30)
+        self.book(self.ana, self.haircut, at(9, 0, self.monday + timedelta(days=1)), 50)
+        self.book(self.ana, self.haircut, at(9, 0, self.monday + timedelta(days=7)), 40)
+        # Não concluídos não contam
+        self.book(self.joao, self.haircut, at(11, 0, self.monday), 40, status='Cancelado')
+        self.book(self.joao, self.haircut, at(12, 0, self.monday), 40, status='Pendente')
+        self.api = APIClient()
+        self.api.force_authenticate(owner)
+
+    def book(self, professional, service, start, value, status='Concluido'):
+        Scheduling.objects.create(
+            barbershop=self.barbershop, client=self.client_obj, service=service, professional=professional,
+            date_hour_init=start, initial_value=value, status=status,
+        )
+
+    def report(self, **params):
+        params.setdefault('date_from', self.monday.isoformat())
+        params.setdefault('date_to', (self.monday + timedelta(days=13)).isoformat())
+        response = self.api.get('/api/v1/relatorios/faturamento/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_totals_only_count_completed_appointments(self):
+        totals = self.report()['totals']
+        self.assertEqual(totals['count'], 4)
+        self.assertEqual(totals['revenue'], Decimal('160.00'))
+        self.assertEqual(totals['average_ticket'], Decimal('40.00'))
+        # João: (40 + 30) * 0.40 = 28; Ana: (50 + 40) * 0.50 = 45
+        self.assertEqual(totals['commission'], Decimal('73.00'))
+
+    def test_group_by_professional_and_week_in_two_queries(self):
+        # Salão + uma consulta agrupada no resumo diário (o período não inclui hoje)
+        with self.assertNumQueries(2):
+            data = self.report(group_by='professional', period='week')
+
+        rows = [
+            (row['period'], row['professional__name'], row['count'], row['revenue'], row['commission'])
+            for row in data['results']
+        ]
+        self.assertEqual(rows, [
+            (self.monday, 'João', 2, Decimal('70.00'), Decimal('28.00')),
+            (self.monday, 'Ana', 1, Decimal('50.00'), Decimal('25.00')),
+            (self.monday + timedelta(days=7), 'Ana', 1, Decimal('40.00'), Decimal('20.00')),
+        ])
+
+    def test_group_by_service_and_day(self):
+        rows = self.report(group_by='service', period='day', date_to=self.monday.isoformat())['results']
+        self.assertEqual(
+            [(row['service__name'], row['count']) for row in rows],
+            [('Corte', 1), ('Barba', 1)],
+        )
+
+    def test_invalid_parameters(self):
+        url = '/api/v1/relatorios/faturamento/'
+        self.assertEqual(self.api.get(url, {'group_by': 'cliente'}).status_code, 400)
+        self.assertEqual(self.api.get(url, {'period': 'year'}).status_code, 400)
+        self.assertEqual(self.api.get(url, {'date_from': '2026-02-01', 'date_to': '2026-01-01'}).status_code, 400)
+
+
+class DailyRollupTests(TestCase):
+
+    def setUp(self):
+        reset_caches()
+        owner = User.objects.create_user(username='dono@teste.com', password='senha-forte-123')
+        self.barbershop = BarberShop.objects.create(
+            name='Salão Teste', email='dono@teste.com', owner=owner, scheduling_link='salao-teste'
+        )
+        self.professional = Professional.objects.create(barbershop=self.barbershop, name='João', phone='1')
+        self.service = Service.objects.create(barbershop=self.barbershop, name='Corte', minutes_duration=30, value=40)
+        self.client_obj = Client.objects.create(barbershop=self.barbershop, name='Maria', phone_whatsap='1')
+        self.day = timezone.localdate() - timedelta(days=3)
+        self.api = APIClient()
+        self.api.force_authenticate(owner)
+
+    def schedule(self, start, status='Pendente', value=40):
+        return Scheduling.objects.create(
+            barbershop=self.barbershop, client=self.client_obj, service=self.service,
+            professional=self.professional, date_hour_init=start, status=status, initial_value=value,
+        )
+
+    def row(self, day=None):
+        return SchedulingDailyRollup.objects.filter(professional=self.professional, day=day or self.day).values(
+            'booked_minutes', 'completed_count', 'cancelled_count', 'revenue',
+        ).first()
+
+    def test_create_status_change_reschedule_and_delete(self):
+        scheduling = self.schedule(at(9, 0, self.day))
+        self.schedule(at(10, 0, self.day), status='Concluido', value=50)
+        self.assertEqual(self.row(), {
+            'booked_minutes': 60, 'completed_count': 1, 'cancelled_count': 0, 'revenue': Decimal('50.00'),
+        })
+
+        scheduling.status = 'Cancelado'
+        scheduling.save()
+        self.assertEqual(self.row(), {
+            'booked_minutes': 30, 'completed_count': 1, 'cancelled_count': 1, 'revenue': Decimal('50.00'),
+        })
+
+        # Reagendado para outro dia (e concluído): sai do dia antigo, entra no novo
+        next_day = self.day + timedelta(days=1)
+        scheduling.date_hour_init = at(9, 0, next_day)
+        scheduling.date_hour_end = at(9, 30, next_day)
+        scheduling.status = 'Concluido'
+        scheduling.save()
+        self.assertEqual(self.row()['cancelled_count'], 0)
+        self.assertEqual(self.row(next_day), {
+            'booked_minutes': 30, 'completed_count': 1, 'cancelled_count': 0, 'revenue': Decimal('40.00'),
+        })
+
+        scheduling.delete()
+        self.assertEqual(self.row(next_day)['completed_count'], 0)
+        self.assertEqual(rollups.verify(), [])
+
+    def test_bulk_booking_updates_the_rollup(self):
+        days = [timezone.localdate() + timedelta(days=offset) for offset in (1, 2)]
+
+        def post(hours):
+            items = [
+                {'client': self.client_obj.id, 'service': self.service.id, 'professional': self.professional.id,
+                 'date_hour_init': at(hour, 0, day).isoformat()}
+                for day in days for hour in hours
+            ]
+            self.assertEqual(self.api.post('/api/v1/agendamentos/bulk/', items, format='json').status_code, 201)
+
+        post((9, 10, 11))   # cria as linhas do resumo
+        post((14, 15))      # incrementa as linhas existentes em um único UPDATE
+        self.assertEqual([self.row(day)['booked_minutes'] for day in days], [150, 150])
+        self.assertEqual(rollups.verify(), [])
+
+    def test_rebuild_and_verify_command(self):
+        self.schedule(at(9, 0, self.day), status='Concluido')
+        self.schedule(at(10, 0, self.day), status='Cancelado')
+        expected = self.row()
+
+        SchedulingDailyRollup.objects.update(revenue=0)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_daily_rollups', verify=True, stdout=io.StringIO())
+
+        call_command('rebuild_daily_rollups', barbershop=self.barbershop.id, stdout=io.StringIO())
+        self.assertEqual(self.row(), expected)
+        call_command('rebuild_daily_rollups', verify=True, stdout=io.StringIO())
+
+    def test_report_reads_past_days_from_the_rollup_and_today_from_raw_rows(self):
+        self.schedule(at(9, 0, self.day), status='Concluido', value=40)
+        today = self.schedule(at(9, 0, timezone.localdate()), status='Concluido', value=60)
+
+        # O resumo de dias passados é a fonte do relatório: alterá-lo muda o resultado
+        SchedulingDailyRollup.objects.filter(day=self.day).update(revenue=100)
+        # ... e hoje é lido dos agendamentos, não do resumo
+        SchedulingDailyRollup.objects.filter(day=today.date_hour_init.date()).delete()
+
+        # Salão + resumo + agendamentos de hoje
+        with self.assertNumQueries(3):
+            response = self.api.get('/api/v1/relatorios/faturamento/', {
+                'date_from': self.day.isoformat(), 'date_to': timezone.localdate().isoformat(),
+                'group_by': 'service', 'period': 'month',
+            })
+
+        self.assertEqual(response.data['totals']['count'], 2)
+        self.assertEqual(response.data['totals']['revenue'], Decimal('160.00'))
+        self.assertEqual(response.data['totals']['booked_minutes'], 60)
+
+
+class AsyncPublicViewsTests(TestCase):
+
+    def setUp(self):
+        reset_caches()
+        owner = User.objects.create_user(username='dono@teste.com', password='senha-forte-123')
+        self.barbershop = BarberShop.objects.create(
+            name='Salão Teste', email='dono@teste.com', owner=owner, scheduling_link='salao-teste'
+        )
+        self.professionals = [
+            Professional.objects.create(barbershop=self.barbershop, name=f'Profissional {i}', phone=str(i))
+            for i in range(2)
+        ]
+        self.service = Service.objects.create(barbershop=self.barbershop, name='Corte', minutes_duration=30, value=40)
+        self.service.professionals_aptos.set(self.professionals)
+        self.client_obj = Client.objects.create(barbershop=self.barbershop, name='Maria', phone_whatsap='1')
+        self.day = timezone.localdate() + timedelta(days=1)
+        Scheduling.objects.create(
+            barbershop=self.barbershop, client=self.client_obj, service=self.service,
+            professional=self.professionals[0], date_hour_init=at(10, 0, self.day),
+        )
+        self.sync_client = APIClient()
+
+    async def test_async_endpoints_match_the_sync_ones(self):
+        params = {'service_id': self.service.id, 'date': self.day.isoformat()}
+        cases = [
+            ('/public/salao-teste/', {}),
+            ('/public/salao-teste/service-availability/', params),
+            ('/public/salao-teste/available-times/', {**params, 'professional_id': self.professionals[0].id}),
+        ]
+        for path, query in cases:
+            expected = await sync_to_async(self.sync_client.get)(f'/api/v1{path}', query, format='json')
+            response = await self.async_client.get(f'/api/v1/async{path}', query)
+            self.assertEqual(response.status_code, 200, path)
+            self.assertEqual(response.json(), json.loads(expected.content), path)
+
+    async def test_async_endpoints_return_the_sync_error_statuses(self):
+        day = self.day.isoformat()
+        professional = self.professionals[0].id
+        cases = [
+            ('/public/nao-existe/', {}),
+            ('/public/nao-existe/available-times/', {'professional_id': professional, 'service_id': self.service.id, 'date': day}),
+            ('/public/salao-teste/available-times/', {'service_id': self.service.id, 'date': day}),
+            ('/public/salao-teste/available-times/', {'professional_id': professional, 'service_id': self.service.id, 'date': 'x'}),
+            ('/public/salao-teste/available-times/', {'professional_id': 999, 'service_id': self.service.id, 'date': day}),
+            ('/public/salao-teste/available-times/', {'professional_id': professional, 'service_id': 999, 'date': day}),
+            ('/public/salao-teste/available-times/', {'professional_id': 'abc', 'service_id': self.service.id, 'date': day}),
+            ('/public/nao-existe/service-availability/', {'service_id': self.service.id, 'date': day}),
+            ('/public/salao-teste/service-availability/', {'date': day}),
+            ('/public/salao-teste/service-availability/', {'service_id': self.service.id, 'date': 'x'}),
+            ('/public/salao-teste/service-availability/', {'service_id': 999, 'date': day}),
+            ('/public/salao-teste/service-availability/', {'service_id': 'abc', 'date': day}),
+        ]
+        for path, query in cases:
+            expected = await sync_to_async(self.sync_client.get)(f'/api/v1{path}', query)
+            response = await self.async_client.get(f'/api/v1/async{path}', query)
+            self.assertGreaterEqual(expected.status_code, 400, (path, query))
+            self.assertEqual(response.status_code, expected.status_code, (path, query))
+
+        posts = [
+            ('/public/nao-existe/', {}),
+            ('/public/salao-teste/', []),
+            ('/public/salao-teste/', {'client_name': 'Bia', 'client_phone': '--'}),
+            ('/public/salao-teste/', {'client_name': 'Bia', 'client_phone': '2', 'service_id': 999}),
+        ]
+        for path, body in posts:
+            expected = await sync_to_async(self.sync_client.post)(f'/api/v1{path}', body, format='json')
+            response = await self.async_client.post(f'/api/v1/async{path}', body, content_type='application/json')
+            self.assertEqual(response.status_code, expected.status_code, (path, body))
+
+    async def test_catalog_etag(self):
+        response = await self.async_client.get('/api/v1/async/public/salao-teste/')
+        etag = response['ETag']
+
+        response = await self.async_client.get('/api/v1/async/public/salao-teste/', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+        def save():
+            with self.captureOnCommitCallbacks(execute=True):
+                self.professionals[1].save()
+
+        await sync_to_async(save)()
+        response = await self.async_client.get('/api/v1/async/public/salao-teste/', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+
+    async def test_booking(self):
+        url = '/api/v1/async/public/salao-teste/'
+        payload = {
+            'client_name': 'Bia', 'client_phone': '2', 'service_id': self.service.id,
+            'professional_id': self.professionals[0].id, 'date_hour_init': at(11, 0, self.day).isoformat(),
+        }
+        response = await self.async_client.post(url, payload, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(await Scheduling.objects.filter(pk=response.json()['scheduling_id']).aexists())
+
+        # Mesmo horário: conflito
+        response = await self.async_client.post(url, payload, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('date_hour_init', response.json())
+
+        response = await self.async_client.post(url, 'lixo', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    async def test_errors(self):
+        self.assertEqual((await self.async_client.get('/api/v1/async/public/nao-existe/')).status_code, 404)
+        response = await self.async_client.get(
+            '/api/v1/async/public/salao-teste/service-availability/', {'service_id': 999, 'date': '2026-01-01'},
+        )
+        self.assertEqual(response.status_code, 404)
+        response = await self.async_client.get(
+            '/api/v1/async/public/salao-teste/service-availability/', {'service_id': self.service.id, 'date': 'x'},
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+class WorkingHoursTests(TestCase):
+
+    def setUp(self):
+        reset_caches()
+        self.owner = User.objects.create_user(username='dono@teste.com', password='senha-forte-123')
+        self.barbershop = BarberShop.objects.create(
+            name='Salão Teste', email='dono@teste.com', owner=self.owner, scheduling_link='salao-teste'
+        )
+        self.joao = Professional.objects.create(barbershop=self.barbershop, name='João', phone='1')
+        self.ana = Professional.objects.create(barbershop=self.barbershop, name='Ana', phone='2')
+        self.service = Service.objects.create(barbershop=self.barbershop, name='Corte', minutes_duration=60, value=40)
+        self.service.professionals_aptos.add(self.joao, self.ana)
+        self.day = timezone.localdate() + timedelta(days=1)
+        self.weekday = self.day.weekday()
+        self.api = APIClient()
+        self.api.force_authenticate(self.owner)
+
+    def slots(self, service=None):
+        response = self.api.get('/api/v1/public/salao-teste/service-availability/', {
+            'service_id': (service or self.service).id, 'date': self.day.isoformat(),
+        })
+        self.assertEqual(response.status_code, 200)
+        return {row['professional_name']: row['available_slots'] for row in response.data['professionals']}
+
+    def hours(self, start, end, professional=None, weekday=None):
+        return WorkingHours.objects.create(
+            barbershop=self.barbershop, professional=professional,
+            weekday=self.weekday if weekday is None else weekday, start=clock(start), end=clock(end),
+        )
+
+    def test_subtract_cuts_closures_out_of_sorted_windows(self):
+        self.assertEqual(
+            subtract(((540, 720), (780, 1080)), [(600, 660), (700, 800), (1000, 1440)]),
+            ((540, 600), (660, 700), (800, 1000)),
+        )
+        self.assertEqual(subtract(((540, 1080),), [(0, 1440)]), ())
+
+    def test_without_rules_the_default_nine_to_six_applies(self):
+        self.assertEqual(self.slots()['João'], [f'{hour:02d}:00' for hour in range(9, 18)])
+
+    def test_barbershop_schedule_with_a_lunch_break(self):
+        self.hours(9, 12)
+        self.hours(13, 15)
+        # Outro dia da semana não interfere
+        self.hours(8, 20, weekday=(self.weekday + 1) % 7)
+
+        slots = self.slots()
+
+        self.assertEqual(slots['João'], ['09:00', '10:00', '11:00', '13:00', '14:00'])
+        self.assertEqual(slots['Ana'], slots['João'])
+
+    def test_professional_schedule_replaces_the_barbershop_schedule(self):
+        self.hours(9, 12)
+        self.hours(14, 16, professional=self.ana)
+        # João tem expediente próprio, mas não neste dia da semana: está de folga
+        self.hours(9, 18, professional=self.joao, weekday=(self.weekday + 1) % 7)
+
+        slots = self.slots()
+
+        self.assertEqual(slots['Ana'], ['14:00', '15:00'])
+        self.assertEqual(slots['João'], [])
+
+    def test_closures_are_subtracted_from_the_windows(self):
+        Closure.objects.create(
+            barbershop=self.barbershop, professional=self.ana, start=at(10, 30, self.day), end=at(12, 0, self.day),
+        )
+        # Feriado que começa na véspera: o salão todo fica fechado das 0h às 13h
+        Closure.objects.create(
+            barbershop=self.barbershop, start=at(18, 0, self.day - timedelta(days=1)), end=at(13, 0, self.day),
+            reason='Feriado',
+        )
+
+        slots = self.slots()
+
+        self.assertEqual(slots['João'][:2], ['13:00', '14:00'])
+        self.assertEqual(slots['Ana'], slots['João'])
+
+    def test_compiled_windows_are_cached_and_invalidated_when_a_rule_changes(self):
+        self.slots()
+        half_hour = Service.objects.create(barbershop=self.barbershop, name='Barba', minutes_duration=30, value=30)
+        half_hour.professionals_aptos.add(self.joao)
+
+        # Outra duração calcula novos slots, mas reaproveita as janelas compiladas
+        with CaptureQueriesContext(connection) as queries:
+            self.slots(half_hour)
+        self.assertFalse([q for q in queries.captured_queries if 'workinghours' in q['sql']])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.api.post('/api/v1/horarios/', {
+                'weekday': self.weekday, 'start': '14:00', 'end': '16:00',
+            }, format='json')
+        self.assertEqual(response.status_code, 201)
+
+        self.assertEqual(self.slots()['João'], ['14:00', '15:00'])
+        self.assertEqual(self.slots(half_hour)['João'], ['14:00', '14:30', '15:00', '15:30'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            WorkingHours.objects.get().delete()
+        self.assertEqual(len(self.slots()['João']), 9)
+
+    def test_rules_api_validates_the_interval_and_the_professional(self):
+        other_owner = User.objects.create_user(username='outro@teste.com', password='senha-forte-123')
+        other_shop = BarberShop.objects.create(
+            name='Outro', email='outro@teste.com', owner=other_owner, scheduling_link='outro'
+        )
+        stranger = Professional.objects.create(barbershop=other_shop, name='Zé', phone='3')
+
+        inverted = self.api.post('/api/v1/horarios/', {'weekday': 0, 'start': '18:00', 'end': '09:00'}, format='json')
+        foreign = self.api.post('/api/v1/fechamentos/', {
+            'professional': stranger.id, 'start': at(9, 0, self.day).isoformat(), 'end': at(10, 0, self.day).isoformat(),
+        }, format='json')
+
+        self.assertEqual(inverted.status_code, 400)
+        self.assertIn('end', inverted.data)
+        self.assertEqual(foreign.status_code, 400)
+        self.assertIn('professional', foreign.data)
+        self.assertFalse(Closure.objects.exists())
+
+
+class ServicesFitAPITests(TestCase):
+
+    def setUp(self):
+        reset_caches()
+        owner = User.objects.create_user(username='dono@teste.com', password='senha-forte-123')
+        self.barbershop = BarberShop.objects.create(
+            name='Salão Teste', email='dono@teste.com', owner=owner, scheduling_link='salao-teste'
+        )
+        self.joao = Professional.objects.create(barbershop=self.barbershop, name='João', phone='1')
+        self.ana = Professional.objects.create(barbershop=self.barbershop, name='Ana', phone='2')
+        self.client_obj = Client.objects.create(barbershop=self.barbershop, name='Maria', phone_whatsap='1')
+        self.day = timezone.localdate() + timedelta(days=1)
+        self.api = APIClient()
+
+    def service(self, name, minutes, *professionals):
+        service = Service.objects.create(barbershop=self.barbershop, name=name, minutes_duration=minutes, value=40)
+        service.professionals_aptos.add(*professionals)
+        return service
+
+    def fit(self):
+        response = self.api.get('/api/v1/public/salao-teste/services-fit/', {'date': self.day.isoformat()})
+        self.assertEqual(response.status_code, 200)
+        return {
+            (row['service_name'], professional['professional_name']): professional['available_slots']
+            for row in response.data['services'] for professional in row['professionals']
+        }
+
+    def test_every_service_matches_its_single_service_endpoint(self):
+        services = [
+            self.service('Barba', 30, self.joao, self.ana),
+            self.service('Corte', 45, self.joao),
+            self.service('Química', 120, self.ana),
+            # Fora da grade de 5 minutos: calculado pela varredura
+            self.service('Sobrancelha', 12, self.ana),
+        ]
+        Scheduling.objects.create(
+            barbershop=self.barbershop, client=self.client_obj, service=services[0],
+            professional=self.joao, date_hour_init=at(10, 10, self.day),
+        )
+        Scheduling.objects.create(
+            barbershop=self.barbershop, client=self.client_obj, service=services[2],
+            professional=self.ana, date_hour_init=at(13, 0, self.day),
+        )
+
+        fit = self.fit()
+
+        for service in services:
+            response = self.api.get('/api/v1/public/salao-teste/service-availability/', {
+                'service_id': service.id, 'date': self.day.isoformat(),
+            })
+            for row in response.data['professionals']:
+                self.assertEqual(fit[(service.name, row['professional_name'])], row['available_slots'])
+        # 10:10-10:40 ocupa as células de 10:10 a 10:40: saem 10:00 e 10:30 da grade de 30 minutos
+        self.assertEqual(fit[('Barba', 'João')][:3], ['09:00', '09:30', '11:00'])
+
+    def test_queries_do_not_grow_with_the_number_of_services(self):
+        for minutes in range(15, 15 + 5 * 16, 5):
+            self.service(f'Serviço {minutes}', minutes, self.joao, self.ana)
+        self.fit()
+        # Uma reserva invalida o bitmap do dia de João; as janelas compiladas seguem no cache
+        with self.captureOnCommitCallbacks(execute=True):
+            Scheduling.objects.create(
+                barbershop=self.barbershop, client=self.client_obj, service=Service.objects.first(),
+                professional=self.joao, date_hour_init=at(9, 0, self.day),
+            )
+
+        # Serviços + profissionais aptos (prefetch) + uma consulta de agendamentos
+        with self.assertNumQueries(3):
+            fit = self.fit()
+
+        self.assertEqual(len(fit), 32)
+        self.assertEqual(fit[('Serviço 15', 'João')][0], '09:15')
+        self.assertEqual(fit[('Serviço 15', 'Ana')][0], '09:00')
+
+    def test_closed_day_and_default_date(self):
+        Closure.objects.create(
+            barbershop=self.barbershop, start=at(0, 0, self.day), end=at(0, 0, self.day + timedelta(days=1)),
+        )
+        self.service('Corte', 30, self.joao)
+
+        self.assertEqual(self.fit(), {('Corte', 'João'): []})
+        today = self.api.get('/api/v1/public/salao-teste/services-fit/')
+        self.assertEqual(today.data['date'], timezone.localdate().isoformat())
+
+
+class BenchmarkCommandsTests(TestCase):
+
+    def setUp(self):
+        reset_caches()
+
+    def test_dataset_generator_and_benchmark_report(self):
+        call_command(
+            'generate_dataset', barbershops=2, professionals=3, services=4, clients=50, days=20, future_days=3,
+            prefix='teste', stdout=io.StringIO(),
+        )
+
+        barbershop = BarberShop.objects.get(scheduling_link='teste-0')
+        schedulings = Scheduling.objects.filter(barbershop=barbershop)
+        self.assertGreater(schedulings.count(), 100)
+        self.assertEqual(Service.objects.filter(barbershop=barbershop).count(), 4)
+        self.assertTrue(schedulings.filter(status='Concluido').exists())
+        self.assertTrue(schedulings.filter(status__in=('Pendente', 'Confirmado'), date_hour_init__gt=timezone.now()).exists())
+        # Sem sobreposição por profissional, e as tabelas derivadas já estão montadas
+        for professional in Professional.objects.filter(barbershop=barbershop):
+            rows = list(schedulings.filter(professional=professional).order_by('date_hour_init')
+                        .values_list('date_hour_init', 'date_hour_end'))
+            self.assertTrue(all(end <= next_init for (_, end), (next_init, _) in zip(rows, rows[1:])))
+        self.assertEqual(rollups.verify(barbershop.pk), [])
+
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, 'resultado.json')
+            call_command('run_benchmarks', barbershop='teste-0', repeat=2, warmup=1, output=output, stdout=io.StringIO())
+            with open(output) as handle:
+                report = json.load(handle)
+
+        self.assertEqual(report['meta']['barbershop'], 'teste-0')
+        self.assertEqual(report['meta']['dataset']['services'], 4)
+        by_name = {result['name']: result for result in report['results']}
+        self.assertEqual(by_name['reserva pública']['status'], [201])
+        self.assertTrue(all(result['status'] == [200] for name, result in by_name.items() if name != 'reserva pública'))
+        self.assertTrue(all(result['p95_ms'] >= result['p50_ms'] for result in report['results']))
+        # A reserva medida é desfeita
+        self.assertEqual(schedulings.filter(date_hour_init__hour=20).count(), 0)
+
+        with self.assertRaises(CommandError):
+            call_command('generate_dataset', barbershops=1, prefix='teste', stdout=io.StringIO())
+
+        # --reset apaga os salões do prefixo (agendamentos e arquivados inclusive) e gera de novo
+        archived_id = Scheduling.objects.order_by('-pk').values_list('pk', flat=True)[0] + 1
+        SchedulingArchive.objects.create(
+            id=archived_id, barbershop=barbershop, client=Client.objects.filter(barbershop=barbershop).first(),
+            service=Service.objects.filter(barbershop=barbershop).first(),
+            professional=Professional.objects.filter(barbershop=barbershop).first(),
+            date_hour_init=timezone.now() - timedelta(days=400), initial_value=40, status='Concluido',
+            archived_at=timezone.now(),
+        )
+        call_command(
+            'generate_dataset', barbershops=1, professionals=2, services=2, clients=10, days=5, future_days=1,
+            prefix='teste', reset=True, stdout=io.StringIO(),
+        )
+        self.assertEqual(list(BarberShop.objects.values_list('scheduling_link', flat=True)), ['teste-0'])
+        self.assertFalse(SchedulingArchive.objects.exists())
+        self.assertEqual(Service.objects.count(), 2)
+
+
+
+class RequestMetricsTests(TestCase):
+
+    def setUp(self):
+        reset_caches()
+        metrics.registry.reset()
+        self.owner = User.objects.create_user(username='dono@teste.com', password='senha-forte-123')
+        self.barbershop = BarberShop.objects.create(
+            name='Salão Teste', email='dono@teste.com', owner=self.owner, scheduling_link='salao-teste'
+        )
+        self.professional = Professional.objects.create(barbershop=self.barbershop, name='João', phone='1')
+        self.service = Service.objects.create(barbershop=self.barbershop, name='Corte', minutes_duration=30, value=40)
+        self.service.professionals_aptos.add(self.professional)
+        self.api = APIClient()
+        self.api.force_authenticate(self.owner)
+
+    def test_records_requests_latency_and_queries_per_view(self):
+        executed = []
+
+        def count(execute, sql, params, many, context):
+            executed.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count):
+            self.assertEqual(self.api.get('/api/v1/servico/').status_code, 200)
+            self.api.get('/api/v1/servico/')
+        self.api.get('/api/v1/nao-existe/')
+
+        data = metrics.registry.snapshot()
+        self.assertEqual(data['requests'][('service-list', 'GET', 200)], 2)
+        self.assertEqual(data['requests'][(metrics.UNRESOLVED, 'GET', 404)], 1)
+        self.assertEqual(data['latency']['service-list'].count, 2)
+        self.assertEqual(data['queries']['service-list'].sum, len(executed))
+        self.assertGreater(data['query_seconds']['service-list'], 0)
+
+    @override_settings(QUERY_BUDGET=1)
+    def test_warns_when_a_request_exceeds_the_query_budget(self):
+        with self.assertLogs('project.metrics', level='WARNING') as logs:
+            self.api.get('/api/v1/servico/')
+        self.assertIn('service-list', logs.output[0])
+        self.assertEqual(metrics.registry.snapshot()['over_budget'], {'service-list': 1})
+
+    async def test_async_views_count_the_queries_of_the_orm_thread(self):
+        response = await self.async_client.get('/api/v1/async/public/salao-teste/')
+        self.assertEqual(response.status_code, 200)
+        queries = metrics.registry.snapshot()['queries']['async-public-scheduling']
+        self.assertEqual(queries.count, 1)
+        self.assertGreater(queries.sum, 0)
+
+    def test_metrics_endpoint_is_staff_only(self):
+        self.api.get('/api/v1/servico/')
+        self.assertEqual(self.api.get('/metrics/').status_code, 403)
+
+        staff = User.objects.create_user(username='ops@teste.com', password='senha-forte-123', is_staff=True)
+        self.api.force_authenticate(staff)
+        response = self.api.get('/metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        self.assertIn('http_requests_total{view="service-list",method="GET",status="200"} 1', body)
+        self.assertIn('http_request_duration_seconds_bucket{view="service-list",le="+Inf"} 1', body)
+        self.assertIn('db_queries_per_request_count{view="service-list"} 1', body)
+        self.assertIn('availability_cache_requests_total{result="hit"}', body)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'PRAGMAs específicos do SQLite')
+class SQLiteTuningTests(TestCase):
+
+    def test_connections_get_the_configured_pragmas(self):
+        values = {}
+        with connection.cursor() as cursor:
+            for name in ('journal_mode', 'synchronous', 'busy_timeout', 'mmap_size'):
+                cursor.execute(f'PRAGMA {name}')
+                values[name] = cursor.fetchone()[0]
+
+        self.assertEqual(values['journal_mode'], 'wal')
+        self.assertEqual(values['synchronous'], 1)  # NORMAL
+        self.assertEqual(values['busy_timeout'], settings.SQLITE_PRAGMAS['busy_timeout'])
+        self.assertEqual(values['mmap_size'], settings.SQLITE_PRAGMAS['mmap_size'])
+
+    def test_benchmark_command(self):
+        output = io.StringIO()
+        call_command('benchmark_sqlite', writers=2, readers=2, duration=0.2, rows=200, stdout=output)
+        lines = output.getvalue().splitlines()
+        self.assertTrue(lines[2].startswith('padrão'))
+        self.assertTrue(lines[3].startswith('ajustado'))
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Réplica simulada com uma cópia do arquivo SQLite')
+class ReadReplicaRoutingTests(TransactionTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # A réplica é um segundo arquivo, criado só para esta classe (o runner não a conhece)
+        cls.directory = tempfile.TemporaryDirectory()
+        connections.settings['replica1'] = {
+            **connections.settings['default'], 'NAME': os.path.join(cls.directory.name, 'replica.sqlite3'),
+        }
+        cls.databases = cls.databases | {'replica1'}
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica1'].close()
+        del connections['replica1']
+        del connections.settings['replica1']
+        cls.directory.cleanup()
+
+    def setUp(self):
+        reset_caches()
+        replicas = override_settings(DATABASE_REPLICAS=['replica1'])
+        replicas.enable()
+        self.addCleanup(replicas.disable)
+
+        self.owner = User.objects.create_user(username='dono@teste.com', password='senha-forte-123')
+        self.barbershop = BarberShop.objects.create(
+            name='Salão Teste', email='dono@teste.com', owner=self.owner, scheduling_link='salao-teste'
+        )
+        self.professional = Professional.objects.create(barbershop=self.barbershop, name='João', phone='1')
+        self.service = Service.objects.create(barbershop=self.barbershop, name='Corte', minutes_duration=30, value=40)
+        self.service.professionals_aptos.add(self.professional)
+        self.client_obj = Client.objects.create(barbershop=self.barbershop, name='Maria', phone_whatsap='1')
+        call_command('sync_sqlite_replica', stdout=io.StringIO())
+
+        self.api = APIClient()
+        self.api.force_authenticate(self.owner)
+
+    def lagging_write(self):
+        """Escrita que a réplica ainda não recebeu; o prazo em que ela prende o salão já passou."""
+        today = timezone.localdate()
+        RescheduleSuggestion.objects.create(
+            barbershop=self.barbershop, client=self.client_obj, service=self.service,
+            last_service_date=timezone.now() - timedelta(days=30),
+            window_start=today - timedelta(days=1), window_end=today + timedelta(days=1),
+        )
+        self.assertTrue(routers.is_pinned(self.barbershop.pk))
+        cache.delete(routers.pin_key(self.barbershop.pk))
+
+    def suggestions(self):
+        response = self.api.get('/api/v1/ai-sugestoes/')
+        self.assertEqual(response.status_code, 200)
+        return len(response.json())
+
+    def test_marked_reads_use_the_replica_until_a_write_pins_the_tenant(self):
+        self.lagging_write()
+
+        # Leitura marcada: réplica (atrasada). A mesma tabela no primário já tem a sugestão
+        self.assertEqual(self.suggestions(), 0)
+        self.assertEqual(RescheduleSuggestion.objects.count(), 1)
+
+        # Escrita do salão pela API: as leituras seguintes ficam no primário
+        response = self.api.post('/api/v1/servico/', {'name': 'Barba', 'minutes_duration': 30, 'value': '30.00'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.suggestions(), 1)
+
+        # Depois do prazo, de volta à réplica; um novo sync a atualiza
+        cache.delete(routers.pin_key(self.barbershop.pk))
+        self.assertEqual(self.suggestions(), 0)
+        call_command('sync_sqlite_replica', stdout=io.StringIO())
+        self.assertEqual(self.suggestions(), 1)
+
+    def test_public_reads_and_unmarked_views(self):
+        Service.objects.create(barbershop=self.barbershop, name='Barba', minutes_duration=30, value=30)
+        cache.clear()
+
+        response = self.api.get('/api/v1/public/salao-teste/')
+        self.assertEqual([service['name'] for service in response.json()['services']], ['Corte'])
+        # Views sem o mixin leem do primário
+        response = self.api.get('/api/v1/servico/')
+        self.assertEqual(sorted(service['name'] for service in response.json()['results']), ['Barba', 'Corte'])
+
+    def test_reads_after_a_write_or_inside_a_transaction_use_the_primary(self):
+        router = routers.PrimaryReplicaRouter()
+        state = routers.RoutingState()
+        state.replica = True
+        token = routers._state.set(state)
+        try:
+            self.assertEqual(router.db_for_read(Service), 'replica1')
+            with transaction.atomic():
+                self.assertIsNone(router.db_for_read(Service))
+
+            self.assertIsNone(router.db_for_write(Service, instance=self.service))
+            self.assertIsNone(router.db_for_read(Service))
+            self.assertTrue(routers.is_pinned(self.barbershop.pk))
+        finally:
+            routers._state.reset(token)
+
+        # Fora de uma requisição (comandos, worker): sempre o primário
+        self.assertIsNone(router.db_for_read(Service))
+
+
+class SchedulingArchiveTests(TestCase):
+
+    def setUp(self):
+        reset_caches()
+        owner = User.objects.create_user(username='dono@teste.com', password='senha-forte-123')
+        self.barbershop = BarberShop.objects.create(
+            name='Salão Teste', email='dono@teste.com', owner=owner, scheduling_link='salao-teste'
+        )
+        self.professional = Professional.objects.create(barbershop=self.barbershop, name='João', phone='1')
+        self.service = Service.objects.create(barbershop=self.barbershop, name='Corte', minutes_duration=30, value=40)
+        self.client_obj = Client.objects.create(barbershop=self.barbershop, name='Maria', phone_whatsap='1')
+        today = timezone.localdate()
+        self.old_completed = self.schedule(today - timedelta(days=400), 'Concluido')
+        self.old_cancelled = self.schedule(today - timedelta(days=300), 'Cancelado')
+        # Antigos mas não finalizados, e finalizados recentes: ficam na tabela quente
+        self.old_pending = self.schedule(today - timedelta(days=350), 'Pendente')
+        self.recent_completed = self.schedule(today - timedelta(days=10), 'Concluido')
+        self.api = APIClient()
+        self.api.force_authenticate(owner)
+
+    def schedule(self, day, status):
+        return Scheduling.objects.create(
+            barbershop=self.barbershop, client=self.client_obj, service=self.service, professional=self.professional,
+            date_hour_init=at(9, 0, day), initial_value=40, status=status,
+        )
+
+    def archive(self, **options):
+        output = io.StringIO()
+        call_command('archive_schedulings', days=180, stdout=output, **options)
+        return output.getvalue()
+
+    def suggestion_date(self):
+        return RescheduleSuggestion.objects.get(barbershop=self.barbershop).last_service_date
+
+    def test_moves_old_finished_schedulings_in_resumable_batches(self):
+        rollup_before = rollups.current(self.barbershop.pk)
+        OutboxMessage.objects.create(
+            barbershop=self.barbershop, scheduling=self.old_completed, kind='confirmation', status='sent',
+            scheduled_for=self.old_completed.date_hour_init, available_at=self.old_completed.date_hour_init,
+        )
+        self.assertIn('2 agendamentos seriam arquivados', self.archive(dry_run=True))
+
+        self.assertIn('1 agendamentos arquivados em 1 lotes', self.archive(batch_size=1, max_batches=1))
+        self.assertIn('1 agendamentos arquivados em 1 lotes', self.archive(batch_size=1))
+        self.assertIn('0 agendamentos arquivados', self.archive())
+
+        self.assertEqual(
+            set(Scheduling.objects.values_list('pk', flat=True)), {self.old_pending.pk, self.recent_completed.pk},
+        )
+        archived = SchedulingArchive.objects.get(pk=self.old_completed.pk)
+        self.assertEqual((archived.status, archived.date_hour_init), ('Concluido', self.old_completed.date_hour_init))
+        self.assertTrue(SchedulingArchive.objects.filter(pk=self.old_cancelled.pk).exists())
+        # As mensagens da outbox dos agendamentos movidos saem junto (CASCADE)
+        self.assertFalse(OutboxMessage.objects.filter(scheduling_id=self.old_completed.pk).exists())
+
+        # O histórico não muda: o resumo continua igual e bate com as duas tabelas
+        self.assertEqual(rollups.current(self.barbershop.pk), rollup_before)
+        self.assertEqual(rollups.verify(self.barbershop.pk), [])
+        rollups.rebuild(self.barbershop.pk)
+        self.assertEqual(rollups.current(self.barbershop.pk), rollup_before)
+
+    def test_suggestions_read_the_archive(self):
+        self.archive()
+        self.assertEqual(self.suggestion_date(), self.recent_completed.date_hour_init)
+
+        # O último 'Concluido' da tabela quente deixa de existir: vale o arquivado
+        self.recent_completed.delete()
+        self.assertEqual(self.suggestion_date(), self.old_completed.date_hour_init)
+
+        rebuild_suggestions(self.barbershop.pk)
+        self.assertEqual(self.suggestion_date(), self.old_completed.date_hour_init)
+
+    def test_export_includes_archived_rows_in_order(self):
+        self.archive()
+        response = self.api.get('/api/v1/agendamentos/export/', {'file_format': 'csv'})
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(
+            [int(row['id']) for row in rows],
+            [self.old_completed.pk, self.old_pending.pk, self.old_cancelled.pk, self.recent_completed.pk],
+        )
+        self.assertEqual(rows[0]['client'], 'Maria')
+
+        # Os filtros da listagem valem para as duas tabelas
+        response = self.api.get('/api/v1/agendamentos/export/', {'file_format': 'csv', 'status': 'Cancelado'})
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual([int(row['id']) for row in rows], [self.old_cancelled.pk])
+
+        # Período todo depois do horizonte: o arquivo nem é consultado
+        recent = (timezone.localdate() - timedelta(days=30)).isoformat()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.api.get('/api/v1/agendamentos/export/', {'file_format': 'csv', 'date_from': recent})
+            rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual([int(row['id']) for row in rows], [self.recent_completed.pk])
+        self.assertFalse([q for q in queries.captured_queries if SchedulingArchive._meta.db_table in q['sql']])
+
+    def test_conflicting_archive_row_aborts_the_batch(self):
+        SchedulingArchive.objects.create(
+            id=self.old_completed.pk, barbershop=self.barbershop, client=self.client_obj, service=self.service,
+            professional=self.professional, date_hour_init=self.old_completed.date_hour_init, initial_value=40,
+            status='Concluido', archived_at=timezone.now(),
+        )
+        with self.assertRaisesMessage(CommandError, 'já está no arquivo'):
+            self.archive()
+        # Nada foi apagado da tabela quente
+        self.assertTrue(Scheduling.objects.filter(pk=self.old_completed.pk).exists())
+        self.assertTrue(Scheduling.objects.filter(pk=self.old_cancelled.pk).exists())
+
+        with self.assertRaisesMessage(CommandError, 'SCHEDULING_ARCHIVE_AFTER_DAYS'):
+            call_command('archive_schedulings', days=30, stdout=io.StringIO())
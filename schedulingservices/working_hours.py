@@ -0,0 +1,137 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+
+from . import availability_cache
+from .dates import day_bounds
+from .models import Closure, Professional, WorkingHours
+
+
+# Expediente de um salão sem nenhum horário cadastrado: 09:00-18:00 todos os dias
+DEFAULT_WINDOWS = ((9 * 60, 18 * 60),)
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def _minutes(moment):
+    return moment.hour * 60 + moment.minute
+
+
+def subtract(windows, cuts):
+    """
+    windows - cuts, com os dois ordenados pelo início e sem sobreposição entre si (cuts pode se sobrepor).
+    Uma passada pelas duas listas; devolve tuplas (início, fim) ordenadas.
+    """
+    result = []
+    cuts = sorted(cuts)
+    index = 0
+    for start, end in windows:
+        while index < len(cuts) and cuts[index][1] <= start:
+            index += 1
+        cursor = start
+        position = index
+        while position < len(cuts) and cuts[position][0] < end:
+            cut_start, cut_end = cuts[position]
+            if cut_start > cursor:
+                result.append((cursor, cut_start))
+            cursor = max(cursor, cut_end)
+            position += 1
+        if cursor < end:
+            result.append((cursor, end))
+    return tuple(result)
+
+
+def _normalize(windows):
+    """Ordena e une janelas sobrepostas (cadastros redundantes do mesmo dia)."""
+    merged = []
+    for start, end in sorted(windows):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return tuple(merged)
+
+
+def compile_windows(professional_ids, target_date):
+    """
+    Lê as regras (expediente semanal + fechamentos) e devolve {professional_id: ((início, fim), ...)},
+    em minutos do dia local, ordenadas e sem sobreposição. Três consultas para todos os profissionais.
+    """
+    shop_of = dict(Professional.objects.filter(pk__in=professional_ids).values_list('pk', 'barbershop_id'))
+    shop_ids = set(shop_of.values())
+    weekday = target_date.weekday()
+
+    # Todos os dias da semana: é preciso saber se o profissional tem expediente próprio, mesmo que não hoje
+    shop_hours, professional_hours = defaultdict(list), defaultdict(list)
+    shop_has_rules, professional_has_rules = set(), set()
+    rules = WorkingHours.objects.filter(
+        Q(barbershop_id__in=shop_ids, professional__isnull=True) | Q(professional_id__in=professional_ids)
+    ).order_by().values_list('barbershop_id', 'professional_id', 'weekday', 'start', 'end')
+    for barbershop_id, professional_id, rule_weekday, start, end in rules:
+        if professional_id is None:
+            shop_has_rules.add(barbershop_id)
+        else:
+            professional_has_rules.add(professional_id)
+        if rule_weekday != weekday:
+            continue
+        window = (_minutes(start), _minutes(end))
+        if professional_id is None:
+            shop_hours[barbershop_id].append(window)
+        else:
+            professional_hours[professional_id].append(window)
+
+    # Fechamentos que tocam o dia, recortados para os minutos do dia local
+    day_start, day_end = day_bounds(target_date)
+    shop_cuts, professional_cuts = defaultdict(list), defaultdict(list)
+    closures = Closure.objects.filter(
+        Q(barbershop_id__in=shop_ids, professional__isnull=True) | Q(professional_id__in=professional_ids),
+        start__lt=day_end, end__gt=day_start,
+    ).order_by().values_list('barbershop_id', 'professional_id', 'start', 'end')
+    for barbershop_id, professional_id, start, end in closures:
+        cut = (
+            _minutes(timezone.localtime(start)) if start > day_start else 0,
+            _minutes(timezone.localtime(end)) if end < day_end else MINUTES_PER_DAY,
+        )
+        if professional_id is None:
+            shop_cuts[barbershop_id].append(cut)
+        else:
+            professional_cuts[professional_id].append(cut)
+
+    compiled = {}
+    for professional_id in professional_ids:
+        barbershop_id = shop_of.get(professional_id)
+        if professional_id in professional_has_rules:
+            windows = professional_hours[professional_id]
+        elif barbershop_id in shop_has_rules:
+            windows = shop_hours[barbershop_id]
+        else:
+            windows = DEFAULT_WINDOWS
+        compiled[professional_id] = subtract(
+            _normalize(windows), shop_cuts[barbershop_id] + professional_cuts[professional_id],
+        )
+    return compiled
+
+
+def compiled_windows(professional_ids, target_date):
+    """
+    {professional_id: ((início, fim), ...)} em minutos do dia, do cache por profissional/dia;
+    só os profissionais sem cache são compilados.
+    """
+    return availability_cache.get_many_windows(
+        professional_ids, target_date, lambda missing_ids: compile_windows(missing_ids, target_date),
+    )
+
+
+def windows_by_professional(professional_ids, target_date):
+    """Janelas de trabalho (início, fim) de cada profissional no dia, como datetimes no fuso corrente."""
+    compiled = compiled_windows(professional_ids, target_date)
+    midnight = datetime.combine(target_date, time.min, tzinfo=timezone.get_current_timezone())
+    return {
+        professional_id: [
+            (midnight + timedelta(minutes=start), midnight + timedelta(minutes=end))
+            for start, end in compiled[professional_id]
+        ]
+        for professional_id in professional_ids
+    }